@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Thu Oct 22 10:14:37 2026
+
+@author: Robert Becht (roblin67@gmail.com)
+
+Two-stage runs: align once with --align-only, keep the aligned frames,
+then merge them with --no-align. Changing merge or depthmap settings
+only costs the merge.
+
+focus-stack --align-only writes one aligned image per input, named
+after the input and prefixed with --output.
+"""
+
+import os
+import shutil
+
+from diskcache import DiskCache
+from hashing import FileHashIndex, combine
+from runner import binary_version, build_command
+from config import ALIGN_CACHE_DIR, ALIGN_CACHE_MAX_BYTES
+
+# Options that change the aligned frames
+ALIGNMENT_OPTIONS = (
+    "global_align", "full_res_align", "no_whitebalance", "no_contrast",
+    "no_transform",
+)
+
+ALIGNED_PREFIX = "aligned_"
+
+
+def can_stage(images, options):
+    """
+    Whether the run can be split into an alignment and a merge stage.
+    """
+    if options["no_align"] or options["align_only"] or len(images) < 2:
+        return False
+    # Aligned frames are named after the inputs
+    names = [os.path.basename(p) for p in images]
+    return len(set(names)) == len(names)
+
+
+def merge_options(options):
+    return dict(options, no_align=True, align_only=False)
+
+
+class AlignmentCache:
+    def __init__(self, root=ALIGN_CACHE_DIR, max_bytes=ALIGN_CACHE_MAX_BYTES,
+                 index=None):
+        self.cache = DiskCache(root, max_bytes)
+        self.index = index or FileHashIndex()
+
+    def key(self, images, options):
+        return combine(
+            "align",
+            binary_version(),
+            *self.index.digests(images),
+            *(f"{name}={options[name]}" for name in ALIGNMENT_OPTIONS),
+        )
+
+    def frames(self, key, count):
+        """
+        Cached aligned frames of key in stack order, or None.
+        """
+        entry = self.cache.get(key)
+        if entry is None:
+            return None
+        frames = sorted(
+            os.path.join(entry, name) for name in os.listdir(entry)
+        )
+        return frames if len(frames) == count else None
+
+    def stage(self, images, options):
+        """
+        (scratch directory, --align-only command) of the alignment stage.
+        """
+        work_dir = self.cache.new_dir()
+        options = dict(
+            options, align_only=True, no_align=False, depthmap=False,
+            output=os.path.join(work_dir, ALIGNED_PREFIX),
+        )
+        return work_dir, build_command(images, options)
+
+    def store(self, key, images, work_dir):
+        """
+        Move the aligned frames of a finished stage into the cache.
+        Returns them in stack order, or None if they cannot be matched
+        to the inputs.
+        """
+        try:
+            produced = sorted(os.listdir(work_dir))
+            if len(produced) != len(images):
+                return None
+
+            names = [ALIGNED_PREFIX + os.path.basename(p) for p in images]
+            if not set(names) <= set(produced):
+                # Other naming scheme: frames are numbered in input order
+                names = produced
+
+            files = {}
+            for i, name in enumerate(names):
+                ext = os.path.splitext(name)[1]
+                files[f"{i:05d}{ext}"] = os.path.join(work_dir, name)
+
+            entry = self.cache.put(key, files, move=True)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        return [os.path.join(entry, name) for name in sorted(files)]
+
+    def discard(self, work_dir):
+        shutil.rmtree(work_dir, ignore_errors=True)
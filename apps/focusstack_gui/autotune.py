@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Oct 21 09:44:12 2026
+
+@author: Robert Becht (roblin67@gmail.com)
+
+Calibration sweep over --threads, --batchsize and OpenCL, and the store
+of the fastest configuration per machine and frame resolution.
+"""
+
+import json
+import math
+import os
+import shutil
+import socket
+import tempfile
+import threading
+
+from runner import build_command
+from supervisor import ProcessSupervisor, STATUS_OK
+from config import TUNING_FILE, AUTOTUNE_FRAMES
+
+BATCH_SIZES = [4, 8, 16]
+
+
+def sample_frames(images, count=AUTOTUNE_FRAMES):
+    """
+    Evenly spaced subset of the stack, in stack order.
+    """
+    if len(images) <= count:
+        return list(images)
+    step = (len(images) - 1) / (count - 1)
+    return [images[round(i * step)] for i in range(count)]
+
+
+def machine_id():
+    return f"{socket.gethostname()}/{os.cpu_count()}cpu"
+
+
+def resolution_bucket(megapixels):
+    """
+    Resolution class: powers of sqrt(2) in megapixels.
+    """
+    return round(2 * math.log2(max(megapixels, 0.01)))
+
+
+class TuningStore:
+    """
+    Fastest measured options, per machine and per resolution bucket.
+    """
+
+    _lock = threading.Lock()
+
+    def __init__(self, path=TUNING_FILE):
+        self.path = path
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def lookup(self, megapixels, machine=None):
+        """
+        Tuned options of the closest resolution bucket of this machine,
+        or None.
+        """
+        profiles = self._load().get(machine or machine_id(), {})
+        if not profiles:
+            return None
+
+        bucket = resolution_bucket(megapixels)
+        nearest = min(profiles, key=lambda b: abs(int(b) - bucket))
+        if abs(int(nearest) - bucket) > 2:
+            return None
+        return profiles[nearest]
+
+    def save(self, megapixels, tuned, machine=None):
+        with self._lock:
+            data = self._load()
+            profiles = data.setdefault(machine or machine_id(), {})
+            profiles[str(resolution_bucket(megapixels))] = tuned
+
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp, self.path)
+
+
+class Autotuner:
+    """
+    Coordinate sweep: OpenCL on/off first, then threads, then batch size,
+    each time keeping the fastest value. About ten short runs.
+
+    A batch size only makes a difference on a stack of at least twice
+    its frames: the batch sizes are timed on a larger subset, and capped
+    at half of it on a short stack.
+    """
+
+    def __init__(self, images, options, on_message=None):
+        self.images = sample_frames(images)
+        self.batch_images = sample_frames(images, 2 * max(BATCH_SIZES))
+        self.options = dict(options, verbose=False, depthmap=False,
+                            align_only=False)
+        self.on_message = on_message or (lambda text: None)
+        self.results = []
+        self._supervisor = None
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+        if self._supervisor is not None:
+            self._supervisor.cancel()
+
+    def _trial(self, work_dir, options, images):
+        key = (options["threads"], options["batchsize"], options["no_opencl"],
+               len(images))
+        for previous, seconds in self.results:
+            if previous == key:
+                return seconds
+
+        options = dict(options, output=os.path.join(work_dir, "tune.jpg"))
+        self._supervisor = ProcessSupervisor(build_command(images, options))
+        result = self._supervisor.run()
+
+        seconds = result.duration if result.status == STATUS_OK else None
+        self.results.append((key, seconds))
+
+        label = (
+            f"threads={key[0]} batchsize={key[1]} "
+            f"opencl={'off' if key[2] else 'on'} frames={key[3]}"
+        )
+        if seconds is None:
+            self.on_message(f"{label}: {result.status}")
+        else:
+            self.on_message(f"{label}: {seconds:.2f} s")
+        return seconds
+
+    def _best(self, work_dir, base, key, values, images):
+        best_value, best_time = base[key], None
+        for value in values:
+            if self._cancelled:
+                break
+            seconds = self._trial(work_dir, dict(base, **{key: value}), images)
+            if seconds is not None and (best_time is None or seconds < best_time):
+                best_value, best_time = value, seconds
+        return dict(base, **{key: best_value}), best_time
+
+    def run(self):
+        """
+        Returns the tuned {"threads", "batchsize", "no_opencl", "seconds"},
+        or None if cancelled or every trial failed.
+        """
+        cores = os.cpu_count() or 1
+        work_dir = tempfile.mkdtemp(prefix="focusstack-tune-")
+
+        try:
+            base = dict(self.options, threads=cores, batchsize=8)
+            base, _ = self._best(
+                work_dir, base, "no_opencl", [False, True], self.images
+            )
+            threads = sorted({max(1, cores // 4), max(1, cores // 2), cores,
+                              cores + 1})
+            base, _ = self._best(
+                work_dir, base, "threads", threads, self.images
+            )
+            sizes = sorted({
+                max(1, min(size, len(self.batch_images) // 2))
+                for size in BATCH_SIZES
+            })
+            base, seconds = self._best(
+                work_dir, base, "batchsize", sizes, self.batch_images
+            )
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        if self._cancelled or seconds is None:
+            return None
+
+        return {
+            "threads": base["threads"],
+            "batchsize": base["batchsize"],
+            "no_opencl": base["no_opencl"],
+            "seconds": seconds,
+            "frames": len(self.batch_images),
+        }
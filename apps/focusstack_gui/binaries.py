@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 27 14:37:52 2026
+
+@author: Robert Becht (roblin67@gmail.com)
+
+Discovery of the focus-stack binary.
+
+FOCUS_STACK_BIN (a binary, an extracted tree or an .AppImage) if it is
+set. Otherwise the candidates are, in order, focus-stack on PATH, then
+the Focus-stack AppImages and extracted trees (squashfs-root) of
+FOCUS_STACK_SEARCH_DIRS. An AppImage
+is extracted once (--appimage-extract) into a cache folder named after
+the image, so jobs launch the native binary instead of mounting and
+decompressing the image every time. The first candidate answering
+--version is used, and remembered per (path, mtime, size): later starts
+do not run it again.
+
+A process using an extracted tree holds a shared flock on its .lock
+file; older extractions of the same image name are removed only when no
+process holds it.
+Does not import Qt.
+"""
+
+import functools
+import glob
+import json
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+from collections import namedtuple
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from hashing import combine
+from config import (
+    FOCUS_STACK_BIN, FOCUS_STACK_SEARCH_DIRS, BINARY_CACHE_DIR,
+    RESOLVED_BINARY_FILE
+)
+
+# (executable, candidate it was found from, --version, --opencv-version)
+ResolvedBinary = namedtuple(
+    "ResolvedBinary", ["path", "source", "version", "opencv_version"]
+)
+
+APPIMAGE_MAGIC = b"AI\x02"
+EXTRACT_TIMEOUT = 300
+PROBE_TIMEOUT = 30
+
+TREE_LOCK = ".lock"
+
+_lock = threading.Lock()
+# Lock files of the extracted trees this process uses, kept open
+_in_use = []
+
+
+class BinaryNotFound(Exception):
+    pass
+
+
+def is_appimage(path):
+    """
+    Type 2 AppImage: the magic bytes follow the ELF identification.
+    """
+    if path.lower().endswith(".appimage"):
+        return True
+    try:
+        with open(path, "rb") as f:
+            header = f.read(11)
+    except OSError:
+        return False
+    return header[:4] == b"\x7fELF" and header[8:11] == APPIMAGE_MAGIC
+
+
+def _stamp(path):
+    st = os.stat(path)
+    return [os.path.abspath(path), st.st_mtime_ns, st.st_size]
+
+
+def candidates():
+    """
+    Existing candidate paths, in order of preference.
+    """
+    if FOCUS_STACK_BIN:
+        return [FOCUS_STACK_BIN] if os.path.exists(FOCUS_STACK_BIN) else []
+
+    found = []
+    on_path = shutil.which("focus-stack")
+    if on_path:
+        found.append(on_path)
+
+    for folder in FOCUS_STACK_SEARCH_DIRS:
+        folder = os.path.expanduser(folder)
+        # Most recently downloaded first
+        found += sorted(
+            (p for p in glob.glob(os.path.join(folder, "*"))
+             if "focus" in os.path.basename(p).lower()
+             and p.lower().endswith(".appimage")),
+            key=os.path.getmtime, reverse=True
+        )
+        found += [
+            tree for tree in (os.path.join(folder, "squashfs-root"), folder)
+            if tree_binary(tree)
+        ]
+
+    unique = []
+    for path in found:
+        if os.path.exists(path) and path not in unique:
+            unique.append(path)
+    return unique
+
+
+def tree_binary(root):
+    """
+    Executable of an extracted AppImage tree, or None. The binary itself
+    finds the bundled libraries (RPATH); AppRun is the fallback.
+    """
+    for name in ("usr/bin/focus-stack", "AppRun"):
+        path = os.path.join(root, name)
+        if os.path.isfile(path) and os.access(path, os.X_OK):
+            return path
+    return None
+
+
+def extract_appimage(path, cache_dir=BINARY_CACHE_DIR):
+    """
+    Extracted tree of an AppImage in the cache, extracted if needed.
+    Older extractions of the same file name are removed.
+    """
+    name = os.path.splitext(os.path.basename(path))[0]
+    key = combine(*map(str, _stamp(path)))[:16]
+    root = os.path.join(cache_dir, f"{name}-{key}")
+    tree = os.path.join(root, "squashfs-root")
+    if os.path.isdir(tree):
+        return tree
+
+    os.makedirs(cache_dir, exist_ok=True)
+    work_dir = tempfile.mkdtemp(prefix=".extract-", dir=cache_dir)
+    try:
+        subprocess.run(
+            [os.path.abspath(path), "--appimage-extract"], cwd=work_dir,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            timeout=EXTRACT_TIMEOUT, check=True
+        )
+        if not os.path.isdir(os.path.join(work_dir, "squashfs-root")):
+            raise OSError(f"{path} did not extract")
+        try:
+            os.rename(work_dir, root)
+        except OSError:
+            # Extracted meanwhile by another process
+            if not os.path.isdir(tree):
+                raise
+    except subprocess.SubprocessError as e:
+        raise OSError(f"Cannot extract {path}: {e}") from e
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    _remove_old(cache_dir, name, root)
+    return tree
+
+
+def _remove_old(cache_dir, name, keep):
+    """
+    Remove the extractions of other versions of the image name that no
+    process uses.
+    """
+    if fcntl is None:
+        return
+    pattern = re.compile(re.escape(name) + r"-[0-9a-f]{16}")
+    for entry in os.scandir(cache_dir):
+        if (entry.path == keep or not pattern.fullmatch(entry.name)
+                or not entry.is_dir()):
+            continue
+        try:
+            with open(os.path.join(entry.path, TREE_LOCK), "a") as f:
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue
+                shutil.rmtree(entry.path, ignore_errors=True)
+        except OSError:
+            pass
+
+
+def _hold(path):
+    """
+    Mark the extracted tree of path, if it is one, as used by this
+    process.
+    """
+    cache_dir = os.path.abspath(BINARY_CACHE_DIR) + os.sep
+    path = os.path.abspath(path)
+    if fcntl is None or not path.startswith(cache_dir):
+        return
+    root = os.path.join(cache_dir, path[len(cache_dir):].split(os.sep)[0])
+    try:
+        f = open(os.path.join(root, TREE_LOCK), "a")
+        fcntl.flock(f, fcntl.LOCK_SH)
+    except OSError:
+        return
+    _in_use.append(f)
+
+
+def executable(source):
+    """
+    Path to launch for a candidate.
+    """
+    if os.path.isdir(source):
+        path = tree_binary(source)
+        if path is None:
+            raise OSError(f"No focus-stack binary in {source}")
+        return path
+    if is_appimage(source):
+        path = tree_binary(extract_appimage(source))
+        if path is None:
+            raise OSError(f"No focus-stack binary in {source}")
+        return path
+    # AppRun of a hand extracted tree
+    if os.path.basename(source) == "AppRun":
+        return tree_binary(os.path.dirname(source))
+    return source
+
+
+def probe(path):
+    """
+    (--version, --opencv-version) output of a binary.
+    Raises OSError if it does not answer --version.
+    """
+    def output(option):
+        try:
+            run = subprocess.run(
+                [path, option], capture_output=True, text=True,
+                timeout=PROBE_TIMEOUT
+            )
+        except subprocess.SubprocessError as e:
+            raise OSError(f"{path} {option}: {e}") from e
+        return run.returncode, run.stdout.strip()
+
+    code, version = output("--version")
+    if code != 0 or not version:
+        raise OSError(f"{path} --version failed (exit code {code})")
+    code, opencv = output("--opencv-version")
+    return version, opencv if code == 0 else ""
+
+
+def _load(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=1)
+    os.replace(tmp, path)
+
+
+def resolve(store=RESOLVED_BINARY_FILE):
+    """
+    ResolvedBinary of the first working candidate.
+    Raises BinaryNotFound listing why each candidate failed.
+    """
+    with _lock:
+        known = _load(store)
+        errors = []
+        for source in candidates():
+            record = known.get(os.path.abspath(source))
+            try:
+                if record and record["stamps"] == [
+                    _stamp(source), _stamp(record["path"])
+                ]:
+                    return ResolvedBinary(
+                        record["path"], source, record["version"],
+                        record["opencv_version"]
+                    )
+            except OSError:
+                pass
+
+            try:
+                path = executable(source)
+                version, opencv = probe(path)
+                known[os.path.abspath(source)] = {
+                    "path": path,
+                    "version": version,
+                    "opencv_version": opencv,
+                    "stamps": [_stamp(source), _stamp(path)],
+                }
+            except OSError as e:
+                errors.append(f"{source}: {e}")
+                continue
+            try:
+                _save(store, known)
+            except OSError:
+                pass
+            return ResolvedBinary(path, source, version, opencv)
+
+    if not errors and FOCUS_STACK_BIN:
+        errors = [f"{FOCUS_STACK_BIN} does not exist"]
+    elif not errors:
+        errors = ["set FOCUS_STACK_BIN or install focus-stack on the PATH"]
+    raise BinaryNotFound(
+        "No working focus-stack binary: " + "; ".join(errors)
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def focus_stack():
+    """
+    ResolvedBinary used by this process, resolved once.
+    Raises BinaryNotFound.
+    """
+    binary = resolve()
+    _hold(binary.path)
+    return binary
+
+
+def focus_stack_path():
+    """
+    Path of the binary jobs launch. Without a working binary, the
+    configured one: the run fails with its launch error
+    (ProcessSupervisor.launch_error). StackJob checks focus_stack()
+    first and fails with the BinaryNotFound text.
+    """
+    try:
+        return focus_stack().path
+    except BinaryNotFound:
+        return FOCUS_STACK_BIN or "focus-stack"
@@ -0,0 +1,657 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 25 16:02:19 2026
+
+@author: Robert Becht (roblin67@gmail.com)
+
+Headless batch mode: stacks the frames of folders and job files with the
+options, caches, queue scheduling and history of the GUI, without Qt.
+
+    python apps/focusstack_gui/cli.py ~/captures/2026-10-25 --detect
+    python apps/focusstack_gui/cli.py jobs.json --parallel 3
+
+A job file is a JSON list of jobs, or {"options": {...}, "jobs": [...]}
+with options shared by every job. A job is {"images": [...]} or
+{"folder": "...", "detect": true}, with optional "output" and "options".
+Option names are the GUI ones (see DEFAULT_OPTIONS), with the same value
+types, except cull, roi and proxy_size that decode the frames with Qt and
+are rejected.
+
+With --daemon the stacks run on the shared job daemon (daemon.py).
+With --watch the folder is watched for tethered capture and each bracket
+is stacked while it is captured, until interrupted (watchfolder.py).
+
+Exit status: 0 when every stack succeeded, 1 when one failed or was
+rejected, 2 for invalid arguments or job files, 130 when interrupted.
+"""
+
+import argparse
+import json
+import os
+import queue
+import signal
+import sys
+import threading
+
+from stackjob import PREPROCESS_OPTIONS, StackJob
+from jobqueue import Job, JobQueue, DONE, FAILED, CANCELLED, RUNNING
+from preflight import PreflightError, probe_stack
+from priority import PRIORITY_NAMES, PRIORITY_BACKGROUND
+from supervisor import STATUS_OK, STATUS_CANCELLED
+from autotune import TuningStore
+from imageinfo import IMAGE_EXTENSIONS
+from stackdetect import CaptureIndex, split_stacks
+from runner import default_output
+from daemonclient import DaemonClient, DaemonError
+from watchfolder import WatchSession
+from staging import prefetch_next, publisher
+from binaries import BinaryNotFound, focus_stack
+from config import JOB_TIMEOUT, JOB_IDLE_TIMEOUT, STACK_GAP_SECONDS
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_INTERRUPTED = 130
+
+# Options of the GUI with its default settings
+DEFAULT_OPTIONS = {
+    "global_align": False,
+    "full_res_align": False,
+    "no_align": False,
+    "align_only": False,
+    "no_whitebalance": False,
+    "no_contrast": False,
+    "no_transform": False,
+    "consistency": 2,
+    "denoise": 1.0,
+    "depthmap": False,
+    "depthmap_file": "depthmap.png",
+    "depth_threshold": 10,
+    "depth_smooth_xy": 20,
+    "depth_smooth_z": 40,
+    "threads": os.cpu_count() or 1,
+    "batchsize": 8,
+    "no_opencl": False,
+    "verbose": False,
+    "timeout": JOB_TIMEOUT,
+    "idle_timeout": JOB_IDLE_TIMEOUT,
+    "use_cache": True,
+    "scratch": False,
+    "reuse_alignment": False,
+    "roi": None,
+    "cull": False,
+    "proxy_size": 0,
+    "substacks": False,
+    "incremental": False,
+    "slab_size": 0,
+    "slab_overlap": 2,
+}
+
+
+class JobFileError(Exception):
+    pass
+
+
+def check_qt_free(options, where=""):
+    """
+    Raise JobFileError if options would decode the frames with Qt.
+    """
+    names = [name for name in PREPROCESS_OPTIONS if options.get(name)]
+    if names:
+        raise JobFileError(
+            f"{where}{', '.join(names)}: not available without Qt, "
+            f"use the GUI"
+        )
+
+
+def _valid_value(name, value):
+    default = DEFAULT_OPTIONS[name]
+    if name == "roi":
+        return value is None or (
+            isinstance(value, list) and len(value) == 4
+            and all(type(v) in (int, float) for v in value)
+        )
+    if isinstance(default, float):
+        return type(value) in (int, float)
+    return type(value) is type(default)
+
+
+def check_options(options):
+    """
+    Raise ValueError for unknown options and values of the wrong type.
+    """
+    unknown = set(options) - set(DEFAULT_OPTIONS)
+    if unknown:
+        raise ValueError(f"Unknown options {', '.join(sorted(unknown))}")
+    invalid = [
+        name for name, value in options.items()
+        if not _valid_value(name, value)
+    ]
+    if invalid:
+        raise ValueError(f"Invalid values for {', '.join(sorted(invalid))}")
+
+
+def job_options(options):
+    """
+    DEFAULT_OPTIONS updated with options, which must include an absolute
+    "output" path. Raises ValueError for unknown options and values of
+    the wrong type.
+    """
+    options = dict(options)
+    output = options.pop("output", None)
+    if not isinstance(output, str) or not os.path.isabs(output):
+        raise ValueError("A job needs an absolute output path")
+    check_options(options)
+    return dict(DEFAULT_OPTIONS, **options, output=output)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__.split("\n\n")[1],
+        epilog="Exit status: 0 ok, 1 a stack failed, 2 usage, 130 interrupted",
+    )
+    parser.add_argument("inputs", nargs="+", metavar="INPUT",
+                        help="folder of frames or JSON job file")
+    parser.add_argument("--detect", action="store_true",
+                        help="split folders into stacks from EXIF data")
+    parser.add_argument("--gap", type=float, default=STACK_GAP_SECONDS,
+                        help="pause (s) between two stacks for --detect")
+    parser.add_argument("--watch", action="store_true",
+                        help="stack the brackets captured into the folder")
+    parser.add_argument("--frames", type=int, default=0,
+                        help="frames per bracket for --watch "
+                             "(default: learned from the first one)")
+    parser.add_argument("-o", "--output",
+                        help="output file (a single stack only)")
+    parser.add_argument("--output-dir", default=os.getcwd(),
+                        help="folder of the generated output names")
+    parser.add_argument("--no-subfolder", action="store_true",
+                        help="no dated subfolder in --output-dir")
+    parser.add_argument("--set", action="append", default=[],
+                        metavar="OPTION=VALUE",
+                        help="override an option, the value is JSON or text")
+    parser.add_argument("--no-tuned", action="store_true",
+                        help="ignore the autotune results")
+    parser.add_argument("-j", "--parallel", type=int, default=2,
+                        help="stacks running at once")
+    parser.add_argument("--daemon", action="store_true",
+                        help="run the stacks on the shared job daemon")
+    parser.add_argument("--priority", default="background",
+                        choices=[n.lower() for n in PRIORITY_NAMES.values()])
+    parser.add_argument("-v", "--verbose", action="store_true",
+                        help="print the focus-stack output")
+    parser.add_argument("-q", "--quiet", action="store_true",
+                        help="only print the summary")
+    return parser.parse_args(argv)
+
+
+def parse_option(text):
+    """
+    "name=value" -> (name, value), value as JSON if it parses.
+    """
+    name, sep, value = text.partition("=")
+    if not sep or name not in DEFAULT_OPTIONS:
+        raise JobFileError(f"Unknown option: {text}")
+    try:
+        value = json.loads(value)
+    except ValueError:
+        pass
+    check_qt_free({name: value})
+    return name, value
+
+
+def folder_images(folder):
+    """
+    Images of a folder, sorted by name.
+    """
+    with os.scandir(folder) as entries:
+        return sorted(
+            e.path for e in entries
+            if e.name.lower().endswith(IMAGE_EXTENSIONS) and e.is_file()
+        )
+
+
+def folder_stacks(folder, detect, gap):
+    """
+    Frame lists of a folder: every image, or the stacks found from the
+    EXIF data when detect is set.
+    """
+    if not detect:
+        images = folder_images(folder)
+        return [images] if images else []
+
+    captures = CaptureIndex().scan(folder)
+    return [
+        [path for path, _ in stack] for stack in split_stacks(captures, gap)
+    ]
+
+
+def load_jobs(path, args):
+    """
+    (images, output or None, options) of the jobs of a job file.
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        raise JobFileError(f"{path}: {e}") from e
+
+    shared = {}
+    if isinstance(data, dict):
+        shared = data.get("options", {})
+        data = data.get("jobs", [])
+    if not isinstance(data, list) or not isinstance(shared, dict):
+        raise JobFileError(f"{path}: expected a list of jobs")
+
+    base = os.path.dirname(os.path.abspath(path))
+    jobs = []
+    for entry in data:
+        if not isinstance(entry, dict) \
+                or not isinstance(entry.get("options", {}), dict):
+            raise JobFileError(f"{path}: a job must be an object")
+        options = dict(shared, **entry.get("options", {}))
+        try:
+            check_options(options)
+        except ValueError as e:
+            raise JobFileError(f"{path}: {e}") from e
+        check_qt_free(options, f"{path}: ")
+
+        output = entry.get("output")
+        if output:
+            output = os.path.join(base, output)
+
+        if "images" in entry:
+            if not isinstance(entry["images"], list) \
+                    or not all(isinstance(p, str) for p in entry["images"]):
+                raise JobFileError(f"{path}: images must be a list of paths")
+            stacks = [[os.path.join(base, p) for p in entry["images"]]]
+        elif "folder" in entry:
+            stacks = folder_stacks(
+                os.path.join(base, entry["folder"]),
+                entry.get("detect", args.detect), entry.get("gap", args.gap)
+            )
+        else:
+            raise JobFileError(f"{path}: a job needs images or a folder")
+
+        if output and len(stacks) > 1:
+            raise JobFileError(f"{path}: one output for several stacks")
+        jobs += [(images, output, options) for images in stacks]
+
+    return jobs
+
+
+def collect_jobs(args):
+    """
+    (images, options) of every stack given on the command line.
+    """
+    overrides = dict(parse_option(text) for text in args.set)
+    try:
+        check_options(overrides)
+    except ValueError as e:
+        raise JobFileError(f"--set: {e}") from e
+
+    jobs = []
+    for path in args.inputs:
+        if os.path.isdir(path):
+            jobs += [
+                (images, None, {})
+                for images in folder_stacks(path, args.detect, args.gap)
+            ]
+        else:
+            jobs += load_jobs(path, args)
+
+    if args.output and len(jobs) > 1:
+        raise JobFileError("--output needs a single stack")
+
+    tuning = None if args.no_tuned else TuningStore()
+    result = []
+    for images, output, options in jobs:
+        if not images:
+            continue
+        # Like the GUI, tuned values unless they are set explicitly
+        explicit = set(options) | set(overrides)
+        options = dict(DEFAULT_OPTIONS, **options)
+        if tuning is not None and not {"batchsize", "no_opencl"} & explicit:
+            _apply_tuning(tuning, images, options)
+        options.update(overrides)
+        # The dated folder is created when the job is submitted
+        options["output"] = os.path.abspath(
+            output or args.output or default_output(
+                images, args.output_dir, not args.no_subfolder, create=False
+            )
+        )
+        result.append((images, options))
+    return result
+
+
+def make_output_dir(options):
+    os.makedirs(os.path.dirname(options["output"]), exist_ok=True)
+
+
+def _apply_tuning(tuning, images, options):
+    try:
+        info = probe_stack(images[:1])
+    except PreflightError:
+        return
+    tuned = tuning.lookup(info.width * info.height / 1e6)
+    if tuned:
+        options.update(
+            batchsize=tuned["batchsize"], no_opencl=tuned["no_opencl"]
+        )
+
+
+class BatchRunner:
+    """
+    Runs the jobs of a JobQueue in threads, reporting on stdout.
+    """
+
+    def __init__(self, job_queue, verbose=False, quiet=False):
+        self.queue = job_queue
+        self.verbose = verbose
+        self.quiet = quiet
+        self.stack_jobs = {}
+        self.threads = {}
+        self.events = queue.Queue()
+        # Results that could not be copied from the scratch area
+        self.unpublished = []
+
+    def _print(self, text):
+        if not self.quiet:
+            print(text, flush=True)
+
+    def _start(self, job):
+        def on_output(text):
+            if self.verbose:
+                self._print("\n".join(
+                    f"[job {job.id}] {line}" for line in text.split("\n")
+                ))
+
+        try:
+            make_output_dir(job.options)
+        except OSError as e:
+            self._print(f"[job {job.id}] {e}")
+        stack_job = StackJob(
+            job.images, job.options, job.priority,
+            on_output=on_output,
+            on_status=lambda text: self._print(f"[job {job.id}] {text}"),
+            on_finished=lambda code, status: self.events.put(
+                (job, code, status)
+            ),
+            on_published=lambda error: self._published(job, error),
+        )
+        self.stack_jobs[job.id] = stack_job
+        self.queue.mark_started(job)
+        self._print(
+            f"[job {job.id}] {job.name}: {len(job.images)} frames, "
+            f"{job.threads} threads, batch size {job.options['batchsize']}. "
+            f"{job.note}"
+        )
+        thread = threading.Thread(target=stack_job.run, daemon=True)
+        self.threads[job.id] = thread
+        thread.start()
+
+    def _published(self, job, error):
+        if error:
+            self.unpublished.append(job.id)
+            print(f"[job {job.id}] {error}", file=sys.stderr, flush=True)
+
+    def _finish(self, job, returncode, run_status):
+        self.threads.pop(job.id).join()
+        self.stack_jobs.pop(job.id)
+        if run_status == STATUS_OK:
+            status = DONE
+        elif run_status == STATUS_CANCELLED:
+            status = CANCELLED
+        else:
+            status = FAILED
+            job.note = f"{run_status}, exit code {returncode}"
+        self.queue.mark_finished(job, status)
+        self._print(f"[job {job.id}] {status.lower()}. {job.note}")
+
+    def stop(self):
+        for job in self.queue.pending():
+            self.queue.cancel(job.id)
+        for stack_job in self.stack_jobs.values():
+            stack_job.stop()
+
+    def run(self):
+        interrupted = False
+        while True:
+            if not interrupted:
+                for job in self.queue.schedule():
+                    self._start(job)
+                prefetch_next(self.queue)
+            if not self.threads:
+                break
+            try:
+                self._finish(*self.events.get())
+            except KeyboardInterrupt:
+                interrupted = True
+                self._print("Interrupted, cancelling the running stacks")
+                self.stop()
+        publisher.wait()
+        return not interrupted
+
+
+def run_on_daemon(jobs, priority, args):
+    """
+    Submit the stacks to the shared job daemon and follow them until
+    they finish. Returns the exit status.
+    """
+    client = DaemonClient()
+    try:
+        # Watch before submitting so no event of our jobs is missed
+        stream = client.watch()
+    except (OSError, ValueError, DaemonError) as e:
+        print(f"error: job daemon unavailable: {e}", file=sys.stderr)
+        return EXIT_USAGE
+
+    def say(text):
+        if not args.quiet:
+            print(text, flush=True)
+
+    outputs = {}
+    rejected = 0
+    for images, options in jobs:
+        try:
+            make_output_dir(options)
+            job_id = client.submit(images, options, priority)
+        except (OSError, ValueError, DaemonError) as e:
+            print(f"Stack {os.path.basename(images[0])}: {e}", file=sys.stderr)
+            rejected += 1
+            continue
+        outputs[job_id] = options["output"]
+        say(f"[job {job_id}] queued: {len(images)} frames")
+
+    results = {}
+    progress = {}
+    signal.signal(signal.SIGTERM, _terminate)
+    try:
+        for event in stream:
+            if len(results) == len(outputs):
+                break
+            kind = event["event"]
+            if kind == "jobs":
+                for job in event["jobs"]:
+                    text = job["progress"]
+                    if job["id"] in outputs and job["status"] == RUNNING \
+                            and text and progress.get(job["id"]) != text:
+                        progress[job["id"]] = text
+                        say(f"[job {job['id']}] {text}")
+            elif event.get("job") not in outputs:
+                continue
+            elif kind == "output" and args.verbose:
+                say("\n".join(
+                    f"[job {event['job']}] {line}"
+                    for line in event["text"].split("\n")
+                ))
+            elif kind == "finished":
+                results[event["job"]] = event["status"]
+                say(
+                    f"[job {event['job']}] {event['status']}, "
+                    f"exit code {event['returncode']}"
+                )
+                if len(results) == len(outputs):
+                    break
+    except KeyboardInterrupt:
+        say("Interrupted, cancelling the stacks")
+        for job_id in set(outputs) - set(results):
+            try:
+                client.cancel(job_id)
+            except (OSError, ValueError, DaemonError):
+                pass
+        return EXIT_INTERRUPTED
+    finally:
+        stream.close()
+
+    if len(results) < len(outputs):
+        print("error: lost the connection to the job daemon", file=sys.stderr)
+        return EXIT_FAILED
+
+    done = [i for i, status in results.items() if status == STATUS_OK]
+    cancelled = [i for i, status in results.items()
+                 if status == STATUS_CANCELLED]
+    print(
+        f"{len(done)} done, "
+        f"{len(results) - len(done) - len(cancelled) + rejected} failed, "
+        f"{len(cancelled)} cancelled"
+    )
+    for job_id in done:
+        print(outputs[job_id])
+    return EXIT_OK if len(done) == len(results) and not rejected else EXIT_FAILED
+
+
+def check_binary(args):
+    """
+    Resolve the focus-stack binary before any job starts.
+    """
+    try:
+        binary = focus_stack()
+    except BinaryNotFound as e:
+        print(f"error: {e}", file=sys.stderr)
+        return False
+    if args.verbose:
+        print(f"{binary.version}: {binary.path}", flush=True)
+    return True
+
+
+def watch_folder(args):
+    """
+    Stack the brackets captured into the folder until interrupted.
+    Returns the exit status.
+    """
+    folder = args.inputs[0]
+    if len(args.inputs) > 1 or not os.path.isdir(folder) \
+            or args.output or args.daemon:
+        print("error: --watch needs a single folder, without --output "
+              "and --daemon", file=sys.stderr)
+        return EXIT_USAGE
+    try:
+        overrides = dict(map(parse_option, args.set))
+        check_options(overrides)
+        options = dict(DEFAULT_OPTIONS, **overrides)
+    except (JobFileError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return EXIT_USAGE
+    if not check_binary(args):
+        return EXIT_USAGE
+
+    def say(text):
+        if not args.quiet:
+            print(text, flush=True)
+
+    failed = []
+
+    def on_finished(images, output, returncode, run_status):
+        name = os.path.basename(images[0])
+        if run_status == STATUS_OK:
+            print(output, flush=True)
+            return
+        failed.append(name)
+        print(f"Stack {name}: {run_status}, exit code {returncode}",
+              file=sys.stderr, flush=True)
+
+    session = WatchSession(
+        folder, options, args.output_dir, not args.no_subfolder,
+        max(0, args.frames), args.gap, args.verbose,
+        on_output=say,
+        on_status=lambda images, text: say(
+            f"[{os.path.basename(images[0])}] {text}"
+        ),
+        on_finished=on_finished,
+    )
+    signal.signal(signal.SIGTERM, _terminate)
+    try:
+        session.run()
+    except KeyboardInterrupt:
+        say("Stopped watching")
+    except OSError as e:
+        print(f"error: cannot watch {folder}: {e}", file=sys.stderr)
+        return EXIT_USAGE
+    publisher.wait()
+    return EXIT_FAILED if failed else EXIT_OK
+
+
+def _terminate(signum, frame):
+    raise KeyboardInterrupt
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.watch:
+        return watch_folder(args)
+    try:
+        jobs = collect_jobs(args)
+    except (JobFileError, OSError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return EXIT_USAGE
+    if not jobs:
+        print("error: no images found", file=sys.stderr)
+        return EXIT_USAGE
+
+    priority = {
+        name.lower(): level for level, name in PRIORITY_NAMES.items()
+    }.get(args.priority, PRIORITY_BACKGROUND)
+    if args.daemon:
+        return run_on_daemon(jobs, priority, args)
+    if not check_binary(args):
+        return EXIT_USAGE
+
+    job_queue = JobQueue(max_parallel=max(1, args.parallel))
+
+    rejected = 0
+    for images, options in jobs:
+        try:
+            info = probe_stack(images)
+        except PreflightError as e:
+            print(f"Stack {os.path.basename(images[0])} rejected: {e}",
+                  file=sys.stderr)
+            rejected += 1
+            continue
+        job_queue.add(Job(images, options, info=info, priority=priority))
+
+    # cron and service managers stop jobs with SIGTERM
+    signal.signal(signal.SIGTERM, _terminate)
+    runner = BatchRunner(job_queue, args.verbose, args.quiet)
+    completed = runner.run()
+
+    summary = job_queue.summary()
+    print(
+        f"{summary['done']} done, {summary['failed'] + rejected} failed, "
+        f"{summary['cancelled']} cancelled in {summary['elapsed']:.1f} s"
+    )
+    for job in job_queue.jobs:
+        if job.status == DONE:
+            print(job.options["output"])
+
+    if not completed:
+        return EXIT_INTERRUPTED
+    if summary["failed"] or summary["cancelled"] or rejected \
+            or runner.unpublished:
+        return EXIT_FAILED
+    return EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
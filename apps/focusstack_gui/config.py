@@ -6,5 +6,137 @@ Created on Sat Feb 21 21:55:10 2026
 @author: Robert Becht (roblin67@gmail.com)
 """
 
-FOCUS_STACK_BIN = "/home/robert/Applications/AppImages/Focus-stack/squashfs-root/AppRun"
+import os
+
+# A binary, extracted AppImage tree or .AppImage, looked up if not set
+# (binaries.py). Can be overridden from the environment, e.g. to point at
+# the simulator in benchmarks/fake_focus_stack.py
+FOCUS_STACK_BIN = os.environ.get("FOCUS_STACK_BIN")
+# Searched for Focus-stack AppImages and extracted trees after the PATH
+FOCUS_STACK_SEARCH_DIRS = [
+    "~/Applications/AppImages/Focus-stack",
+    "~/Applications/AppImages",
+    "~/Applications",
+    "~/.local/bin",
+    "/opt/focus-stack",
+]
 # DEFAULT_OUTPUT = "stack_result.jpg"
+
+# Local cache root (thumbnails, ...)
+CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")),
+    "focusstack-gui"
+)
+
+# Extracted AppImages and the resolved focus-stack binary
+BINARY_CACHE_DIR = os.path.join(CACHE_DIR, "binaries")
+RESOLVED_BINARY_FILE = os.path.join(BINARY_CACHE_DIR, "resolved.json")
+
+# Per-machine settings
+CONFIG_DIR = os.path.join(
+    os.environ.get("XDG_CONFIG_HOME", os.path.expanduser("~/.config")),
+    "focusstack-gui"
+)
+
+# Autotune: fastest threads / batch size / OpenCL per machine and resolution
+TUNING_FILE = os.path.join(CONFIG_DIR, "tuning.json")
+AUTOTUNE_FRAMES = 6
+
+# Local state root (logs, run history)
+STATE_DIR = os.path.join(
+    os.environ.get("XDG_STATE_HOME", os.path.expanduser("~/.local/state")),
+    "focusstack-gui"
+)
+
+# Per-job log files
+LOG_DIR = os.path.join(STATE_DIR, "logs")
+LOG_FLUSH_HZ = 20
+# Older logs are removed when a new one is opened (seconds, count)
+LOG_MAX_AGE = 30 * 24 * 3600
+LOG_MAX_FILES = 1000
+CONSOLE_MAX_LINES = 5000
+
+# Shared job daemon, one queue for every GUI window and script
+DAEMON_SOCKET = os.environ.get(
+    "FOCUS_STACK_SOCKET", os.path.join(STATE_DIR, "daemon.sock")
+)
+# Output lines of each job replayed to clients attaching later
+DAEMON_LOG_LINES = 2000
+DAEMON_KEEP_FINISHED = 50
+
+# Run history and resource telemetry
+HISTORY_DB = os.path.join(STATE_DIR, "history.sqlite")
+TELEMETRY_INTERVAL = 1.0
+
+# Measured run durations, used for ETA estimates
+CALIBRATION_FILE = os.path.join(CACHE_DIR, "calibration.json")
+
+# Content hashes of input frames, per path / mtime / size
+HASH_INDEX_DB = os.path.join(CACHE_DIR, "hashes.sqlite")
+
+# Stacking results, keyed by input content and arguments
+RESULT_CACHE_DIR = os.path.join(CACHE_DIR, "results")
+RESULT_CACHE_MAX_BYTES = 20 * 1024 ** 3
+
+# Aligned frames (--align-only output), keyed by input content and
+# alignment options
+ALIGN_CACHE_DIR = os.path.join(CACHE_DIR, "aligned")
+ALIGN_CACHE_MAX_BYTES = 20 * 1024 ** 3
+
+# Stacked frame groups of incremental runs
+GROUP_CACHE_DIR = os.path.join(CACHE_DIR, "groups")
+GROUP_CACHE_MAX_BYTES = 10 * 1024 ** 3
+INCREMENTAL_GROUP_FRAMES = 16
+
+# Scratch area on a local SSD or tmpfs (option "scratch"): staged input
+# frames of network storage, and outputs until they are published
+SCRATCH_DIR = os.environ.get(
+    "FOCUS_STACK_SCRATCH", os.path.join(CACHE_DIR, "scratch")
+)
+SCRATCH_MAX_BYTES = 10 * 1024 ** 3
+# Unpublished outputs older than this (seconds) are removed
+SCRATCH_OUTPUT_MAX_AGE = 7 * 24 * 3600
+
+# Sharpness profiles of frames, for culling
+SHARPNESS_DB = os.path.join(CACHE_DIR, "sharpness.sqlite")
+
+# EXIF capture metadata of scanned folders, for stack detection
+CAPTURE_DB = os.path.join(CACHE_DIR, "captures.sqlite")
+# A pause longer than this (seconds) between two frames starts a new stack
+STACK_GAP_SECONDS = 10.0
+
+# Watch-folder mode: seconds focus-stack waits for each frame of a bracket
+# still being captured (--wait-images), polling interval without inotify
+WATCH_WAIT_SECONDS = 60
+WATCH_POLL_SECONDS = 0.5
+
+# Preview runs: frames scaled down to a long edge in pixels
+PROXY_LONG_EDGE = 1200
+PROXY_DIR = os.path.join(CACHE_DIR, "proxies")
+PROXY_CACHE_MAX_BYTES = 2 * 1024 ** 3
+PREVIEW_DIR = os.path.join(CACHE_DIR, "preview")
+
+# Region of interest: frames cropped to the ROI plus a margin for
+# alignment drift, as a fraction of the larger ROI side
+ROI_MARGIN = 0.10
+CROP_DIR = os.path.join(CACHE_DIR, "crops")
+CROP_CACHE_MAX_BYTES = 5 * 1024 ** 3
+
+# Thumbnails
+THUMBNAIL_SIZE = 120
+THUMBNAIL_DIR = os.path.join(CACHE_DIR, "thumbnails")
+THUMBNAIL_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Result viewer: tile pyramids of the results, decoded tiles kept in memory
+# per view, pixels decoded at once while building a pyramid, and largest
+# image decoded whole (TIFF results, EXIF-rotated JPEGs)
+VIEWER_TILE_SIZE = 512
+VIEWER_TILE_DIR = os.path.join(CACHE_DIR, "tiles")
+VIEWER_TILE_CACHE_MAX_BYTES = 5 * 1024 ** 3
+VIEWER_MEMORY_BYTES = 256 * 1024 ** 2
+VIEWER_BAND_PIXELS = 32 * 1024 ** 2
+VIEWER_WHOLE_MAX_BYTES = 4 * 1024 ** 3
+
+# Watchdogs, in seconds (0 disables)
+JOB_TIMEOUT = 0
+JOB_IDLE_TIMEOUT = 30 * 60
@@ -0,0 +1,491 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 26 09:21:45 2026
+
+@author: Robert Becht (roblin67@gmail.com)
+
+Shared job daemon: one queue and one CPU / memory budget for every GUI
+window and script of the machine, served over a Unix domain socket.
+
+    python apps/focusstack_gui/daemon.py --parallel 2
+
+The protocol is one JSON object per line. Requests:
+
+    {"cmd": "submit", "images": [...], "options": {...}, "priority": 0,
+     "watch": false}
+    {"cmd": "jobs"}
+    {"cmd": "cancel", "job": 3}
+    {"cmd": "clear"}
+    {"cmd": "watch", "job": 3}          (without "job": every job)
+
+Each request gets one reply, {"ok": true, ...} or {"ok": false, "error":
+"..."}. After watch, or submit with "watch": true, the connection
+receives the events of the job (or of every job) until it is closed,
+starting with the job list and the recent output:
+
+    {"event": "jobs", "jobs": [...], "summary": {...}}
+    {"event": "output", "job": 3, "text": "..."}
+    {"event": "progress", "job": 3, "percent": 42}
+    {"event": "finished", "job": 3, "returncode": 0, "status": "ok"}
+    {"event": "recorded", "job": 3, "run": 12}
+    {"event": "published", "job": 3, "error": null}   (option "scratch")
+
+Jobs run as the user of the daemon: a client that can connect can have
+the outputs ("output", "depthmap_file") written anywhere that user can
+write. Share the socket (--mode 660) only with a trusted group.
+
+Does not import Qt, except to run jobs of the GUI with the options that
+decode frames (cull, roi, proxy_size); those are rejected when PyQt6 is
+not installed.
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import queue
+import signal
+import socket
+import sys
+import threading
+import traceback
+from collections import deque
+
+import sqlite3
+
+from stackjob import PREPROCESS_OPTIONS, StackJob
+from jobqueue import Job, JobQueue, DONE, FAILED, CANCELLED, RUNNING
+from preflight import PreflightError, probe_stack
+from priority import PRIORITY_BACKGROUND, PRIORITY_NAMES
+from supervisor import STATUS_OK, STATUS_CANCELLED, STATUS_FAILED
+from staging import prefetch_next, publisher
+from binaries import BinaryNotFound, focus_stack
+from cli import job_options
+from config import DAEMON_SOCKET, DAEMON_LOG_LINES, DAEMON_KEEP_FINISHED
+
+# Events queued for a watcher that does not read them
+WATCH_QUEUE_SIZE = 10000
+MAX_REQUEST_BYTES = 16 * 1024 ** 2
+
+
+class DaemonRunning(Exception):
+    pass
+
+
+def job_state(job):
+    """
+    JSON view of a queued job.
+    """
+    return {
+        "id": job.id,
+        "name": job.name,
+        "frames": len(job.images),
+        "output": job.options.get("output"),
+        "threads": job.threads,
+        "priority": job.priority,
+        "status": job.status,
+        "note": job.note,
+        "progress": job.progress,
+        "duration": job.duration,
+        "started": job.started is not None,
+    }
+
+
+class _Watcher:
+    """
+    Events for one watching connection, sent by its own thread so a
+    slow client never blocks the jobs.
+    """
+
+    def __init__(self, job_id=None):
+        self.job_id = job_id
+        self.events = queue.Queue(WATCH_QUEUE_SIZE)
+
+    def send(self, event):
+        if self.job_id is not None and event.get("job", self.job_id) != self.job_id:
+            return
+        try:
+            self.events.put_nowait(event)
+        except queue.Full:
+            # Dropped: the client reconnects and gets a fresh state
+            self.close()
+
+    def close(self):
+        try:
+            self.events.put_nowait(None)
+        except queue.Full:
+            self.events.get_nowait()
+            self.events.put_nowait(None)
+
+
+class JobDaemon:
+    def __init__(self, path=DAEMON_SOCKET, max_parallel=2, mode=0o600):
+        self.path = path
+        self.mode = mode
+        self.queue = JobQueue(max_parallel=max_parallel)
+        self.lock = threading.RLock()
+        self.stack_jobs = {}
+        self.threads = {}
+        self.logs = {}
+        self.watchers = set()
+        self.server = None
+
+    # ---------- Jobs ----------
+    def submit(self, images, options, priority=PRIORITY_BACKGROUND,
+               watch=False):
+        """
+        Queue a stack. Returns its id and, if watch is set, a watcher of
+        the job registered before it can start.
+        """
+        if not images or not all(isinstance(p, str) for p in images):
+            raise ValueError("A job needs images")
+        options = job_options(options)
+        if priority not in PRIORITY_NAMES:
+            raise ValueError(f"Unknown priority {priority}")
+        needs_qt = [name for name in PREPROCESS_OPTIONS if options.get(name)]
+        if needs_qt and importlib.util.find_spec("PyQt6") is None:
+            raise ValueError(
+                f"{', '.join(needs_qt)}: PyQt6 is not installed for the daemon"
+            )
+        try:
+            info = probe_stack(images)
+        except PreflightError as e:
+            raise ValueError(f"Stack rejected: {e}") from e
+
+        with self.lock:
+            job = self.queue.add(
+                Job(images, options, info=info, priority=priority)
+            )
+            self.logs[job.id] = deque(maxlen=DAEMON_LOG_LINES)
+            watcher = self._add_watcher(job.id) if watch else None
+            self._pump()
+        return job.id, watcher
+
+    def cancel(self, job_id):
+        with self.lock:
+            job = self.queue.cancel(job_id)
+            if job is None:
+                raise ValueError(f"No job {job_id}")
+            if job.status == RUNNING:
+                self.stack_jobs[job_id].stop()
+            self._publish_jobs()
+
+    def clear(self):
+        with self.lock:
+            self.queue.clear_finished()
+            self._forget_logs()
+            self._publish_jobs()
+
+    def _pump(self):
+        failed = False
+        for job in self.queue.schedule():
+            try:
+                stack_job = self._stack_job(job)
+            except (OSError, ValueError, TypeError, KeyError, sqlite3.Error,
+                    BinaryNotFound) as e:
+                self.queue.mark_started(job)
+                self.queue.mark_finished(job, FAILED)
+                job.note = f"could not start: {e}"
+                self._on_output(job, f"Job {job.id} {job.note}")
+                self._publish({
+                    "event": "finished", "job": job.id,
+                    "returncode": -1, "status": STATUS_FAILED,
+                })
+                failed = True
+                continue
+            self.stack_jobs[job.id] = stack_job
+            self.queue.mark_started(job)
+            self._on_output(
+                job,
+                f"Job {job.id} started with {job.threads} threads, "
+                f"batch size {job.options['batchsize']}. {job.note}"
+            )
+            thread = threading.Thread(
+                target=self._run_job, args=(job, stack_job), daemon=True
+            )
+            self.threads[job.id] = thread
+            thread.start()
+        if failed:
+            # Their slots are free again
+            self._pump()
+            return
+        prefetch_next(self.queue)
+        self._publish_jobs()
+
+    def _run_job(self, job, stack_job):
+        try:
+            stack_job.run()
+        except Exception as e:
+            # Free the slot of a job that ended without on_finished
+            traceback.print_exc()
+            with self.lock:
+                if self.stack_jobs.get(job.id) is not stack_job:
+                    return
+                self._on_output(job, f"Job {job.id} failed: {e}")
+                self._on_finished(job, -1, STATUS_FAILED)
+
+    def _stack_job(self, job):
+        return StackJob(
+            job.images, job.options, job.priority,
+            on_output=lambda text, j=job: self._on_output(j, text),
+            on_progress=lambda percent, j=job: self._publish({
+                "event": "progress", "job": j.id, "percent": percent
+            }),
+            on_status=lambda text, j=job: self._on_status(j, text),
+            on_finished=lambda code, status, j=job: self._on_finished(
+                j, code, status
+            ),
+            on_recorded=lambda run_id, j=job: self._publish({
+                "event": "recorded", "job": j.id, "run": run_id
+            }),
+            on_published=lambda error, j=job: self._publish({
+                "event": "published", "job": j.id, "error": error
+            }),
+        )
+
+    def _on_output(self, job, text):
+        with self.lock:
+            # Publishing messages can come after the job was cleared
+            if job.id in self.logs:
+                self.logs[job.id].extend(text.split("\n"))
+            self._publish({"event": "output", "job": job.id, "text": text})
+
+    def _on_status(self, job, text):
+        with self.lock:
+            job.progress = text
+            self._publish_jobs()
+
+    def _on_finished(self, job, returncode, run_status):
+        with self.lock:
+            self.stack_jobs.pop(job.id, None)
+            self.threads.pop(job.id, None)
+            if run_status == STATUS_OK:
+                status = DONE
+            elif run_status == STATUS_CANCELLED:
+                status = CANCELLED
+            else:
+                status = FAILED
+                job.note = f"{run_status}, exit code {returncode}"
+            self.queue.mark_finished(job, status)
+            self._publish({
+                "event": "finished", "job": job.id,
+                "returncode": returncode, "status": run_status,
+            })
+
+            finished = [j for j in self.queue.jobs if j.finished is not None]
+            for old in finished[:-DAEMON_KEEP_FINISHED]:
+                self.queue.jobs.remove(old)
+            self._forget_logs()
+            self._pump()
+
+    def _forget_logs(self):
+        ids = {job.id for job in self.queue.jobs}
+        for job_id in list(self.logs):
+            if job_id not in ids:
+                del self.logs[job_id]
+
+    # ---------- Events ----------
+    def _publish(self, event):
+        with self.lock:
+            for watcher in self.watchers:
+                watcher.send(event)
+
+    def _snapshot(self):
+        return {
+            "event": "jobs",
+            "jobs": [job_state(job) for job in self.queue.jobs],
+            "summary": self.queue.summary(),
+        }
+
+    def _publish_jobs(self):
+        self._publish(self._snapshot())
+
+    def _add_watcher(self, job_id=None):
+        """
+        Watcher of job_id (None: every job), starting with the job list
+        and the recent output.
+        """
+        watcher = _Watcher(job_id)
+        with self.lock:
+            watcher.send(self._snapshot())
+            for id_, lines in self.logs.items():
+                if lines and job_id in (None, id_):
+                    watcher.send({
+                        "event": "output", "job": id_, "text": "\n".join(lines)
+                    })
+            self.watchers.add(watcher)
+        return watcher
+
+    def _stream(self, conn, watcher):
+        try:
+            while True:
+                event = watcher.events.get()
+                if event is None:
+                    break
+                conn.sendall(json.dumps(event).encode() + b"\n")
+        except OSError:
+            pass
+        finally:
+            with self.lock:
+                self.watchers.discard(watcher)
+
+    # ---------- Socket ----------
+    def _handle(self, conn):
+        with conn, conn.makefile("rb") as reader:
+            for line in reader:
+                if len(line) > MAX_REQUEST_BYTES:
+                    break
+                watcher = None
+                try:
+                    request = json.loads(line)
+                    reply, watcher = self._dispatch(request.get("cmd"), request)
+                except (ValueError, TypeError, AttributeError, KeyError) as e:
+                    reply = {"ok": False, "error": str(e)}
+                except Exception as e:
+                    traceback.print_exc()
+                    reply = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+                try:
+                    conn.sendall(json.dumps(reply).encode() + b"\n")
+                except OSError:
+                    return
+                if watcher is not None:
+                    self._stream(conn, watcher)
+                    return
+
+    def _dispatch(self, cmd, request):
+        """
+        Returns the reply and the watcher to stream after it, if any.
+        """
+        if cmd == "watch":
+            return {"ok": True}, self._add_watcher(request.get("job"))
+        if cmd == "submit":
+            job_id, watcher = self.submit(
+                list(request["images"]), dict(request["options"]),
+                int(request.get("priority", PRIORITY_BACKGROUND)),
+                bool(request.get("watch")),
+            )
+            return {"ok": True, "job": job_id}, watcher
+        if cmd == "jobs":
+            with self.lock:
+                snapshot = self._snapshot()
+            return {"ok": True, "jobs": snapshot["jobs"],
+                    "summary": snapshot["summary"]}, None
+        if cmd == "cancel":
+            self.cancel(int(request["job"]))
+            return {"ok": True}, None
+        if cmd == "clear":
+            self.clear()
+            return {"ok": True}, None
+        raise ValueError(f"Unknown command {cmd!r}")
+
+    def _claim_socket(self):
+        """
+        Remove the socket of a daemon that is gone.
+        Raises DaemonRunning if one answers on it.
+        """
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.path)
+        except FileNotFoundError:
+            return
+        except OSError:
+            os.unlink(self.path)
+            return
+        finally:
+            probe.close()
+        raise DaemonRunning(f"A daemon already listens on {self.path}")
+
+    def listen(self):
+        """
+        Create the socket. Raises DaemonRunning if the path is taken.
+        """
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._claim_socket()
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # Not reachable before the permissions are set
+        umask = os.umask(0o177)
+        try:
+            self.server.bind(self.path)
+        finally:
+            os.umask(umask)
+        os.chmod(self.path, self.mode)
+        self.server.listen()
+
+    def serve(self):
+        """
+        Accept clients until interrupted (KeyboardInterrupt), then
+        cancel the jobs and remove the socket.
+        """
+        try:
+            while True:
+                conn, _ = self.server.accept()
+                threading.Thread(
+                    target=self._handle, args=(conn,), daemon=True
+                ).start()
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        with self.lock:
+            for job in self.queue.pending():
+                self.queue.cancel(job.id)
+            stack_jobs = list(self.stack_jobs.values())
+            threads = list(self.threads.values())
+            for watcher in self.watchers:
+                watcher.close()
+        for stack_job in stack_jobs:
+            stack_job.stop()
+        # The process groups are killed by the job threads
+        for thread in threads:
+            thread.join()
+        publisher.wait()
+
+        if self.server is not None:
+            self.server.close()
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+
+def _terminate(signum, frame):
+    raise KeyboardInterrupt
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--socket", default=DAEMON_SOCKET,
+                        help="socket path (FOCUS_STACK_SOCKET)")
+    parser.add_argument("-j", "--parallel", type=int, default=2,
+                        help="jobs running at once")
+    parser.add_argument("--mode", default="600",
+                        help="socket permissions, 660 to share with a "
+                             "trusted group (jobs write as the daemon user)")
+    args = parser.parse_args(argv)
+
+    try:
+        binary = focus_stack()
+    except BinaryNotFound as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+    daemon = JobDaemon(args.socket, max(1, args.parallel), int(args.mode, 8))
+    try:
+        daemon.listen()
+    except DaemonRunning as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+    signal.signal(signal.SIGTERM, _terminate)
+    print(f"Listening on {args.socket}, running {binary.path} "
+          f"({binary.version})", flush=True)
+    try:
+        daemon.serve()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 26 10:48:13 2026
+
+@author: Robert Becht (roblin67@gmail.com)
+
+Client of the shared job daemon (daemon.py). Does not import Qt.
+"""
+
+import json
+import os
+import socket
+from collections import namedtuple
+
+from priority import PRIORITY_BACKGROUND
+from config import DAEMON_SOCKET
+
+CONNECT_TIMEOUT = 5.0
+
+
+def _absolute(options):
+    """
+    Paths of options resolved here, not in the working directory of the
+    daemon.
+    """
+    return dict(
+        options, output=os.path.abspath(options["output"]),
+        depthmap_file=os.path.abspath(options["depthmap_file"]),
+    )
+
+# A job of the daemon queue, as listed by daemon.job_state
+RemoteJob = namedtuple(
+    "RemoteJob",
+    ["id", "name", "frames", "output", "threads", "priority", "status",
+     "note", "progress", "duration", "started"]
+)
+
+
+class DaemonError(Exception):
+    pass
+
+
+class DaemonClient:
+    """
+    Every request uses its own connection, so a client can be shared
+    between threads. Raises OSError when no daemon is listening.
+    """
+
+    def __init__(self, path=DAEMON_SOCKET):
+        self.path = path
+
+    def _connect(self):
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        conn.settimeout(CONNECT_TIMEOUT)
+        try:
+            conn.connect(self.path)
+        except OSError:
+            conn.close()
+            raise
+        return conn
+
+    def _request(self, **request):
+        with self._connect() as conn, conn.makefile("rb") as reader:
+            conn.sendall(json.dumps(request).encode() + b"\n")
+            line = reader.readline()
+        if not line:
+            raise DaemonError("The daemon closed the connection")
+        reply = json.loads(line)
+        if not reply.get("ok"):
+            raise DaemonError(reply.get("error", "request failed"))
+        return reply
+
+    def available(self):
+        try:
+            self._request(cmd="jobs")
+        except (OSError, ValueError, DaemonError):
+            return False
+        return True
+
+    def submit(self, images, options, priority=PRIORITY_BACKGROUND):
+        """
+        Queue a stack. Returns the job id.
+        """
+        return self._request(
+            cmd="submit", images=[os.path.abspath(p) for p in images],
+            options=_absolute(options),
+            priority=priority,
+        )["job"]
+
+    def jobs(self):
+        """
+        (RemoteJob list, queue summary)
+        """
+        reply = self._request(cmd="jobs")
+        return [RemoteJob(**job) for job in reply["jobs"]], reply["summary"]
+
+    def cancel(self, job_id):
+        self._request(cmd="cancel", job=job_id)
+
+    def clear_finished(self):
+        self._request(cmd="clear")
+
+    def _stream(self, **request):
+        conn = self._connect()
+        try:
+            conn.sendall(json.dumps(request).encode() + b"\n")
+            stream = EventStream(conn)
+            reply = json.loads(stream.reader.readline() or b"{}")
+        except (OSError, ValueError):
+            conn.close()
+            raise
+        if not reply.get("ok"):
+            conn.close()
+            raise DaemonError(reply.get("error", "request failed"))
+        return reply, stream
+
+    def watch(self, job_id=None):
+        """
+        EventStream of job_id, or of every job.
+        """
+        return self._stream(cmd="watch", job=job_id)[1]
+
+    def submit_watch(self, images, options, priority=PRIORITY_BACKGROUND):
+        """
+        Queue a stack and follow it from the start.
+        Returns the job id and its EventStream.
+        """
+        reply, stream = self._stream(
+            cmd="submit", images=[os.path.abspath(p) for p in images],
+            options=_absolute(options),
+            priority=priority, watch=True,
+        )
+        return reply["job"], stream
+
+
+class EventStream:
+    """
+    Iterates over the event dicts of a watch until the daemon closes the
+    connection or close() is called from another thread.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        # Events can arrive minutes apart
+        conn.settimeout(None)
+        self.reader = conn.makefile("rb")
+
+    def __iter__(self):
+        try:
+            for line in self.reader:
+                yield json.loads(line)
+        except (OSError, ValueError):
+            return
+
+    def close(self):
+        try:
+            self.conn.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.conn.close()
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Oct 21 14:52:09 2026
+
+@author: Robert Becht (roblin67@gmail.com)
+"""
+
+import contextlib
+import os
+import shutil
+import threading
+import uuid
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+LOCK_FILE = ".lock"
+PINS_DIR = ".pins"
+
+_root_locks = {}
+_root_locks_lock = threading.Lock()
+
+# Pins of this process, {pin file path: [use count, locked pin file]}
+_pins = {}
+_pins_lock = threading.Lock()
+
+
+def _root_lock(root):
+    """
+    Lock shared by every DiskCache of root in this process.
+    """
+    with _root_locks_lock:
+        return _root_locks.setdefault(os.path.abspath(root), threading.Lock())
+
+
+class DiskCache:
+    """
+    Directory-per-entry cache with a size cap and LRU eviction.
+
+    An entry is root/<key>/ holding any number of files. The mtime of
+    the entry directory is its last use.
+
+    Entries are replaced and evicted under a lock shared by the caches of
+    the same root, and an flock on root/.lock for other processes.
+
+    A pinned entry is never evicted, by any process: its user holds a
+    shared flock on root/.pins/<key>, which evict() has to take
+    exclusively before removing the entry.
+    """
+
+    def __init__(self, root, max_bytes):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = _root_lock(root)
+
+    @contextlib.contextmanager
+    def _file_lock(self, exclusive):
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, LOCK_FILE), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield
+
+    @contextlib.contextmanager
+    def _locked(self):
+        with self._lock, self._file_lock(exclusive=True):
+            yield
+
+    def reading(self):
+        """
+        Context in which no entry is replaced or evicted, by any process.
+        Hold it while copying files out of an entry.
+        """
+        return self._file_lock(exclusive=False)
+
+    def path(self, key):
+        return os.path.join(self.root, key)
+
+    def _pin_path(self, entry):
+        return os.path.join(self.root, PINS_DIR, os.path.basename(entry))
+
+    def _open_pin(self, path):
+        """
+        Pin file path, locked shared. Retries when evict() removed it
+        while we waited for the lock.
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        while True:
+            f = open(path, "a")
+            if fcntl is None:
+                return f
+            fcntl.flock(f, fcntl.LOCK_SH)
+            try:
+                if os.stat(path).st_ino == os.fstat(f.fileno()).st_ino:
+                    return f
+            except FileNotFoundError:
+                pass
+            f.close()
+
+    def pin(self, entries):
+        """
+        Keep entry directories (which need not exist yet) from eviction
+        until unpin(entries). Pins are counted.
+        """
+        entries = list(entries)
+        done = []
+        with _pins_lock:
+            try:
+                for entry in entries:
+                    path = self._pin_path(entry)
+                    pin = _pins.get(path)
+                    if pin is None:
+                        pin = _pins[path] = [0, self._open_pin(path)]
+                    pin[0] += 1
+                    done.append(entry)
+            except OSError:
+                self._unpin(done)
+                raise
+
+    def unpin(self, entries):
+        with _pins_lock:
+            self._unpin(entries)
+
+    def _unpin(self, entries):
+        for entry in entries:
+            path = self._pin_path(entry)
+            pin = _pins[path]
+            pin[0] -= 1
+            if pin[0] == 0:
+                del _pins[path]
+                pin[1].close()
+
+    @contextlib.contextmanager
+    def _claim(self, entry):
+        """
+        Yields True if entry is pinned by any process, else holds its pin
+        file exclusively while the entry is removed.
+        """
+        path = self._pin_path(entry)
+        if fcntl is None:
+            yield path in _pins
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a") as f:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield True
+                return
+            yield False
+            os.unlink(path)
+
+    def get(self, key):
+        """
+        Entry directory of key, or None. Marks the entry as used.
+        """
+        entry = self.path(key)
+        if not os.path.isdir(entry):
+            return None
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+        return entry
+
+    def new_dir(self):
+        """
+        Scratch directory on the cache's file system, not counted as an
+        entry. Files written there can be moved into an entry cheaply.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        tmp = os.path.join(self.root, f".tmp-{uuid.uuid4().hex}")
+        os.makedirs(tmp)
+        return tmp
+
+    def put(self, key, files, move=False, evict=True):
+        """
+        Store files ({name in entry: source path}) under key and return
+        the entry directory. With move, the sources are moved instead of
+        copied. Without evict, the caller calls evict() after a batch of
+        puts.
+        """
+        tmp = self.new_dir()
+
+        try:
+            for name, src in files.items():
+                if move:
+                    shutil.move(src, os.path.join(tmp, name))
+                else:
+                    shutil.copy2(src, os.path.join(tmp, name))
+
+            entry = self.path(key)
+            with self._locked():
+                if os.path.isdir(entry):
+                    shutil.rmtree(entry)
+                os.rename(tmp, entry)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+
+        if evict:
+            self.evict(keep=entry)
+        return entry
+
+    def _entries(self):
+        entries = []
+        if not os.path.isdir(self.root):
+            return entries
+
+        for entry in os.scandir(self.root):
+            # Scratch directories (.tmp-*) and pins
+            if not entry.is_dir() or entry.name.startswith("."):
+                continue
+            size = 0
+            for dirpath, _, names in os.walk(entry.path):
+                for name in names:
+                    try:
+                        size += os.path.getsize(os.path.join(dirpath, name))
+                    except OSError:
+                        pass
+            entries.append((entry.stat().st_mtime, size, entry.path))
+
+        return entries
+
+    def evict(self, keep=None, free=0):
+        """
+        Remove least recently used entries until under the size cap, with
+        free bytes to spare. keep is an entry directory, or a set of
+        them, that is never removed, nor are pinned entries.
+        """
+        if isinstance(keep, str):
+            keep = {keep}
+        keep = keep or set()
+        with self._locked():
+            entries = self._entries()
+            total = sum(size for _, size, _ in entries)
+
+            for _, size, path in sorted(entries):
+                if total + free <= self.max_bytes:
+                    break
+                if path in keep:
+                    continue
+                with self._claim(path) as busy:
+                    if busy:
+                        continue
+                    shutil.rmtree(path, ignore_errors=True)
+                total -= size
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Fri Oct 23 09:12:51 2026
+
+@author: Robert Becht (roblin67@gmail.com)
+
+Images derived from the input frames before a run (preview proxies,
+region of interest crops), built in parallel and cached per frame
+content and parameters.
+"""
+
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+from diskcache import DiskCache
+from hashing import FileHashIndex, combine
+
+FRAME_WORKERS = os.cpu_count() or 1
+
+
+class FrameBuilder:
+    """
+    Subclasses set kind and ext, and implement params() and make().
+    """
+
+    kind = None
+    ext = ".jpg"
+
+    def __init__(self, root, max_bytes, index=None):
+        self.cache = DiskCache(root, max_bytes)
+        self.index = index or FileHashIndex()
+
+    def params(self):
+        """
+        String of the parameters the derived image depends on.
+        """
+        raise NotImplementedError
+
+    def make(self, src, dst):
+        raise NotImplementedError
+
+    def _key(self, path, digest):
+        """
+        (cache key, file name) of the derived frame of path.
+        """
+        # Keep the file name: aligned frames are named after the inputs
+        name = os.path.splitext(os.path.basename(path))[0] + self.ext
+        # Named too: identical frames of a stack each need their file
+        return combine(self.kind, digest, self.params(), name), name
+
+    def _frame(self, path, key, name, cancelled):
+        entry = self.cache.get(key)
+        if entry is None:
+            if cancelled():
+                return None
+            work_dir = self.cache.new_dir()
+            try:
+                self.make(path, os.path.join(work_dir, name))
+                entry = self.cache.put(
+                    key, {name: os.path.join(work_dir, name)},
+                    move=True, evict=False
+                )
+            finally:
+                shutil.rmtree(work_dir, ignore_errors=True)
+
+        return os.path.join(entry, name)
+
+    def build(self, images, cancelled=lambda: False):
+        """
+        Derived frames of images in the same order, or None if
+        cancelled. Frames are built in parallel, and stay pinned in the
+        cache until release(frames).
+        """
+        digests = self.index.digests(images)
+        keys = [self._key(p, d) for p, d in zip(images, digests)]
+        entries = [self.cache.path(key) for key, _ in keys]
+
+        self.cache.pin(entries)
+        try:
+            with ThreadPoolExecutor(FRAME_WORKERS) as pool:
+                frames = list(pool.map(
+                    lambda args: self._frame(*args, cancelled),
+                    ((p, key, name) for p, (key, name) in zip(images, keys))
+                ))
+            self.cache.evict(keep=set(entries))
+        except OSError:
+            self.cache.unpin(entries)
+            raise
+        if cancelled() or None in frames:
+            self.cache.unpin(entries)
+            return None
+        return frames
+
+    def release(self, frames):
+        self.cache.unpin(os.path.dirname(p) for p in frames)
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 24 10:05:43 2026
+
+@author: Robert Becht (roblin67@gmail.com)
+
+Cache of the stacked results of frame groups, for incremental runs:
+after frames are added to or removed from a stack, only the groups
+whose frames changed are stacked again.
+"""
+
+import os
+
+from diskcache import DiskCache
+from hashing import FileHashIndex, combine
+from resultcache import normalized_args
+from runner import binary_version
+from substack import SLAB_FORMAT
+from config import GROUP_CACHE_DIR, GROUP_CACHE_MAX_BYTES
+
+GROUP_RESULT = "group" + SLAB_FORMAT
+
+
+class GroupCache:
+    def __init__(self, root=GROUP_CACHE_DIR, max_bytes=GROUP_CACHE_MAX_BYTES,
+                 index=None):
+        self.cache = DiskCache(root, max_bytes)
+        self.index = index or FileHashIndex()
+
+    def key(self, images, options):
+        return combine(
+            "group",
+            binary_version(),
+            *self.index.digests(images),
+            *normalized_args(images, dict(options, output=GROUP_RESULT)),
+        )
+
+    def get(self, key):
+        """
+        Path of the stacked group, or None.
+        """
+        entry = self.cache.get(key)
+        if entry is None:
+            return None
+        path = os.path.join(entry, GROUP_RESULT)
+        return path if os.path.exists(path) else None
+
+    def put(self, key, path):
+        """
+        Move a stacked group into the cache and return its new path.
+        """
+        entry = self.cache.put(key, {GROUP_RESULT: path}, move=True)
+        return os.path.join(entry, GROUP_RESULT)
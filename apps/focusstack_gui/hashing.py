@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Oct 21 14:05:33 2026
+
+@author: Robert Becht (roblin67@gmail.com)
+
+Content hashing of input frames.
+
+Digests are remembered per (path, mtime, size) in a small SQLite index,
+so only new or modified files are read again, and the missing ones are
+hashed in parallel (hashlib releases the GIL on large buffers).
+"""
+
+import hashlib
+import os
+import shutil
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+from config import HASH_INDEX_DB
+
+CHUNK_SIZE = 4 * 1024 * 1024
+HASH_WORKERS = min(8, os.cpu_count() or 1)
+
+
+def hash_file(path):
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def copy_file(src, dst):
+    """
+    Copy src to dst (with its mtime) and return its digest, reading it
+    only once.
+    """
+    h = hashlib.blake2b(digest_size=20)
+    with open(src, "rb") as f, open(dst, "wb") as out:
+        while chunk := f.read(CHUNK_SIZE):
+            h.update(chunk)
+            out.write(chunk)
+    shutil.copystat(src, dst)
+    return h.hexdigest()
+
+
+class FileHashIndex:
+    def __init__(self, path=HASH_INDEX_DB):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS hashes ("
+                "path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, "
+                "digest TEXT)"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _known(self, stats):
+        known = {}
+        with self._connect() as db:
+            for path in stats:
+                row = db.execute(
+                    "SELECT mtime_ns, size, digest FROM hashes WHERE path = ?",
+                    (path,)
+                ).fetchone()
+                st = stats[path]
+                if row and row[0] == st.st_mtime_ns and row[1] == st.st_size:
+                    known[path] = row[2]
+        return known
+
+    def known_digests(self, paths):
+        """
+        Digests of paths in the same order if every file is indexed and
+        unchanged, else None. Reads no file.
+        """
+        paths = [os.path.abspath(p) for p in paths]
+        known = self._known({p: os.stat(p) for p in set(paths)})
+        if len(known) < len(set(paths)):
+            return None
+        return [known[p] for p in paths]
+
+    def digests(self, paths):
+        """
+        Content digests of paths, in the same order.
+        """
+        paths = [os.path.abspath(p) for p in paths]
+        stats = {p: os.stat(p) for p in set(paths)}
+        known = self._known(stats)
+
+        missing = [p for p in stats if p not in known]
+        if missing:
+            with ThreadPoolExecutor(HASH_WORKERS) as pool:
+                for path, digest in zip(missing, pool.map(hash_file, missing)):
+                    known[path] = digest
+
+            with self._connect() as db:
+                db.executemany(
+                    "INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?)",
+                    [
+                        (p, stats[p].st_mtime_ns, stats[p].st_size, known[p])
+                        for p in missing
+                    ],
+                )
+
+        return [known[p] for p in paths]
+
+    def record(self, digests):
+        """
+        Remember the digests ({path: digest}) of files hashed elsewhere.
+        """
+        rows = []
+        for path, digest in digests.items():
+            st = os.stat(path)
+            rows.append(
+                (os.path.abspath(path), st.st_mtime_ns, st.st_size, digest)
+            )
+        with self._connect() as db:
+            db.executemany(
+                "INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?)", rows
+            )
+
+
+def combine(*parts):
+    """
+    Digest of an ordered sequence of strings.
+    """
+    h = hashlib.blake2b(digest_size=20)
+    for part in parts:
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
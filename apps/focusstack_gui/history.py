@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 11:15:48 2026
+
+@author: Robert Becht (roblin67@gmail.com)
+
+Run history database (SQLite).
+"""
+
+import json
+import os
+import sqlite3
+from datetime import datetime
+
+from config import HISTORY_DB
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started TEXT NOT NULL,
+    duration REAL,
+    status TEXT,
+    returncode INTEGER,
+    frames INTEGER,
+    width INTEGER,
+    height INTEGER,
+    output TEXT,
+    options TEXT,
+    cpu_seconds REAL,
+    peak_rss INTEGER,
+    read_bytes INTEGER,
+    write_bytes INTEGER
+);
+CREATE TABLE IF NOT EXISTS samples (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    t REAL,
+    cpu_seconds REAL,
+    rss INTEGER,
+    read_bytes INTEGER,
+    write_bytes INTEGER,
+    processes INTEGER
+);
+CREATE TABLE IF NOT EXISTS stages (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    name TEXT,
+    start REAL,
+    end REAL
+);
+CREATE INDEX IF NOT EXISTS samples_run ON samples(run_id);
+CREATE INDEX IF NOT EXISTS stages_run ON stages(run_id);
+"""
+
+
+class RunHistory:
+    """
+    One connection per call, so workers can record from their own thread.
+    """
+
+    def __init__(self, path=HISTORY_DB):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as db:
+            db.executescript(_SCHEMA)
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=30)
+        db.row_factory = sqlite3.Row
+        db.execute("PRAGMA foreign_keys = ON")
+        return db
+
+    def record_run(self, started, duration, status, returncode, images,
+                   info, options, totals, samples, stages):
+        """
+        Store one run. started is a datetime, stages a list of
+        (name, start, end) in seconds from the start of the run.
+        Returns the run id.
+        """
+        with self._connect() as db:
+            cur = db.execute(
+                "INSERT INTO runs (started, duration, status, returncode, "
+                "frames, width, height, output, options, cpu_seconds, "
+                "peak_rss, read_bytes, write_bytes) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    started.isoformat(timespec="seconds"), duration, status,
+                    returncode, len(images),
+                    info.width if info else None,
+                    info.height if info else None,
+                    options.get("output"),
+                    json.dumps(options, sort_keys=True),
+                    totals["cpu_seconds"], totals["peak_rss"],
+                    totals["read_bytes"], totals["write_bytes"],
+                ),
+            )
+            run_id = cur.lastrowid
+
+            db.executemany(
+                "INSERT INTO samples VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (run_id, s["t"], s["cpu_seconds"], s["rss"],
+                     s["read_bytes"], s["write_bytes"], s["processes"])
+                    for s in samples
+                ],
+            )
+            db.executemany(
+                "INSERT INTO stages VALUES (?, ?, ?, ?)",
+                [(run_id, name, start, end) for name, start, end in stages],
+            )
+
+        return run_id
+
+    def recent_runs(self, limit=200):
+        with self._connect() as db:
+            return db.execute(
+                "SELECT * FROM runs ORDER BY id DESC LIMIT ?", (limit,)
+            ).fetchall()
+
+    def run(self, run_id):
+        with self._connect() as db:
+            return db.execute(
+                "SELECT * FROM runs WHERE id = ?", (run_id,)
+            ).fetchone()
+
+    def samples(self, run_id):
+        with self._connect() as db:
+            return db.execute(
+                "SELECT * FROM samples WHERE run_id = ? ORDER BY t", (run_id,)
+            ).fetchall()
+
+    def stages(self, run_id):
+        with self._connect() as db:
+            return db.execute(
+                "SELECT * FROM stages WHERE run_id = ? ORDER BY start",
+                (run_id,)
+            ).fetchall()
+
+    def export_chrome_trace(self, run_id, path):
+        """
+        Write a run as Chrome trace JSON (chrome://tracing, Perfetto).
+        Stages are duration events, resources are counter tracks.
+        """
+        run = self.run(run_id)
+        if run is None:
+            raise KeyError(run_id)
+
+        pid = 1
+        name = os.path.basename(run["output"] or f"run {run_id}")
+        events = [
+            {"name": "process_name", "ph": "M", "pid": pid,
+             "args": {"name": name}},
+            {"name": run["status"] or "run", "ph": "X", "pid": pid, "tid": 1,
+             "ts": 0, "dur": (run["duration"] or 0) * 1e6,
+             "args": {"frames": run["frames"],
+                      "options": json.loads(run["options"] or "{}")}},
+        ]
+
+        for stage in self.stages(run_id):
+            events.append({
+                "name": stage["name"], "ph": "X", "pid": pid, "tid": 2,
+                "ts": stage["start"] * 1e6,
+                "dur": (stage["end"] - stage["start"]) * 1e6,
+            })
+
+        previous = None
+        for s in self.samples(run_id):
+            ts = s["t"] * 1e6
+            events.append({
+                "name": "Memory", "ph": "C", "pid": pid, "ts": ts,
+                "args": {"RSS MB": s["rss"] / 2**20},
+            })
+            events.append({
+                "name": "I/O", "ph": "C", "pid": pid, "ts": ts,
+                "args": {"read MB": s["read_bytes"] / 2**20,
+                         "write MB": s["write_bytes"] / 2**20},
+            })
+            if previous is not None and s["t"] > previous["t"]:
+                cpu = (s["cpu_seconds"] - previous["cpu_seconds"]) / (
+                    s["t"] - previous["t"]
+                )
+                events.append({
+                    "name": "CPU", "ph": "C", "pid": pid, "ts": ts,
+                    "args": {"cores busy": cpu},
+                })
+            previous = s
+
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"traceEvents": events, "displayTimeUnit": "ms",
+                 "otherData": {"started": run["started"],
+                               "exported": datetime.now().isoformat()}},
+                f,
+            )
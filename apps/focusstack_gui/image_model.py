@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 11:05:27 2026
+
+@author: Robert Becht (roblin67@gmail.com)
+"""
+
+import os
+from collections import OrderedDict
+
+from PyQt6.QtCore import (
+    QAbstractListModel, QModelIndex, QThread, Qt, pyqtSignal
+)
+from PyQt6.QtGui import QColor, QIcon, QPixmap
+
+from config import THUMBNAIL_SIZE
+from imageinfo import IMAGE_EXTENSIONS
+from thumbnails import ThumbnailLoader
+
+# Decoded icons kept in memory, independent of the session size
+MAX_CACHED_ICONS = 1000
+
+
+class ImageListModel(QAbstractListModel):
+    """
+    Ordered, indexed collection of image paths for the Files tab.
+
+    Paths are kept in a list (order matters for stacking) next to a
+    path -> row index, so lookups and membership tests are O(1) and bulk
+    removals are a single pass. Icons are only built for the rows the
+    view actually asks for, and only the most recent ones are kept.
+    """
+
+    PathRole = Qt.ItemDataRole.UserRole
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._paths = []
+        self._rows = {}
+
+        self._icons = OrderedDict()
+        self._requested = set()
+
+        self.thumbnails = ThumbnailLoader(self)
+        self.thumbnails.thumbnail_ready.connect(self._on_thumbnail_ready)
+
+        placeholder = QPixmap(THUMBNAIL_SIZE, THUMBNAIL_SIZE)
+        placeholder.fill(QColor("lightgray"))
+        self._placeholder = QIcon(placeholder)
+
+    # ---------- Qt model interface ----------
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._paths)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+
+        path = self._paths[index.row()]
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            return os.path.basename(path)
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return path
+        if role == self.PathRole:
+            return path
+        if role == Qt.ItemDataRole.DecorationRole:
+            return self._icon(path)
+
+        return None
+
+    # ---------- Collection ----------
+    def paths(self):
+        return list(self._paths)
+
+    def row_of(self, path):
+        return self._rows.get(path, -1)
+
+    def __contains__(self, path):
+        return path in self._rows
+
+    def __len__(self):
+        return len(self._paths)
+
+    def set_paths(self, paths):
+        self.beginResetModel()
+        self._paths = list(dict.fromkeys(paths))
+        self._reindex()
+        self.cancel_pending()
+        self.endResetModel()
+
+    def append_paths(self, paths):
+        new = [p for p in dict.fromkeys(paths) if p not in self._rows]
+        if not new:
+            return
+
+        first = len(self._paths)
+        self.beginInsertRows(QModelIndex(), first, first + len(new) - 1)
+        self._paths.extend(new)
+        for row, path in enumerate(new, first):
+            self._rows[path] = row
+        self.endInsertRows()
+
+    def remove_rows(self, rows):
+        rows = set(rows)
+        if not rows:
+            return
+
+        self.beginResetModel()
+        removed = [self._paths[r] for r in rows]
+        self._paths = [p for r, p in enumerate(self._paths) if r not in rows]
+        self._reindex()
+        for path in removed:
+            self._icons.pop(path, None)
+        self.endResetModel()
+
+    def reorder(self, order):
+        """
+        Apply a permutation given as a list of current row numbers.
+        """
+        if sorted(order) != list(range(len(self._paths))):
+            raise ValueError("reorder() expects a permutation of all rows")
+
+        self.layoutAboutToBeChanged.emit()
+        old_persistent = self.persistentIndexList()
+        old_paths = [self._paths[i.row()] for i in old_persistent]
+
+        self._paths = [self._paths[r] for r in order]
+        self._reindex()
+
+        self.changePersistentIndexList(
+            old_persistent,
+            [self.index(self._rows[p]) for p in old_paths]
+        )
+        self.layoutChanged.emit()
+
+    def sort_by_name(self, first=0):
+        """
+        Sort the rows from first on by file name; earlier rows keep their
+        order.
+        """
+        keys = [os.path.basename(p).lower() for p in self._paths]
+        tail = sorted(range(first, len(keys)), key=keys.__getitem__)
+        self.reorder(list(range(first)) + tail)
+
+    def reverse(self):
+        self.reorder(list(range(len(self._paths) - 1, -1, -1)))
+
+    def _reindex(self):
+        self._rows = {path: row for row, path in enumerate(self._paths)}
+
+    # ---------- Thumbnails ----------
+    def _icon(self, path):
+        icon = self._icons.get(path)
+        if icon is not None:
+            self._icons.move_to_end(path)
+            return icon
+
+        if path not in self._requested:
+            self._requested.add(path)
+            self.thumbnails.request([path])
+
+        return self._placeholder
+
+    def _on_thumbnail_ready(self, path, image):
+        self._requested.discard(path)
+
+        row = self._rows.get(path)
+        if row is None:
+            return
+
+        self._icons[path] = QIcon(QPixmap.fromImage(image))
+        while len(self._icons) > MAX_CACHED_ICONS:
+            self._icons.popitem(last=False)
+
+        index = self.index(row)
+        self.dataChanged.emit(index, index, [Qt.ItemDataRole.DecorationRole])
+
+    def cancel_pending(self):
+        """
+        Forget queued thumbnail requests, e.g. when the view scrolls away.
+        Visible rows request them again on the next paint.
+        """
+        self.thumbnails.clear()
+        self._requested.clear()
+
+
+class FolderScanner(QThread):
+    """
+    Scans a folder for images and streams the paths in batches.
+    """
+
+    batch_found = pyqtSignal(list)
+
+    BATCH_SIZE = 500
+
+    def __init__(self, folder, parent=None):
+        super().__init__(parent)
+        self.folder = folder
+        self._running = True
+
+    def run(self):
+        batch = []
+
+        try:
+            entries = os.scandir(self.folder)
+        except OSError:
+            return
+
+        with entries:
+            for entry in entries:
+                if not self._running:
+                    break
+                if not entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                    continue
+                if not entry.is_file():
+                    continue
+
+                batch.append(entry.path)
+                if len(batch) >= self.BATCH_SIZE:
+                    self.batch_found.emit(batch)
+                    batch = []
+
+        if batch:
+            self.batch_found.emit(batch)
+
+    def stop(self):
+        self._running = False
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 09:12:41 2026
+
+@author: Robert Becht (roblin67@gmail.com)
+
+Pure Python image header readers.
+Nothing here decodes pixels and nothing here imports Qt.
+"""
+
+import struct
+from collections import namedtuple
+from datetime import datetime
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".tif", ".tiff")
+
+# Only the first APP1 segment is needed, it is limited to 64 KB
+EXIF_READ_LIMIT = 128 * 1024
+
+TAG_WIDTH = 0x0100
+TAG_HEIGHT = 0x0101
+TAG_BITS_PER_SAMPLE = 0x0102
+TAG_SAMPLES_PER_PIXEL = 0x0115
+TAG_ORIENTATION = 0x0112
+TAG_JPEG_OFFSET = 0x0201
+TAG_JPEG_LENGTH = 0x0202
+TAG_DATETIME = 0x0132
+TAG_EXIF_IFD = 0x8769
+TAG_EXPOSURE_TIME = 0x829A
+TAG_FNUMBER = 0x829D
+TAG_ISO = 0x8827
+TAG_DATETIME_ORIGINAL = 0x9003
+TAG_SUBJECT_DISTANCE = 0x9206
+TAG_SUBSEC_ORIGINAL = 0x9291
+
+# TIFF field types
+TYPE_ASCII = 2
+TYPE_RATIONAL = 5
+
+
+ImageInfo = namedtuple(
+    "ImageInfo", ["width", "height", "channels", "bit_depth", "format"]
+)
+
+# Shooting metadata used to split a folder into stacks. Any field but
+# width and height may be None.
+CaptureInfo = namedtuple(
+    "CaptureInfo",
+    ["time", "focus_distance", "exposure", "fnumber", "iso", "width", "height"]
+)
+
+# PNG color type -> channels
+_PNG_CHANNELS = {0: 1, 2: 3, 3: 3, 4: 2, 6: 4}
+
+
+def _read_ifd(tiff, offset, endian):
+    """
+    Read one TIFF IFD.
+    Returns ({tag: (type, count, value_or_offset)}, next_ifd_offset).
+    """
+    if offset <= 0 or offset + 2 > len(tiff):
+        return {}, 0
+
+    count = struct.unpack_from(endian + "H", tiff, offset)[0]
+    entries = {}
+    pos = offset + 2
+
+    for _ in range(count):
+        if pos + 12 > len(tiff):
+            break
+        tag, typ, n = struct.unpack_from(endian + "HHI", tiff, pos)
+        if typ == 3 and n == 1:
+            value = struct.unpack_from(endian + "H", tiff, pos + 8)[0]
+        else:
+            value = struct.unpack_from(endian + "I", tiff, pos + 8)[0]
+        entries[tag] = (typ, n, value)
+        pos += 12
+
+    next_ifd = 0
+    if pos + 4 <= len(tiff):
+        next_ifd = struct.unpack_from(endian + "I", tiff, pos)[0]
+
+    return entries, next_ifd
+
+
+def _tiff_endian(tiff):
+    if tiff[:2] == b"II":
+        return "<"
+    if tiff[:2] == b"MM":
+        return ">"
+    return None
+
+
+def _read_jpeg_exif(path):
+    """
+    Return the raw TIFF block of the JPEG APP1/Exif segment, or None.
+    """
+    with open(path, "rb") as f:
+        data = f.read(EXIF_READ_LIMIT)
+
+    if data[:2] != b"\xff\xd8":
+        return None
+
+    pos = 2
+    while pos + 4 <= len(data):
+        if data[pos] != 0xFF:
+            return None
+        marker = data[pos + 1]
+        # Start of scan: no more metadata after this point
+        if marker == 0xDA:
+            return None
+        length = struct.unpack_from(">H", data, pos + 2)[0]
+        segment = data[pos + 4:pos + 2 + length]
+        if marker == 0xE1 and segment[:6] == b"Exif\x00\x00":
+            return segment[6:]
+        pos += 2 + length
+
+    return None
+
+
+def read_exif_thumbnail(path):
+    """
+    Extract the embedded EXIF thumbnail of a JPEG file.
+    Returns (jpeg_bytes, orientation) or (None, 1).
+    """
+    try:
+        tiff = _read_jpeg_exif(path)
+    except OSError:
+        return None, 1
+
+    if not tiff:
+        return None, 1
+
+    endian = _tiff_endian(tiff)
+    if endian is None:
+        return None, 1
+
+    try:
+        ifd0_offset = struct.unpack_from(endian + "I", tiff, 4)[0]
+        ifd0, ifd1_offset = _read_ifd(tiff, ifd0_offset, endian)
+        ifd1, _ = _read_ifd(tiff, ifd1_offset, endian)
+    except struct.error:
+        return None, 1
+
+    orientation = ifd0.get(TAG_ORIENTATION, (0, 0, 1))[2]
+
+    if TAG_JPEG_OFFSET not in ifd1 or TAG_JPEG_LENGTH not in ifd1:
+        return None, orientation
+
+    start = ifd1[TAG_JPEG_OFFSET][2]
+    length = ifd1[TAG_JPEG_LENGTH][2]
+    thumb = tiff[start:start + length]
+
+    if len(thumb) != length or thumb[:2] != b"\xff\xd8":
+        return None, orientation
+
+    return thumb, orientation
+
+
+def _ifd_value(tiff, entry, endian):
+    """
+    Decode an ASCII, SHORT / LONG or (unsigned) RATIONAL IFD entry.
+    Returns None for other types and offsets outside the block.
+    """
+    typ, n, value = entry
+    if typ == TYPE_ASCII:
+        if n <= 4:
+            raw = struct.pack(endian + "I", value)[:n]
+        else:
+            raw = tiff[value:value + n]
+            if len(raw) < n:
+                return None
+        return raw.split(b"\0", 1)[0].decode("ascii", "replace").strip()
+    if typ == TYPE_RATIONAL:
+        if value + 8 > len(tiff):
+            return None
+        num, den = struct.unpack_from(endian + "II", tiff, value)
+        return num / den if den else None
+    if typ in (3, 4) and n == 1:
+        return value
+    return None
+
+
+def _exif_time(text, subsec=None):
+    """
+    "YYYY:MM:DD HH:MM:SS" (+ sub-second digits) -> seconds, or None.
+    """
+    try:
+        t = datetime.strptime(text, "%Y:%m:%d %H:%M:%S").timestamp()
+    except (TypeError, ValueError):
+        return None
+    if subsec and subsec.isdigit():
+        t += int(subsec) / 10 ** len(subsec)
+    return t
+
+
+def read_capture_info(path):
+    """
+    Capture time, focus distance (m) and exposure from the EXIF block of
+    a JPEG or TIFF file (first EXIF_READ_LIMIT bytes of a TIFF), with
+    the dimensions from the image header.
+    Raises ValueError for unreadable or unsupported files.
+    """
+    info = probe_image(path)
+    fields = dict.fromkeys(CaptureInfo._fields)
+    fields.update(width=info.width, height=info.height)
+
+    if info.format == "jpeg":
+        tiff = _read_jpeg_exif(path)
+    elif info.format == "tiff":
+        with open(path, "rb") as f:
+            tiff = f.read(EXIF_READ_LIMIT)
+    else:
+        tiff = None
+
+    endian = _tiff_endian(tiff) if tiff else None
+    if endian is None:
+        return CaptureInfo(**fields)
+
+    try:
+        ifd0_offset = struct.unpack_from(endian + "I", tiff, 4)[0]
+        ifd0, _ = _read_ifd(tiff, ifd0_offset, endian)
+        exif = {}
+        if TAG_EXIF_IFD in ifd0:
+            exif, _ = _read_ifd(tiff, ifd0[TAG_EXIF_IFD][2], endian)
+
+        def value(ifd, tag):
+            return _ifd_value(tiff, ifd[tag], endian) if tag in ifd else None
+
+        fields.update(
+            time=(
+                _exif_time(
+                    value(exif, TAG_DATETIME_ORIGINAL),
+                    value(exif, TAG_SUBSEC_ORIGINAL),
+                )
+                or _exif_time(value(ifd0, TAG_DATETIME))
+            ),
+            # 0 means unknown
+            focus_distance=value(exif, TAG_SUBJECT_DISTANCE) or None,
+            exposure=value(exif, TAG_EXPOSURE_TIME),
+            fnumber=value(exif, TAG_FNUMBER),
+            iso=value(exif, TAG_ISO),
+        )
+    except struct.error:
+        pass
+
+    return CaptureInfo(**fields)
+
+
+def _probe_jpeg(f):
+    f.seek(2)
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        code = marker[1]
+
+        # Padding and standalone markers have no length
+        if code == 0xFF:
+            f.seek(-1, 1)
+            continue
+        if code == 0x01 or 0xD0 <= code <= 0xD7:
+            continue
+
+        length = struct.unpack(">H", f.read(2))[0]
+
+        # SOF0..SOF15, except DHT (C4), JPG (C8) and DAC (CC)
+        if 0xC0 <= code <= 0xCF and code not in (0xC4, 0xC8, 0xCC):
+            precision, height, width, channels = struct.unpack(
+                ">BHHB", f.read(6)
+            )
+            return ImageInfo(width, height, channels, precision, "jpeg")
+
+        if code == 0xDA:
+            return None
+        f.seek(length - 2, 1)
+
+
+def _probe_png(f):
+    f.seek(8)
+    chunk = f.read(8 + 13)
+    if chunk[4:8] != b"IHDR":
+        return None
+
+    width, height, depth, color_type = struct.unpack(">IIBB", chunk[8:18])
+    return ImageInfo(
+        width, height, _PNG_CHANNELS.get(color_type, 3), depth, "png"
+    )
+
+
+def _probe_tiff(f, endian):
+    f.seek(4)
+    ifd_offset = struct.unpack(endian + "I", f.read(4))[0]
+
+    f.seek(ifd_offset)
+    count = struct.unpack(endian + "H", f.read(2))[0]
+    # Two bytes of padding so the IFD does not sit at offset 0
+    buf = b"\0\0" + struct.pack(endian + "H", count) + f.read(count * 12 + 4)
+    ifd, _ = _read_ifd(buf, 2, endian)
+
+    if TAG_WIDTH not in ifd or TAG_HEIGHT not in ifd:
+        return None
+
+    channels = ifd.get(TAG_SAMPLES_PER_PIXEL, (3, 1, 1))[2]
+
+    _, n, value = ifd.get(TAG_BITS_PER_SAMPLE, (3, 1, 8))
+    if n > 2:
+        # More than 4 bytes of SHORTs: value is an offset
+        f.seek(value)
+        value = struct.unpack(endian + "H", f.read(2))[0]
+    elif n == 2:
+        # Two SHORTs packed in the value field, keep the first one
+        value = value & 0xFFFF if endian == "<" else value >> 16
+
+    return ImageInfo(
+        ifd[TAG_WIDTH][2], ifd[TAG_HEIGHT][2], channels, value, "tiff"
+    )
+
+
+def probe_image(path):
+    """
+    Read dimensions, channels and bit depth from the file header only.
+    Raises ValueError for unreadable or unsupported files.
+    """
+    with open(path, "rb") as f:
+        magic = f.read(8)
+
+        try:
+            if magic[:2] == b"\xff\xd8":
+                info = _probe_jpeg(f)
+            elif magic == b"\x89PNG\r\n\x1a\n":
+                info = _probe_png(f)
+            elif magic[:4] in (b"II*\x00", b"MM\x00*"):
+                info = _probe_tiff(f, _tiff_endian(magic))
+            else:
+                info = None
+        except struct.error as e:
+            # Short reads of a truncated file, or one still being written
+            raise ValueError(f"{path}: truncated header") from e
+
+    if info is None:
+        raise ValueError(f"Unsupported or corrupt image: {path}")
+
+    return info
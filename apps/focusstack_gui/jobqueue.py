@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 13:22:50 2026
+
+@author: Robert Becht (roblin67@gmail.com)
+
+Batch queue and scheduling policy.
+This module only decides what runs and with how many threads,
+the caller owns the processes. It does not import Qt.
+"""
+
+import itertools
+import os
+import time
+
+from preflight import (
+    MIN_BATCHSIZE, available_memory, estimate_peak_memory, fit_options
+)
+from priority import PRIORITY_BACKGROUND
+
+PENDING = "Pending"
+RUNNING = "Running"
+DONE = "Done"
+FAILED = "Failed"
+CANCELLED = "Cancelled"
+
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+_job_ids = itertools.count(1)
+
+
+class Job:
+    def __init__(self, images, options, name=None, info=None,
+                 priority=PRIORITY_BACKGROUND):
+        self.id = next(_job_ids)
+        self.images = list(images)
+        self.options = dict(options)
+        self.name = name or os.path.basename(options["output"])
+        self.priority = priority
+
+        # Header info of the frames (preflight.probe_stack)
+        self.info = info
+        self.memory = 0
+        self.note = ""
+        # Stage / ETA text reported by the running worker
+        self.progress = ""
+
+        self.status = PENDING
+        self.threads = None
+        self.started = None
+        self.finished = None
+
+    @property
+    def frames(self):
+        return len(self.images)
+
+    @property
+    def duration(self):
+        if self.started is None:
+            return 0.0
+        end = self.finished if self.finished is not None else time.monotonic()
+        return end - self.started
+
+
+class JobQueue:
+    """
+    Ordered job list with a CPU-budget-aware scheduler.
+
+    Up to max_parallel jobs run at once and the machine's cores are split
+    between them through each job's --threads value. A running job keeps
+    its thread count, so cores freed by a finished job go to the next
+    ones started.
+
+    Jobs also reserve their estimated peak memory. A job that does not
+    fit next to the running ones is shrunk (batch size, then threads) or
+    delayed until memory is released.
+    """
+
+    def __init__(self, cores=None, max_parallel=2, memory=available_memory):
+        self.cores = cores or os.cpu_count() or 1
+        self.max_parallel = max_parallel
+        self.memory = memory
+        self.memory_limit = None
+        self.jobs = []
+
+    # ---------- Queue editing ----------
+    def add(self, job):
+        self.jobs.append(job)
+        return job
+
+    def get(self, job_id):
+        for job in self.jobs:
+            if job.id == job_id:
+                return job
+        return None
+
+    def move(self, job_id, offset):
+        """
+        Move a job up (negative offset) or down the queue.
+        """
+        job = self.get(job_id)
+        if job is None:
+            return
+
+        row = self.jobs.index(job)
+        new_row = max(0, min(len(self.jobs) - 1, row + offset))
+        self.jobs.insert(new_row, self.jobs.pop(row))
+
+    def cancel(self, job_id):
+        """
+        Cancel a job. Pending jobs are cancelled at once, running jobs
+        must be stopped by the caller, which then calls mark_finished.
+        Returns the job.
+        """
+        job = self.get(job_id)
+        if job is not None and job.status == PENDING:
+            job.status = CANCELLED
+        return job
+
+    def clear_finished(self):
+        self.jobs = [j for j in self.jobs if j.status not in FINISHED_STATES]
+
+    def pending(self):
+        """
+        Pending jobs in start order: priority first, then queue order.
+        """
+        pending = [j for j in self.jobs if j.status == PENDING]
+        return sorted(pending, key=lambda j: -j.priority)
+
+    def running(self):
+        return [j for j in self.jobs if j.status == RUNNING]
+
+    # ---------- Scheduling ----------
+    def schedule(self):
+        """
+        Pick the jobs to start now and set their thread count.
+        The caller starts them and calls mark_started.
+        """
+        running = self.running()
+        pending = self.pending()
+
+        slots = min(self.max_parallel, len(running) + len(pending))
+        free_slots = slots - len(running)
+        free_cores = self.cores - sum(j.threads for j in running)
+
+        # Memory pool measured while nothing of ours is running
+        if not running or self.memory_limit is None:
+            self.memory_limit = self.memory()
+        reserved = sum(j.memory for j in running)
+
+        to_start = []
+        for job in pending:
+            if free_slots <= 0 or free_cores <= 0:
+                break
+
+            options = dict(job.options, threads=max(1, free_cores // free_slots))
+
+            if job.info is not None:
+                frames = len(job.images)
+                fitted = fit_options(
+                    job.info, frames, options, self.memory_limit - reserved
+                )
+                if fitted is None:
+                    if running or to_start:
+                        # Wait for running jobs to release memory
+                        job.note = "Waiting for memory"
+                        break
+                    # Alone on the machine: smallest configuration
+                    fitted = dict(options, batchsize=MIN_BATCHSIZE, threads=1)
+                    job.note = "Exceeds available memory"
+                elif fitted != options:
+                    job.note = (
+                        f"Shrunk to batchsize {fitted['batchsize']}, "
+                        f"{fitted['threads']} threads"
+                    )
+                else:
+                    job.note = ""
+
+                options = fitted
+                job.memory = estimate_peak_memory(job.info, frames, options)
+                reserved += job.memory
+
+            job.options = options
+            job.threads = options["threads"]
+            free_cores -= job.threads
+            free_slots -= 1
+            to_start.append(job)
+
+        return to_start
+
+    def mark_started(self, job):
+        job.status = RUNNING
+        job.started = time.monotonic()
+
+    def mark_finished(self, job, status=DONE):
+        job.status = status
+        job.finished = time.monotonic()
+
+    def is_idle(self):
+        return not self.running() and not self.pending()
+
+    # ---------- Statistics ----------
+    def summary(self):
+        done = [j for j in self.jobs if j.status == DONE]
+        started = [j.started for j in self.jobs if j.started is not None]
+
+        elapsed = 0.0
+        if started:
+            ends = [j.finished for j in self.jobs if j.finished is not None]
+            end = time.monotonic() if self.running() or not ends else max(ends)
+            elapsed = end - min(started)
+
+        frames = sum(len(j.images) for j in done)
+
+        return {
+            "total": len(self.jobs),
+            "pending": len(self.pending()),
+            "running": len(self.running()),
+            "done": len(done),
+            "failed": len([j for j in self.jobs if j.status == FAILED]),
+            "cancelled": len([j for j in self.jobs if j.status == CANCELLED]),
+            "elapsed": elapsed,
+            "frames": frames,
+            "jobs_per_hour": len(done) * 3600 / elapsed if elapsed else 0.0,
+            "frames_per_minute": frames * 60 / elapsed if elapsed else 0.0,
+        }
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 14:10:37 2026
+
+@author: Robert Becht (roblin67@gmail.com)
+"""
+
+import os
+import re
+import threading
+import time
+from datetime import datetime
+
+from config import LOG_DIR, LOG_FLUSH_HZ, LOG_MAX_AGE, LOG_MAX_FILES
+
+
+def job_log_path(output):
+    """
+    Per-job log file, named after the job output.
+    """
+    name = os.path.splitext(os.path.basename(output))[0]
+    name = re.sub(r"[^\w\-]", "_", name)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return os.path.join(LOG_DIR, f"{timestamp}_{name}.log")
+
+
+def prune_logs(log_dir):
+    """
+    Remove the logs of log_dir older than LOG_MAX_AGE, then the oldest
+    ones beyond LOG_MAX_FILES.
+    """
+    logs = []
+    for entry in os.scandir(log_dir):
+        try:
+            if entry.name.endswith(".log"):
+                logs.append((entry.stat().st_mtime, entry.path))
+        except OSError:
+            pass
+    logs.sort(reverse=True)
+    limit = time.time() - LOG_MAX_AGE
+    for i, (mtime, path) in enumerate(logs):
+        if mtime < limit or i >= LOG_MAX_FILES:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+class LogSink:
+    """
+    Coalesces output lines and hands them to emit() as one block of text
+    at most LOG_FLUSH_HZ times per second. Every line is also streamed
+    to a log file on disk. Thread safe.
+    """
+
+    def __init__(self, emit, log_path=None, rate=LOG_FLUSH_HZ):
+        self.emit = emit
+        self.log_path = log_path
+        self.interval = 1.0 / rate
+
+        self._lock = threading.Lock()
+        self._lines = []
+        self._last_flush = 0.0
+        self._file = None
+
+        if log_path:
+            os.makedirs(os.path.dirname(log_path), exist_ok=True)
+            prune_logs(os.path.dirname(log_path))
+            self._file = open(log_path, "a", encoding="utf-8")
+
+    def write(self, line):
+        with self._lock:
+            self._lines.append(line)
+            if self._file:
+                self._file.write(line + "\n")
+        self.tick()
+
+    def tick(self):
+        """
+        Flush if the last flush is older than one frame.
+        """
+        if time.monotonic() - self._last_flush >= self.interval:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            lines, self._lines = self._lines, []
+            self._last_flush = time.monotonic()
+
+        if lines:
+            self.emit("\n".join(lines))
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
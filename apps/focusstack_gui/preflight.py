@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 15:03:16 2026
+
+@author: Robert Becht (roblin67@gmail.com)
+
+Preflight checks run before any focus-stack process is started:
+header probing of the inputs and a peak memory estimate.
+"""
+
+import os
+
+from imageinfo import probe_image
+
+# Fixed cost of a focus-stack process (binary, OpenCV, OpenCL context)
+BASE_MEMORY = 300 * 1024 * 1024
+
+# Safety factor on top of the buffer count below
+MEMORY_OVERHEAD = 1.25
+
+# Keep part of the available RAM for the desktop and the page cache
+MEMORY_HEADROOM = 0.85
+
+MIN_BATCHSIZE = 2
+
+
+class PreflightError(Exception):
+    pass
+
+
+def probe_stack(images):
+    """
+    Probe every frame header and check that all frames have the same
+    size. Returns the ImageInfo of the first frame.
+    """
+    if not images:
+        raise PreflightError("No images selected.")
+
+    reference = None
+    mismatched = []
+
+    for path in images:
+        try:
+            info = probe_image(path)
+        except (OSError, ValueError) as e:
+            raise PreflightError(str(e)) from e
+
+        if reference is None:
+            reference = info
+        elif (info.width, info.height) != (reference.width, reference.height):
+            mismatched.append(
+                f"{os.path.basename(path)} ({info.width}x{info.height})"
+            )
+
+    if mismatched:
+        raise PreflightError(
+            f"Frame size mismatch, expected {reference.width}x{reference.height}:\n"
+            + "\n".join(mismatched[:10])
+            + ("\n..." if len(mismatched) > 10 else "")
+        )
+
+    return reference
+
+
+def estimate_peak_memory(info, frame_count, options):
+    """
+    Rough peak memory (bytes) of one focus-stack run.
+
+    focus-stack keeps a few frames in flight per thread (decoded image,
+    float grayscale copy and complex wavelet) and, while merging, the
+    wavelets of a whole batch plus the float accumulators.
+    """
+    pixels = info.width * info.height
+    sample_bytes = max(1, info.bit_depth // 8)
+
+    decoded = pixels * info.channels * sample_bytes
+    grayscale = pixels * 4
+    wavelet = pixels * 8
+
+    threads = max(1, int(options.get("threads", 1)))
+    batchsize = max(1, int(options.get("batchsize", 8)))
+
+    in_flight = min(frame_count, threads + 1)
+    batch = min(frame_count, batchsize)
+
+    total = in_flight * (decoded + grayscale + wavelet)
+    total += batch * wavelet
+    # Merged wavelet, color result in float, aligned reference
+    total += wavelet + pixels * info.channels * 4 + decoded
+
+    if options.get("depthmap"):
+        total += pixels * 4 * 3
+
+    return int(BASE_MEMORY + total * MEMORY_OVERHEAD)
+
+
+def available_memory():
+    """
+    Memory usable by new jobs, from MemAvailable in /proc/meminfo.
+    """
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024 * MEMORY_HEADROOM
+    except OSError:
+        pass
+
+    pages = os.sysconf("SC_AVPHYS_PAGES")
+    return pages * os.sysconf("SC_PAGE_SIZE") * MEMORY_HEADROOM
+
+
+def fit_options(info, frame_count, options, budget):
+    """
+    Shrink batchsize, then threads, until the estimate fits the budget.
+    Returns the adjusted options, or None when even the smallest
+    configuration does not fit.
+    """
+    options = dict(options)
+
+    while estimate_peak_memory(info, frame_count, options) > budget:
+        if options["batchsize"] > MIN_BATCHSIZE:
+            options["batchsize"] = max(MIN_BATCHSIZE, options["batchsize"] // 2)
+        elif options["threads"] > 1:
+            options["threads"] = max(1, options["threads"] // 2)
+        else:
+            return None
+
+    return options
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 16:48:09 2026
+
+@author: Robert Becht (roblin67@gmail.com)
+
+Job priorities and preemption of background focus-stack processes.
+"""
+
+import os
+import shutil
+import subprocess
+import threading
+
+PRIORITY_BACKGROUND = 0
+PRIORITY_NORMAL = 1
+PRIORITY_INTERACTIVE = 2
+
+PRIORITY_NAMES = {
+    PRIORITY_BACKGROUND: "Background",
+    PRIORITY_NORMAL: "Normal",
+    PRIORITY_INTERACTIVE: "Interactive",
+}
+
+# Niceness given to the process group at launch.
+# Niceness can only be raised without privileges, never lowered back.
+PRIORITY_NICE = {
+    PRIORITY_BACKGROUND: 10,
+    PRIORITY_NORMAL: 0,
+    PRIORITY_INTERACTIVE: 0,
+}
+
+def renice_group(pgid, niceness):
+    try:
+        current = os.getpriority(os.PRIO_PGRP, pgid)
+        if niceness > current:
+            os.setpriority(os.PRIO_PGRP, pgid, niceness)
+    except OSError:
+        pass
+
+
+def ionice_group(pgid, io_class, level=None):
+    """
+    Set the I/O scheduling class of a process group (util-linux ionice).
+    io_class: 1 realtime, 2 best-effort, 3 idle.
+    """
+    ionice = shutil.which("ionice")
+    if ionice is None:
+        return
+
+    cmd = [ionice, "-c", str(io_class)]
+    if level is not None:
+        cmd += ["-n", str(level)]
+    cmd += ["-P", str(pgid)]
+
+    subprocess.run(
+        cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False
+    )
+
+
+def apply_priority(pgid, priority, resumed=False):
+    """
+    Apply the launch niceness and I/O class of a priority level. With
+    resumed, the idle I/O class of a preempted group is reset as well.
+    """
+    renice_group(pgid, PRIORITY_NICE[priority])
+    if priority == PRIORITY_BACKGROUND:
+        ionice_group(pgid, 2, 7)
+    elif resumed:
+        ionice_group(pgid, 2, 4)
+
+
+class PreemptionRegistry:
+    """
+    Tracks running jobs. While an interactive job runs, every job with
+    a lower priority is paused; they are resumed when the last
+    interactive job is gone.
+
+    Handles must provide pause() and resume().
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active = {}
+        self._paused = set()
+
+    def _interactive_running(self):
+        return any(p >= PRIORITY_INTERACTIVE for p in self._active.values())
+
+    def register(self, handle, priority):
+        with self._lock:
+            self._active[handle] = priority
+
+            if priority >= PRIORITY_INTERACTIVE:
+                for other, other_priority in self._active.items():
+                    if other_priority < priority and other not in self._paused:
+                        other.pause()
+                        self._paused.add(other)
+
+            elif self._interactive_running():
+                handle.pause()
+                self._paused.add(handle)
+
+    def unregister(self, handle):
+        with self._lock:
+            self._active.pop(handle, None)
+            self._paused.discard(handle)
+
+            if not self._interactive_running():
+                for other in self._paused:
+                    other.resume()
+                self._paused.clear()
+
+    def is_paused(self, handle):
+        with self._lock:
+            return handle in self._paused
+
+
+preemption = PreemptionRegistry()
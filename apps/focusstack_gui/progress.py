@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 16:27:55 2026
+
+@author: Robert Becht (roblin67@gmail.com)
+
+Progress and ETA from focus-stack output. Does not import Qt.
+"""
+
+import json
+import math
+import os
+import re
+import threading
+
+from config import CALIBRATION_FILE
+
+# focus-stack prefixes task lines with a task counter: "[ 12/245] Aligning ..."
+_COUNTER = re.compile(r"^\[\s*(\d+)\s*/\s*(\d+)\s*\]\s*(.*)$")
+
+# (stage, keywords, weight in a typical run, per-frame stage)
+STAGES = [
+    ("Loading", ("Load",), 0.15, True),
+    ("Aligning", ("Align",), 0.35, True),
+    ("Wavelets", ("Grayscale", "avelet", "Laplacian", "pyramid"), 0.20, True),
+    ("Merging", ("Merg",), 0.15, False),
+    ("Denoising", ("Denois", "Reassign"), 0.05, False),
+    ("Depthmap", ("Depth",), 0.05, False),
+    ("Saving", ("Sav", "Writ"), 0.05, False),
+]
+
+# Options that change how long a run takes
+TIMING_OPTIONS = (
+    "threads", "batchsize", "no_opencl", "full_res_align", "no_align",
+    "global_align", "align_only", "consistency", "depthmap",
+)
+
+
+class ProgressParser:
+    """
+    Tracks the current stage and the number of frames done in each stage.
+
+    When focus-stack prints its task counter, progress is done/total.
+    Otherwise it is built from the stage weights in STAGES.
+    """
+
+    def __init__(self, frame_count):
+        self.frame_count = max(1, frame_count)
+        self.stage_index = -1
+        self.frames_done = [0] * len(STAGES)
+        self.tasks_done = 0
+        self.tasks_total = 0
+        self._fraction = 0.0
+
+    @property
+    def stage(self):
+        if self.stage_index < 0:
+            return "Starting"
+        return STAGES[self.stage_index][0]
+
+    @property
+    def fraction(self):
+        return self._fraction
+
+    def feed(self, line):
+        """
+        Parse one output line. Returns True if the progress changed.
+        """
+        text = line
+        match = _COUNTER.match(line)
+        if match:
+            self.tasks_done = max(self.tasks_done, int(match.group(1)))
+            self.tasks_total = max(self.tasks_total, int(match.group(2)))
+            text = match.group(3)
+
+        index = self._classify(text)
+        if index is not None:
+            # Stages only move forward, later keywords may reappear in
+            # file names or messages
+            self.stage_index = max(self.stage_index, index)
+            if index == self.stage_index:
+                self.frames_done[index] += 1
+
+        if line.startswith(("Saved", "Done")):
+            fraction = 1.0
+        elif self.tasks_total:
+            fraction = self.tasks_done / self.tasks_total
+        else:
+            fraction = self._weighted_fraction()
+
+        fraction = max(self._fraction, min(1.0, fraction))
+        changed = fraction != self._fraction or index is not None
+        self._fraction = fraction
+        return changed
+
+    def stage_frames(self):
+        """
+        (frames done, frames expected) for the current stage, or None.
+        """
+        if self.stage_index < 0 or not STAGES[self.stage_index][3]:
+            return None
+        done = min(self.frames_done[self.stage_index], self.frame_count)
+        return done, self.frame_count
+
+    def _classify(self, text):
+        for index, (_, keywords, _, _) in enumerate(STAGES):
+            if any(k in text for k in keywords):
+                return index
+        return None
+
+    def _weighted_fraction(self):
+        fraction = 0.0
+        for index, (_, _, weight, per_frame) in enumerate(STAGES):
+            if index < self.stage_index:
+                fraction += weight
+            elif index == self.stage_index and per_frame:
+                done = min(self.frames_done[index], self.frame_count)
+                fraction += weight * done / self.frame_count
+        return fraction
+
+
+def estimate_remaining(fraction, elapsed, prior=None):
+    """
+    Remaining seconds from measured progress, blended with the
+    calibrated total duration (prior) while progress is still small.
+    """
+    measured = None
+    if fraction >= 0.02 and elapsed > 0:
+        measured = elapsed / fraction - elapsed
+
+    if prior is None:
+        return measured
+
+    prior_remaining = max(0.0, prior - elapsed)
+    if measured is None:
+        return prior_remaining
+
+    return (1 - fraction) * prior_remaining + fraction * measured
+
+
+class Calibration:
+    """
+    Measured durations of earlier runs, stored per timing-relevant
+    options. Durations are scaled by frames x megapixels from the
+    closest earlier runs.
+    """
+
+    MAX_RECORDS = 50
+    MAX_DISTANCE = math.log(4)
+
+    _lock = threading.Lock()
+
+    def __init__(self, path=CALIBRATION_FILE):
+        self.path = path
+
+    @staticmethod
+    def signature(options):
+        return json.dumps(
+            {k: options.get(k) for k in TIMING_OPTIONS}, sort_keys=True
+        )
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def estimate(self, options, frames, megapixels):
+        records = self._load().get(self.signature(options), [])
+
+        scored = []
+        for r in records:
+            distance = (
+                abs(math.log(frames / r["frames"]))
+                + abs(math.log(megapixels / r["megapixels"]))
+            )
+            if distance <= self.MAX_DISTANCE:
+                rate = r["seconds"] / (r["frames"] * r["megapixels"])
+                scored.append((distance, rate))
+
+        if not scored:
+            return None
+
+        nearest = sorted(scored)[:3]
+        rate = sum(rate for _, rate in nearest) / len(nearest)
+        return rate * frames * megapixels
+
+    def record(self, options, frames, megapixels, seconds):
+        if frames <= 0 or megapixels <= 0 or seconds <= 0:
+            return
+
+        with self._lock:
+            data = self._load()
+            records = data.setdefault(self.signature(options), [])
+            records.append({
+                "frames": frames,
+                "megapixels": megapixels,
+                "seconds": seconds,
+            })
+            del records[:-self.MAX_RECORDS]
+
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
+
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+    return f"{seconds // 60}:{seconds % 60:02d}"
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Thu Oct 22 15:02:48 2026
+
+@author: Robert Becht (roblin67@gmail.com)
+
+Low-resolution proxies of the input frames, for preview runs.
+
+Proxies are cached per frame content and size, so a preview after adding
+or removing a few frames only scales the new ones.
+"""
+
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QImageReader
+
+from framebuilder import FrameBuilder
+from config import PROXY_DIR, PROXY_CACHE_MAX_BYTES
+
+PROXY_QUALITY = 95
+
+
+def make_proxy(src, dst, long_edge):
+    """
+    Decode src scaled down to long_edge (JPEG decoders scale while
+    decoding) with its EXIF orientation applied, and save it to dst.
+    """
+    reader = QImageReader(src)
+    reader.setAutoTransform(True)
+    size = reader.size()
+    if size.isValid() and max(size.width(), size.height()) > long_edge:
+        reader.setScaledSize(
+            size.scaled(long_edge, long_edge, Qt.AspectRatioMode.KeepAspectRatio)
+        )
+
+    image = reader.read()
+    if image.isNull():
+        raise OSError(f"Cannot read {src}: {reader.errorString()}")
+
+    # Some decoders ignore setScaledSize
+    if max(image.width(), image.height()) > long_edge:
+        image = image.scaled(
+            long_edge, long_edge,
+            Qt.AspectRatioMode.KeepAspectRatio,
+            Qt.TransformationMode.SmoothTransformation
+        )
+
+    if not image.save(dst, "JPG", PROXY_QUALITY):
+        raise OSError(f"Cannot write {dst}")
+
+
+class ProxyBuilder(FrameBuilder):
+    kind = "proxy"
+
+    def __init__(self, long_edge, root=PROXY_DIR,
+                 max_bytes=PROXY_CACHE_MAX_BYTES, index=None):
+        super().__init__(root, max_bytes, index)
+        self.long_edge = long_edge
+
+    def params(self):
+        return str(self.long_edge)
+
+    def make(self, src, dst):
+        make_proxy(src, dst, self.long_edge)
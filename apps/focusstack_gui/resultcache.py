@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Oct 21 15:40:26 2026
+
+@author: Robert Becht (roblin67@gmail.com)
+
+Content-addressed cache of stacking results.
+
+The key is the content of the input frames in order, the normalized
+focus-stack arguments and the binary version. Output file names and
+arguments that do not change the result are left out of the key.
+"""
+
+import os
+import shutil
+
+from diskcache import DiskCache
+from hashing import FileHashIndex, combine
+from runner import binary_version, build_command
+from config import RESULT_CACHE_DIR, RESULT_CACHE_MAX_BYTES
+
+# Arguments that do not change the result
+_IGNORED_ARGS = ("--threads=", "--verbose", "--wait-images=")
+
+# Arguments naming output files: only the format (extension) matters
+_OUTPUT_ARGS = ("--output=", "--depthmap=")
+
+# File of an entry that stands for the result stored under another key
+ALIAS_FILE = "alias"
+
+
+def normalized_args(images, options):
+    args = []
+    for arg in build_command(images, options)[1 + len(images):]:
+        if arg.startswith(_IGNORED_ARGS):
+            continue
+        if arg.startswith(_OUTPUT_ARGS):
+            name, _, path = arg.partition("=")
+            arg = f"{name}=*{os.path.splitext(path)[1].lower()}"
+        args.append(arg)
+    return args
+
+
+def output_files(options):
+    """
+    {name in cache entry: output path} produced by a run.
+    """
+    files = {"output": options["output"]}
+    if options.get("depthmap"):
+        files["depthmap"] = os.path.abspath(options["depthmap_file"])
+    return files
+
+
+class ResultCache:
+    def __init__(self, root=RESULT_CACHE_DIR, max_bytes=RESULT_CACHE_MAX_BYTES,
+                 index=None):
+        self.cache = DiskCache(root, max_bytes)
+        self.index = index or FileHashIndex()
+
+    def key(self, images, options, extra=(), indexed_only=False):
+        """
+        extra: strings for settings that change the result outside of
+        the focus-stack arguments
+        indexed_only: None rather than reading frames not hashed yet
+        """
+        if indexed_only:
+            digests = self.index.known_digests(images)
+            if digests is None:
+                return None
+        else:
+            digests = self.index.digests(images)
+        return combine(
+            binary_version(),
+            *digests,
+            *normalized_args(images, options),
+            *extra,
+        )
+
+    def restore(self, key, options):
+        """
+        Copy a cached result to the output paths of options.
+        Returns True on a cache hit.
+        """
+        with self.cache.reading():
+            entry = self.cache.get(key)
+            if entry is not None and os.path.exists(
+                os.path.join(entry, ALIAS_FILE)
+            ):
+                with open(os.path.join(entry, ALIAS_FILE)) as f:
+                    entry = self.cache.get(f.read().strip())
+            if entry is None:
+                return False
+
+            files = output_files(options)
+            if not all(os.path.exists(os.path.join(entry, n)) for n in files):
+                return False
+
+            for name, dst in files.items():
+                os.makedirs(
+                    os.path.dirname(os.path.abspath(dst)), exist_ok=True
+                )
+                shutil.copy2(os.path.join(entry, name), dst)
+        return True
+
+    def store(self, key, options):
+        files = output_files(options)
+        if all(os.path.exists(p) for p in files.values()):
+            self.cache.put(key, files)
+
+    def alias(self, key, target):
+        """
+        Make key restore the result stored under target.
+        """
+        work_dir = self.cache.new_dir()
+        try:
+            path = os.path.join(work_dir, ALIAS_FILE)
+            with open(path, "w") as f:
+                f.write(target)
+            self.cache.put(key, {ALIAS_FILE: path}, move=True)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Oct 28 14:48:05 2026
+
+@author: Robert Becht (roblin67@gmail.com)
+
+Viewer of large results and depthmaps.
+
+Only the tiles visible at the current zoom are decoded, from the tile
+pyramid built in the background (tilepyramid.py); coarser tiles stand in
+until they are loaded. Two results can be compared side by side or with
+a swipe line, with the same pan and zoom.
+"""
+
+import math
+import os
+from collections import OrderedDict
+
+from PyQt6.QtCore import QPointF, QRectF, Qt, pyqtSignal
+from PyQt6.QtGui import QColor, QPainter, QPen
+from PyQt6.QtWidgets import (
+    QComboBox, QDialog, QFileDialog, QHBoxLayout, QLabel, QMessageBox,
+    QPushButton, QVBoxLayout, QWidget
+)
+
+from tilepyramid import TilePyramid
+from worker import PyramidWorker, TileLoader
+from config import VIEWER_MEMORY_BYTES
+
+BACKGROUND_COLOR = QColor(40, 40, 40)
+SWIPE_COLOR = QColor(255, 200, 0)
+
+
+class TileCache:
+    """
+    Decoded tiles, the least recently used dropped over max_bytes.
+    """
+
+    def __init__(self, max_bytes=VIEWER_MEMORY_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._tiles = OrderedDict()
+
+    def __contains__(self, key):
+        return key in self._tiles
+
+    def get(self, key):
+        image = self._tiles.get(key)
+        if image is not None:
+            self._tiles.move_to_end(key)
+        return image
+
+    def put(self, key, image):
+        if key in self._tiles:
+            return
+        self._tiles[key] = image
+        self.size += image.sizeInBytes()
+        while self.size > self.max_bytes and len(self._tiles) > 1:
+            _, old = self._tiles.popitem(last=False)
+            self.size -= old.sizeInBytes()
+
+
+class TileView(QWidget):
+    """
+    Pans (drag) and zooms (wheel) over a pyramid. With a second pyramid
+    and a swipe position, the second is shown right of the swipe line,
+    stretched over the same area.
+    """
+
+    # (center x, center y in pixels of the first image, zoom)
+    view_changed = pyqtSignal(float, float, float)
+
+    MAX_ZOOM = 8.0
+    SWIPE_GRIP = 6
+
+    def __init__(self, pyramids, swipe=None, parent=None):
+        super().__init__(parent)
+        self.setMinimumSize(300, 200)
+        self.setMouseTracking(True)
+        self.setToolTip("Wheel: zoom, drag: pan, double-click: fit")
+        self.pyramids = pyramids
+        self.swipe = swipe
+        self.cache = TileCache()
+        self.loader = TileLoader()
+        self.loader.loaded_signal.connect(self._on_loaded)
+        self.loader.start()
+
+        first = pyramids[0]
+        self.center = QPointF(first.width / 2, first.height / 2)
+        self.zoom = 1.0
+        self.fitted = True
+        self._drag = None
+        self._swiping = False
+
+    def close_view(self):
+        self.loader.stop()
+        self.loader.wait()
+
+    # ---------- View ----------
+    def _fit_zoom(self):
+        first = self.pyramids[0]
+        return min(self.width() / first.width, self.height() / first.height)
+
+    def fit(self):
+        first = self.pyramids[0]
+        self.fitted = True
+        self.zoom = self._fit_zoom()
+        self.center = QPointF(first.width / 2, first.height / 2)
+        self._changed()
+
+    def actual_size(self):
+        self.set_view(self.center.x(), self.center.y(), 1.0)
+        self._changed()
+
+    def set_view(self, x, y, zoom):
+        """
+        Show (x, y) of the first image at the center, zoom screen pixels
+        per image pixel. Does not emit view_changed.
+        """
+        self.fitted = False
+        self.center = QPointF(x, y)
+        self.zoom = zoom
+        self.update()
+
+    def _changed(self):
+        self.update()
+        self.view_changed.emit(self.center.x(), self.center.y(), self.zoom)
+
+    def image_rect(self):
+        """
+        The whole first image in widget coordinates.
+        """
+        first = self.pyramids[0]
+        return QRectF(
+            self.width() / 2 - self.center.x() * self.zoom,
+            self.height() / 2 - self.center.y() * self.zoom,
+            first.width * self.zoom, first.height * self.zoom
+        )
+
+    def _swipe_x(self):
+        if self.swipe is None or len(self.pyramids) < 2:
+            return None
+        return self.swipe * self.width()
+
+    # ---------- Events ----------
+    def resizeEvent(self, event):
+        if self.fitted:
+            self.zoom = self._fit_zoom()
+            self.view_changed.emit(
+                self.center.x(), self.center.y(), self.zoom
+            )
+
+    def wheelEvent(self, event):
+        factor = 1.25 ** (event.angleDelta().y() / 120)
+        zoom = min(max(self.zoom * factor, min(self._fit_zoom(), 1.0) / 2),
+                   self.MAX_ZOOM)
+        # Keep the image point under the cursor in place
+        pos = event.position()
+        rect = self.image_rect()
+        point = (pos - rect.topLeft()) / self.zoom
+        offset = pos - QPointF(self.width() / 2, self.height() / 2)
+        self.fitted = False
+        self.zoom = zoom
+        self.center = point - offset / zoom
+        self._changed()
+
+    def mousePressEvent(self, event):
+        x = event.position().x()
+        swipe_x = self._swipe_x()
+        if swipe_x is not None and abs(x - swipe_x) <= self.SWIPE_GRIP:
+            self._swiping = True
+        else:
+            self._drag = (event.position(), self.center)
+            self.setCursor(Qt.CursorShape.ClosedHandCursor)
+
+    def mouseMoveEvent(self, event):
+        pos = event.position()
+        if self._swiping:
+            self.swipe = min(max(pos.x() / self.width(), 0.0), 1.0)
+            self.update()
+        elif self._drag is not None:
+            start, center = self._drag
+            self.fitted = False
+            self.center = center - (pos - start) / self.zoom
+            self._changed()
+        else:
+            swipe_x = self._swipe_x()
+            near = (swipe_x is not None
+                    and abs(pos.x() - swipe_x) <= self.SWIPE_GRIP)
+            self.setCursor(
+                Qt.CursorShape.SplitHCursor if near
+                else Qt.CursorShape.OpenHandCursor
+            )
+
+    def mouseReleaseEvent(self, event):
+        self._drag = None
+        self._swiping = False
+        self.setCursor(Qt.CursorShape.OpenHandCursor)
+
+    def mouseDoubleClickEvent(self, event):
+        self.fit()
+
+    def _on_loaded(self, key, image):
+        self.cache.put(key, image)
+        self.update()
+
+    # ---------- Painting ----------
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), BACKGROUND_COLOR)
+        if self.zoom < 1:
+            painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+
+        rect = self.image_rect()
+        swipe_x = self._swipe_x()
+        clips = [QRectF(self.rect())]
+        if swipe_x is not None:
+            clips = [
+                QRectF(0, 0, swipe_x, self.height()),
+                QRectF(swipe_x, 0, self.width() - swipe_x, self.height()),
+            ]
+
+        wanted = []
+        for pyramid, clip in zip(self.pyramids, clips):
+            painter.save()
+            painter.setClipRect(clip)
+            wanted += self._draw(painter, pyramid, rect, clip)
+            painter.restore()
+
+        if swipe_x is not None:
+            painter.setPen(QPen(SWIPE_COLOR, 2))
+            painter.drawLine(
+                QPointF(swipe_x, 0), QPointF(swipe_x, self.height())
+            )
+        painter.end()
+        self.loader.request(wanted)
+
+    def _level(self, pyramid, rect):
+        """
+        Coarsest level with at least one pixel per screen pixel.
+        """
+        scale = rect.width() / pyramid.width
+        if scale >= 1:
+            return 0
+        return min(pyramid.top, int(math.floor(math.log2(1 / scale))))
+
+    def _tiles(self, pyramid, level, rect, visible):
+        """
+        Keys and widget rectangles of the tiles of level within visible,
+        from the center out.
+        """
+        size = pyramid.levels[level]
+        sx = rect.width() / size.width()
+        sy = rect.height() / size.height()
+        t = pyramid.tile_size
+        cols, rows = pyramid.grid(level)
+        col0 = max(0, int((visible.left() - rect.left()) / sx // t))
+        col1 = min(cols - 1, int((visible.right() - rect.left()) / sx // t))
+        row0 = max(0, int((visible.top() - rect.top()) / sy // t))
+        row1 = min(rows - 1, int((visible.bottom() - rect.top()) / sy // t))
+
+        tiles = []
+        for row in range(row0, row1 + 1):
+            for col in range(col0, col1 + 1):
+                r = pyramid.tile_rect(level, col, row)
+                tiles.append(((pyramid, level, col, row), QRectF(
+                    rect.left() + r.x() * sx, rect.top() + r.y() * sy,
+                    r.width() * sx, r.height() * sy
+                )))
+        middle = visible.center()
+        tiles.sort(
+            key=lambda tile: (tile[1].center() - middle).manhattanLength()
+        )
+        return tiles
+
+    def _draw(self, painter, pyramid, rect, clip):
+        """
+        Draw the visible tiles of pyramid stretched over rect. Returns
+        the keys of the tiles to load.
+        """
+        visible = clip.intersected(rect)
+        if visible.isEmpty():
+            return []
+        level = self._level(pyramid, rect)
+        tiles = self._tiles(pyramid, level, rect, visible)
+        missing = [key for key, _ in tiles if key not in self.cache]
+
+        wanted = list(missing)
+        if missing:
+            # Coarser tiles under the missing ones, the overview always
+            for coarser in range(pyramid.top, level, -1):
+                for key, target in self._tiles(
+                    pyramid, coarser, rect, visible
+                ):
+                    image = self.cache.get(key)
+                    if image is not None:
+                        painter.drawImage(target, image)
+                    elif coarser == pyramid.top:
+                        wanted.append(key)
+
+        for key, target in tiles:
+            image = self.cache.get(key)
+            if image is not None:
+                painter.drawImage(target, image)
+        return wanted
+
+
+class ResultViewer(QDialog):
+    """
+    A result, or two compared side by side or with a swipe line.
+    Raises OSError if an image cannot be read.
+    """
+
+    MODES = ["Side by side", "Swipe"]
+
+    def __init__(self, path, compare=None, parent=None):
+        super().__init__(parent)
+        self.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        self.setWindowTitle(f"Result - {os.path.basename(path)}")
+        self.resize(1200, 800)
+        self.pyramids = []
+        self.builders = []
+        self.views = []
+
+        layout = QVBoxLayout()
+        bar = QHBoxLayout()
+        fit_btn = QPushButton("Fit")
+        fit_btn.clicked.connect(lambda: self.views[0].fit())
+        actual_btn = QPushButton("1:1")
+        actual_btn.setToolTip("One screen pixel per pixel of the result")
+        actual_btn.clicked.connect(lambda: self.views[0].actual_size())
+        compare_btn = QPushButton("Compare with...")
+        compare_btn.clicked.connect(self.choose_compare)
+        self.mode = QComboBox()
+        self.mode.addItems(self.MODES)
+        self.mode.currentIndexChanged.connect(self._show_views)
+        self.zoom_label = QLabel()
+        self.status = QLabel()
+        for widget in (fit_btn, actual_btn, compare_btn, self.mode,
+                       self.zoom_label):
+            bar.addWidget(widget)
+        bar.addStretch()
+        bar.addWidget(self.status)
+        layout.addLayout(bar)
+
+        self.view_layout = QHBoxLayout()
+        layout.addLayout(self.view_layout, 1)
+        self.setLayout(layout)
+
+        self._add(path)
+        if compare:
+            self._add(compare)
+        self._show_views()
+
+    def _add(self, path):
+        pyramid = TilePyramid(path)
+        builder = PyramidWorker(pyramid)
+        name = os.path.basename(path)
+        builder.level_signal.connect(
+            lambda level: self._on_level(name, level)
+        )
+        builder.message_signal.connect(self.status.setText)
+        self.pyramids.append(pyramid)
+        self.builders.append(builder)
+        builder.start()
+
+    def choose_compare(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Compare with", os.path.dirname(self.pyramids[0].path),
+            "Images (*.jpg *.jpeg *.png *.tif *.tiff)"
+        )
+        if not path:
+            return
+        if len(self.pyramids) > 1:
+            self.pyramids.pop()
+            self._stop(self.builders.pop())
+        try:
+            self._add(path)
+        except OSError as e:
+            QMessageBox.warning(self, "Compare", str(e))
+        self._show_views()
+
+    def _show_views(self):
+        """
+        Rebuild the views for the compare mode, keeping pan and zoom.
+        """
+        state = None
+        if self.views:
+            view = self.views[0]
+            state = (view.center, view.zoom, view.fitted)
+        for view in self.views:
+            self.view_layout.removeWidget(view)
+            view.close_view()
+            view.deleteLater()
+
+        compare = len(self.pyramids) > 1
+        self.mode.setEnabled(compare)
+        if compare and self.mode.currentIndex() == 0:
+            self.views = [TileView([p]) for p in self.pyramids]
+        else:
+            self.views = [TileView(
+                self.pyramids, swipe=0.5 if compare else None
+            )]
+
+        for view in self.views:
+            view.view_changed.connect(self._sync)
+            self.view_layout.addWidget(view)
+            if state is not None and not state[2]:
+                view.set_view(state[0].x(), state[0].y(), state[1])
+
+    def _sync(self, x, y, zoom):
+        for view in self.views:
+            if view is not self.sender():
+                view.set_view(x, y, zoom)
+                view.fitted = self.sender().fitted
+        self.zoom_label.setText(f"{zoom:.0%}")
+
+    def _on_level(self, name, level):
+        if level == 0:
+            self.status.setText(f"{name}: full resolution ready")
+        else:
+            self.status.setText(f"{name}: 1:{2 ** level} ready")
+        for view in self.views:
+            view.update()
+
+    def _stop(self, builder):
+        builder.stop()
+        builder.wait()
+
+    def done(self, result):
+        for builder in self.builders:
+            self._stop(builder)
+        for view in self.views:
+            view.close_view()
+        super().done(result)
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Fri Oct 23 09:48:20 2026
+
+@author: Robert Becht (roblin67@gmail.com)
+
+Region of interest stacking: frames are cropped to the ROI plus a
+margin before the run.
+
+An ROI is (x, y, width, height) as fractions of the frame, with the EXIF
+orientation applied, so the same ROI fits the full frames, the preview
+proxies and the thumbnails it was drawn on.
+"""
+
+import math
+
+from PyQt6.QtCore import QRect
+from PyQt6.QtGui import QImageIOHandler, QImageReader
+
+from framebuilder import FrameBuilder
+from config import CROP_DIR, CROP_CACHE_MAX_BYTES, ROI_MARGIN
+
+# Lossless, zlib level 1
+CROP_PNG_QUALITY = 80
+
+
+def crop_rect(width, height, roi, margin=ROI_MARGIN):
+    """
+    Pixel rectangle of roi in a width x height frame, grown by margin
+    (fraction of the larger ROI side) and clipped to the frame.
+    """
+    x, y, w, h = roi
+    pad = margin * max(w * width, h * height)
+
+    left = max(0, math.floor(x * width - pad))
+    top = max(0, math.floor(y * height - pad))
+    right = min(width, math.ceil((x + w) * width + pad))
+    bottom = min(height, math.ceil((y + h) * height + pad))
+    return QRect(left, top, right - left, bottom - top)
+
+
+def format_roi(roi):
+    x, y, w, h = roi
+    return (
+        f"{w * 100:.0f}% x {h * 100:.0f}% of the frame "
+        f"at ({x * 100:.0f}%, {y * 100:.0f}%)"
+    )
+
+
+def make_crop(src, dst, roi):
+    reader = QImageReader(src)
+    reader.setAutoTransform(True)
+    size = reader.size()
+
+    none = QImageIOHandler.Transformation.TransformationNone
+    if size.isValid() and reader.transformation() == none:
+        # Only the clipped region is converted
+        reader.setClipRect(crop_rect(size.width(), size.height(), roi))
+        image = reader.read()
+    else:
+        # The clip rectangle applies before the orientation
+        image = reader.read()
+        if not image.isNull():
+            image = image.copy(crop_rect(image.width(), image.height(), roi))
+
+    if image.isNull():
+        raise OSError(f"Cannot read {src}: {reader.errorString()}")
+    if not image.save(dst, "PNG", CROP_PNG_QUALITY):
+        raise OSError(f"Cannot write {dst}")
+
+
+class CropBuilder(FrameBuilder):
+    kind = "crop"
+    ext = ".png"
+
+    def __init__(self, roi, root=CROP_DIR, max_bytes=CROP_CACHE_MAX_BYTES,
+                 index=None):
+        super().__init__(root, max_bytes, index)
+        self.roi = tuple(roi)
+
+    def params(self):
+        return ",".join(f"{v:.6f}" for v in self.roi) + f"+{ROI_MARGIN}"
+
+    def make(self, src, dst):
+        make_crop(src, dst, self.roi)
+
+
+def cropped_info(info, roi):
+    """
+    ImageInfo of the cropped frames, for memory estimates.
+    """
+    if not roi:
+        return info
+    rect = crop_rect(info.width, info.height, roi)
+    return info._replace(width=rect.width(), height=rect.height())
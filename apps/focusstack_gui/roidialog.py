@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Fri Oct 23 10:31:07 2026
+
+@author: Robert Becht (roblin67@gmail.com)
+"""
+
+from PyQt6.QtCore import QRect, Qt
+from PyQt6.QtGui import QColor, QPainter, QPen, QPixmap
+from PyQt6.QtWidgets import QDialog, QDialogButtonBox, QLabel, QVBoxLayout
+
+from thumbnails import load_thumbnail
+
+ROI_VIEW_SIZE = 800
+
+
+class RoiSelector(QLabel):
+    """
+    Frame preview on which a rectangle is drawn with the mouse.
+    """
+
+    def __init__(self, image, roi=None):
+        super().__init__()
+        self.setPixmap(QPixmap.fromImage(image))
+        self.setFixedSize(image.size())
+        self.setCursor(Qt.CursorShape.CrossCursor)
+
+        self._origin = None
+        self._rect = QRect()
+        if roi:
+            x, y, w, h = roi
+            self._rect = QRect(
+                round(x * self.width()), round(y * self.height()),
+                round(w * self.width()), round(h * self.height())
+            )
+
+    def roi(self):
+        """
+        (x, y, width, height) as fractions of the frame, or None.
+        """
+        rect = self._rect.normalized().intersected(self.rect())
+        if rect.width() < 4 or rect.height() < 4:
+            return None
+        return (
+            rect.x() / self.width(), rect.y() / self.height(),
+            rect.width() / self.width(), rect.height() / self.height(),
+        )
+
+    def clear(self):
+        self._rect = QRect()
+        self.update()
+
+    def mousePressEvent(self, event):
+        self._origin = event.position().toPoint()
+        self._rect = QRect(self._origin, self._origin)
+        self.update()
+
+    def mouseMoveEvent(self, event):
+        if self._origin is not None:
+            self._rect = QRect(self._origin, event.position().toPoint())
+            self.update()
+
+    def mouseReleaseEvent(self, event):
+        self._origin = None
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        rect = self._rect.normalized()
+        if rect.isEmpty():
+            return
+
+        painter = QPainter(self)
+        shade = QColor(0, 0, 0, 120)
+        # Darken everything outside the ROI
+        painter.fillRect(0, 0, self.width(), rect.top(), shade)
+        painter.fillRect(0, rect.bottom() + 1, self.width(),
+                         self.height() - rect.bottom() - 1, shade)
+        painter.fillRect(0, rect.top(), rect.left(), rect.height(), shade)
+        painter.fillRect(rect.right() + 1, rect.top(),
+                         self.width() - rect.right() - 1, rect.height(), shade)
+        painter.setPen(QPen(QColor(255, 200, 0), 2))
+        painter.drawRect(rect.adjusted(0, 0, -1, -1))
+        painter.end()
+
+
+class RoiDialog(QDialog):
+    def __init__(self, path, roi=None, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Region of interest")
+
+        layout = QVBoxLayout()
+        layout.addWidget(QLabel(
+            "Drag a rectangle around the region to stack.\n"
+            "Frames are cropped to it, with a margin for alignment."
+        ))
+
+        self.selector = RoiSelector(load_thumbnail(path, ROI_VIEW_SIZE), roi)
+        layout.addWidget(self.selector)
+
+        buttons = QDialogButtonBox(
+            QDialogButtonBox.StandardButton.Ok
+            | QDialogButtonBox.StandardButton.Cancel
+            | QDialogButtonBox.StandardButton.Reset
+        )
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        buttons.button(QDialogButtonBox.StandardButton.Reset).clicked.connect(
+            self.selector.clear
+        )
+        layout.addWidget(buttons)
+
+        self.setLayout(layout)
+
+    def roi(self):
+        return self.selector.roi()
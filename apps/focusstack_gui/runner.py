@@ -6,11 +6,15 @@ Created on Sat Feb 21 21:56:09 2026
 @author: Robert Becht (roblin67@gmail.com)
 """
 
+import functools
+import os
+import re
 import subprocess
-from config import FOCUS_STACK_BIN
+from datetime import datetime
+from binaries import BinaryNotFound, focus_stack, focus_stack_path
 
 def build_command(images, options):
-    cmd = [FOCUS_STACK_BIN]
+    cmd = [focus_stack_path()]
     cmd += images
 
     # Output
@@ -50,10 +54,31 @@ def build_command(images, options):
         cmd.append("--no-opencl")
     if options["verbose"]:
         cmd.append("--verbose")
+    if options.get("wait_images"):
+        cmd.append(f"--wait-images={options['wait_images']}")
 
     return cmd
 
 
+def default_output(images, base_dir, subfolder=True, create=True):
+    """
+    Output path named after the first frame, the frame count and the
+    time, in a dated stack_YYYYMMDD_HHMMSS subfolder of base_dir if
+    subfolder is set (the folder is created if create is set).
+    """
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    if subfolder:
+        base_dir = os.path.join(base_dir, f"stack_{timestamp}")
+        if create:
+            os.makedirs(base_dir, exist_ok=True)
+
+    name = os.path.splitext(os.path.basename(images[0]))[0]
+    name = re.sub(r"[^\w\-]", "_", name)
+    return os.path.join(
+        base_dir, f"{name}_stack_{len(images)}img_{timestamp}.jpg"
+    )
+
+
 def run_process(cmd):
     return subprocess.Popen(
         cmd,
@@ -61,5 +86,35 @@ def run_process(cmd):
         stderr=subprocess.STDOUT,
         universal_newlines=True,
         encoding="utf-8",
-        errors="ignore"
+        errors="ignore",
+        # AppRun and its children share one process group we can signal
+        start_new_session=True
     )
+
+
+@functools.lru_cache(maxsize=None)
+def binary_version(binary=None):
+    """
+    Output of `focus-stack --version`, or the binary's path, mtime and
+    size when the binary cannot report it.
+    """
+    if binary is None:
+        try:
+            return focus_stack().version
+        except BinaryNotFound:
+            binary = focus_stack_path()
+    try:
+        out = subprocess.run(
+            [binary, "--version"], capture_output=True, text=True, timeout=30
+        ).stdout.strip()
+    except (OSError, subprocess.TimeoutExpired):
+        out = ""
+
+    if out:
+        return out
+
+    try:
+        st = os.stat(binary)
+    except OSError:
+        return binary
+    return f"{binary}:{st.st_mtime_ns}:{st.st_size}"
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 24 14:37:12 2026
+
+@author: Robert Becht (roblin67@gmail.com)
+
+Sharpness profile of a stack and frame culling.
+
+Each frame is decoded at reduced size in grayscale and split into a grid
+of tiles. The focus metric of a tile is the variance of its Laplacian.
+Frames without any sharp tile at the ends of the stack are empty, and a
+frame whose neighbours already cover its sharp tiles is redundant.
+
+Profiles are remembered per (path, mtime, size).
+"""
+
+import json
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QImage, QImageReader
+
+try:
+    import numpy as np
+except ImportError:
+    # Pure Python fallback, a few times slower and holding the GIL
+    np = None
+
+from roi import crop_rect
+from config import SHARPNESS_DB
+
+# Long edge of the analysis image, and tiles per side
+SHARPNESS_SIZE = 384
+SHARPNESS_TILES = 8
+
+# A frame is empty when its sharpest tile is below this fraction of the
+# sharpest tile of the stack
+EMPTY_FRACTION = 0.10
+
+# Relative L1 distance of tile profiles below which a frame is redundant
+REDUNDANT_DISTANCE = 0.05
+
+# Threads decoding frames; the metric itself only runs in parallel with
+# numpy, the pure Python fallback is serialized by the GIL
+SHARPNESS_WORKERS = os.cpu_count() or 1
+
+
+def load_gray(path, size=SHARPNESS_SIZE, roi=None):
+    reader = QImageReader(path)
+    reader.setAutoTransform(True)
+    full_size = reader.size()
+    if full_size.isValid():
+        reader.setScaledSize(
+            full_size.scaled(size, size, Qt.AspectRatioMode.KeepAspectRatio)
+        )
+
+    image = reader.read()
+    if image.isNull():
+        raise OSError(f"Cannot read {path}: {reader.errorString()}")
+
+    image = image.convertToFormat(QImage.Format.Format_Grayscale8)
+    if roi:
+        image = image.copy(crop_rect(image.width(), image.height(), roi, 0))
+    return image
+
+
+def _rows(image):
+    width, height = image.width(), image.height()
+    stride = image.bytesPerLine()
+    data = image.constBits().asstring(stride * height)
+    return [data[y * stride:y * stride + width] for y in range(height)]
+
+
+def tile_sharpness(image, tiles=SHARPNESS_TILES):
+    """
+    Variance of the Laplacian of each tile, row by row.
+    """
+    width, height = image.width(), image.height()
+    if width < 3 or height < 3:
+        return [0.0] * tiles * tiles
+
+    # Tile edges in Laplacian coordinates (the 1 pixel border is skipped)
+    xs = [round(i * (width - 2) / tiles) for i in range(tiles + 1)]
+    ys = [round(i * (height - 2) / tiles) for i in range(tiles + 1)]
+
+    if np is not None:
+        stride = image.bytesPerLine()
+        data = np.frombuffer(
+            image.constBits().asstring(stride * height), dtype=np.uint8
+        ).reshape(height, stride)[:, :width].astype(np.float32)
+        lap = (
+            data[1:-1, :-2] + data[1:-1, 2:] + data[:-2, 1:-1]
+            + data[2:, 1:-1] - 4 * data[1:-1, 1:-1]
+        )
+        return [
+            float(lap[ys[j]:ys[j + 1], xs[i]:xs[i + 1]].var())
+            if ys[j + 1] > ys[j] and xs[i + 1] > xs[i] else 0.0
+            for j in range(tiles) for i in range(tiles)
+        ]
+
+    rows = _rows(image)
+    sums = [0.0] * tiles * tiles
+    squares = [0.0] * tiles * tiles
+    counts = [0] * tiles * tiles
+
+    for y in range(height - 2):
+        up, row, down = rows[y], rows[y + 1], rows[y + 2]
+        lap = [
+            w + e + n + s - 4 * c
+            for w, e, n, s, c in zip(
+                row[:-2], row[2:], up[1:-1], down[1:-1], row[1:-1]
+            )
+        ]
+        j = min(tiles - 1, sum(1 for edge in ys[1:-1] if y >= edge))
+        for i in range(tiles):
+            part = lap[xs[i]:xs[i + 1]]
+            index = j * tiles + i
+            sums[index] += sum(part)
+            squares[index] += sum(v * v for v in part)
+            counts[index] += len(part)
+
+    return [
+        squares[k] / counts[k] - (sums[k] / counts[k]) ** 2 if counts[k] else 0.0
+        for k in range(tiles * tiles)
+    ]
+
+
+def frame_scores(profiles):
+    """
+    One sharpness value per frame: the mean over its tiles.
+    """
+    return [sum(p) / len(p) if p else 0.0 for p in profiles]
+
+
+def _distance(a, b):
+    total = sum(max(x, y) for x, y in zip(a, b))
+    if total <= 0:
+        return 0.0
+    return sum(abs(x - y) for x, y in zip(a, b)) / total
+
+
+def suggest_culling(profiles, empty_fraction=EMPTY_FRACTION,
+                    redundant_distance=REDUNDANT_DISTANCE):
+    """
+    Returns (empty, redundant) sorted frame indices.
+
+    Empty frames are only taken from both ends of the stack, one frame
+    next to the first and last useful frames is kept. A frame is
+    redundant when it, or the next frame, differs from the last kept
+    frame by less than redundant_distance: it adds no focus information.
+    """
+    count = len(profiles)
+    if count < 3:
+        return [], []
+
+    peak = max((max(p) for p in profiles if p), default=0.0)
+    if peak <= 0:
+        return [], []
+    useful = [bool(p) and max(p) >= empty_fraction * peak for p in profiles]
+    if not any(useful):
+        return [], []
+
+    first = max(0, useful.index(True) - 1)
+    last = min(count - 1, count - 1 - useful[::-1].index(True) + 1)
+    empty = list(range(first)) + list(range(last + 1, count))
+
+    redundant = []
+    kept = first
+    for i in range(first + 1, last):
+        if min(
+            _distance(profiles[kept], profiles[i]),
+            _distance(profiles[kept], profiles[i + 1]),
+        ) < redundant_distance:
+            redundant.append(i)
+        else:
+            kept = i
+
+    return empty, redundant
+
+
+class SharpnessIndex:
+    """
+    Tile profiles per (path, mtime, size, analysis region), computed for
+    the frames that are not known yet. Frames are decoded in parallel;
+    without numpy the metric is computed one frame at a time.
+    """
+
+    def __init__(self, path=SHARPNESS_DB):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS profiles ("
+                "path TEXT, mtime_ns INTEGER, size INTEGER, region TEXT, "
+                "profile TEXT, PRIMARY KEY (path, region))"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def profiles(self, paths, roi=None, cancelled=lambda: False):
+        """
+        Tile profiles of paths in the same order, or None if cancelled.
+        """
+        region = json.dumps(
+            [SHARPNESS_SIZE, SHARPNESS_TILES, list(roi) if roi else None]
+        )
+        paths = [os.path.abspath(p) for p in paths]
+        stats = {p: os.stat(p) for p in set(paths)}
+
+        known = {}
+        with self._connect() as db:
+            for path, st in stats.items():
+                row = db.execute(
+                    "SELECT mtime_ns, size, profile FROM profiles "
+                    "WHERE path = ? AND region = ?", (path, region)
+                ).fetchone()
+                if row and row[0] == st.st_mtime_ns and row[1] == st.st_size:
+                    known[path] = json.loads(row[2])
+
+        def analyze(path):
+            if cancelled():
+                return None
+            return tile_sharpness(load_gray(path, roi=roi))
+
+        missing = [p for p in stats if p not in known]
+        if missing:
+            with ThreadPoolExecutor(SHARPNESS_WORKERS) as pool:
+                for path, profile in zip(missing, pool.map(analyze, missing)):
+                    known[path] = profile
+            if cancelled():
+                return None
+
+            with self._connect() as db:
+                db.executemany(
+                    "INSERT OR REPLACE INTO profiles VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (p, stats[p].st_mtime_ns, stats[p].st_size, region,
+                         json.dumps(known[p]))
+                        for p in missing
+                    ],
+                )
+
+        return [known[p] for p in paths]
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 24 16:05:41 2026
+
+@author: Robert Becht (roblin67@gmail.com)
+"""
+
+from PyQt6.QtCore import QPointF, Qt
+from PyQt6.QtGui import QColor, QPainter, QPen, QPolygonF
+from PyQt6.QtWidgets import QWidget
+
+EMPTY_COLOR = QColor(150, 150, 150)
+REDUNDANT_COLOR = QColor(220, 60, 40)
+CURVE_COLOR = QColor(40, 120, 220)
+
+
+class SharpnessPlot(QWidget):
+    """
+    Sharpness of each frame along the stack, with the frames suggested
+    for removal marked: grey for empty, red for redundant.
+    """
+
+    MARGIN = 6
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setMinimumHeight(90)
+        self.scores = []
+        self.empty = set()
+        self.redundant = set()
+
+    def set_profile(self, scores, empty=(), redundant=()):
+        self.scores = list(scores)
+        self.empty = set(empty)
+        self.redundant = set(redundant)
+        self.setToolTip(
+            f"{len(self.scores)} frames, {len(self.empty)} empty (grey), "
+            f"{len(self.redundant)} redundant (red)"
+            if self.scores else ""
+        )
+        self.update()
+
+    def clear(self):
+        self.set_profile([])
+
+    def _point(self, index, score, peak):
+        m = self.MARGIN
+        width = self.width() - 2 * m
+        height = self.height() - 2 * m
+        x = m + width * index / max(1, len(self.scores) - 1)
+        y = m + height * (1 - score / peak)
+        return QPointF(x, y)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), self.palette().base())
+        peak = max(self.scores, default=0.0)
+        if peak <= 0:
+            painter.end()
+            return
+
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        points = [self._point(i, s, peak) for i, s in enumerate(self.scores)]
+        painter.setPen(QPen(CURVE_COLOR, 1.5))
+        painter.drawPolyline(QPolygonF(points))
+
+        painter.setPen(Qt.PenStyle.NoPen)
+        for indices, color in (
+            (self.empty, EMPTY_COLOR), (self.redundant, REDUNDANT_COLOR)
+        ):
+            painter.setBrush(color)
+            for i in indices:
+                painter.drawEllipse(points[i], 3, 3)
+        painter.end()
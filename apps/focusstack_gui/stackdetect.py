@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 25 10:12:36 2026
+
+@author: Robert Becht (roblin67@gmail.com)
+
+Automatic stack detection in capture folders.
+
+Only the EXIF metadata of the frames is read, and it is remembered per
+(path, mtime, size), so scanning a folder again only reads the new and
+changed files. Frames are ordered by capture time and split into
+stacks at pauses, size or exposure changes and where the focus distance
+jumps back against the direction of the bracket.
+Does not import Qt.
+"""
+
+import math
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+from imageinfo import CaptureInfo, IMAGE_EXTENSIONS, read_capture_info
+from config import CAPTURE_DB, STACK_GAP_SECONDS
+
+STACK_MIN_FRAMES = 3
+
+# Exposure difference (EV) that separates two stacks
+EXPOSURE_TOLERANCE_EV = 0.5
+
+# A focus step against the bracket direction larger than this fraction
+# of the focus range covered so far starts a new stack
+FOCUS_REVERSAL = 0.25
+
+CAPTURE_WORKERS = 8
+
+
+class CaptureIndex:
+    """
+    CaptureInfo of the images of scanned folders.
+    """
+
+    def __init__(self, path=CAPTURE_DB):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS captures ("
+                "path TEXT PRIMARY KEY, folder TEXT, mtime_ns INTEGER, "
+                "size INTEGER, time REAL, focus_distance REAL, exposure REAL, "
+                "fnumber REAL, iso INTEGER, width INTEGER, height INTEGER)"
+            )
+            db.execute(
+                "CREATE INDEX IF NOT EXISTS captures_folder "
+                "ON captures (folder)"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def scan(self, folder, cancelled=lambda: False):
+        """
+        (path, CaptureInfo) of the readable images of folder, or None if
+        cancelled. Frames without a capture time get their file mtime.
+        """
+        folder = os.path.abspath(folder)
+        stats = {}
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if entry.name.lower().endswith(IMAGE_EXTENSIONS) \
+                        and entry.is_file():
+                    stats[entry.path] = entry.stat()
+
+        with self._connect() as db:
+            rows = db.execute(
+                "SELECT path, mtime_ns, size, time, focus_distance, exposure, "
+                "fnumber, iso, width, height FROM captures WHERE folder = ?",
+                (folder,)
+            ).fetchall()
+
+        known = {}
+        for path, mtime_ns, size, *fields in rows:
+            st = stats.get(path)
+            if st and st.st_mtime_ns == mtime_ns and st.st_size == size:
+                known[path] = CaptureInfo(*fields)
+        gone = [row[0] for row in rows if row[0] not in stats]
+
+        def read(path):
+            if cancelled():
+                return None
+            try:
+                info = read_capture_info(path)
+            except (OSError, ValueError):
+                # Remembered as unreadable, with no size
+                return CaptureInfo(*[None] * len(CaptureInfo._fields))
+            if info.time is None:
+                info = info._replace(time=stats[path].st_mtime)
+            return info
+
+        missing = sorted(p for p in stats if p not in known)
+        if missing:
+            with ThreadPoolExecutor(CAPTURE_WORKERS) as pool:
+                for path, info in zip(missing, pool.map(read, missing)):
+                    known[path] = info
+            if cancelled():
+                return None
+
+        if missing or gone:
+            with self._connect() as db:
+                db.executemany(
+                    "DELETE FROM captures WHERE path = ?",
+                    [(p,) for p in gone]
+                )
+                db.executemany(
+                    "INSERT OR REPLACE INTO captures VALUES "
+                    "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (p, folder, stats[p].st_mtime_ns, stats[p].st_size)
+                        + tuple(known[p])
+                        for p in missing
+                    ],
+                )
+
+        return [
+            (path, info) for path, info in sorted(known.items())
+            if info.width
+        ]
+
+
+def exposure_value(info):
+    """
+    Relative exposure in EV, or None when a setting is unknown.
+    """
+    if not (info.exposure and info.fnumber and info.iso):
+        return None
+    return math.log2(info.exposure * info.iso / info.fnumber ** 2)
+
+
+def _focus_reversed(stack, info):
+    distances = [i.focus_distance for _, i in stack
+                 if i.focus_distance is not None]
+    if info.focus_distance is None or len(distances) < 2:
+        return False
+
+    direction = distances[-1] - distances[0]
+    step = info.focus_distance - distances[-1]
+    span = max(distances) - min(distances)
+    return direction * step < 0 and abs(step) > FOCUS_REVERSAL * span
+
+
+def _starts_stack(stack, info, max_gap):
+    last = stack[-1][1]
+    if info.time - last.time > max_gap:
+        return True
+    if (info.width, info.height) != (last.width, last.height):
+        return True
+
+    ev, last_ev = exposure_value(info), exposure_value(last)
+    if ev is not None and last_ev is not None \
+            and abs(ev - last_ev) > EXPOSURE_TOLERANCE_EV:
+        return True
+
+    return _focus_reversed(stack, info)
+
+
+def split_stacks(captures, max_gap=STACK_GAP_SECONDS,
+                 min_frames=STACK_MIN_FRAMES):
+    """
+    Candidate stacks, lists of (path, CaptureInfo) in capture order.
+    Runs of fewer than min_frames frames are left out.
+    """
+    stacks = []
+    stack = []
+    for path, info in sorted(captures, key=lambda c: (c[1].time, c[0])):
+        if stack and _starts_stack(stack, info, max_gap):
+            stacks.append(stack)
+            stack = []
+        stack.append((path, info))
+    if stack:
+        stacks.append(stack)
+
+    return [s for s in stacks if len(s) >= min_frames]
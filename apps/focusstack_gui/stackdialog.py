@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 25 11:40:02 2026
+
+@author: Robert Becht (roblin67@gmail.com)
+"""
+
+import os
+from datetime import datetime
+
+from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import (
+    QAbstractItemView, QDialog, QDialogButtonBox, QDoubleSpinBox, QFormLayout,
+    QHeaderView, QLabel, QTableWidget, QTableWidgetItem, QVBoxLayout
+)
+
+from stackdetect import split_stacks
+from config import STACK_GAP_SECONDS
+
+
+def _focus_range(stack):
+    distances = [i.focus_distance for _, i in stack
+                 if i.focus_distance is not None]
+    if not distances:
+        return "unknown"
+    return f"{distances[0]:.3g} → {distances[-1]:.3g} m"
+
+
+class StackDialog(QDialog):
+    """
+    Candidate stacks found in a folder, the checked ones are queued.
+    """
+
+    def __init__(self, folder, captures, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Detected stacks")
+        self.resize(800, 500)
+        self.captures = captures
+        self.stacks = []
+
+        layout = QVBoxLayout()
+        layout.addWidget(QLabel(f"{len(captures)} frames in {folder}"))
+
+        form = QFormLayout()
+        self.max_gap = QDoubleSpinBox()
+        self.max_gap.setRange(0.5, 3600)
+        self.max_gap.setSuffix(" s")
+        self.max_gap.setValue(STACK_GAP_SECONDS)
+        self.max_gap.setToolTip(
+            "A longer pause between two frames starts a new stack\n"
+            "Stacks are also split at size or exposure changes and\n"
+            "where the focus distance jumps back"
+        )
+        self.max_gap.valueChanged.connect(self._split)
+        form.addRow("Pause between stacks", self.max_gap)
+        layout.addLayout(form)
+
+        self.table = QTableWidget(0, 5)
+        self.table.setHorizontalHeaderLabels(
+            ["Stack", "Frames", "Captured", "Focus distance", "Size"]
+        )
+        self.table.horizontalHeader().setSectionResizeMode(
+            0, QHeaderView.ResizeMode.Stretch
+        )
+        self.table.setSelectionBehavior(
+            QAbstractItemView.SelectionBehavior.SelectRows
+        )
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        layout.addWidget(self.table)
+
+        buttons = QDialogButtonBox(
+            QDialogButtonBox.StandardButton.Ok
+            | QDialogButtonBox.StandardButton.Cancel
+        )
+        buttons.button(QDialogButtonBox.StandardButton.Ok).setText(
+            "Add to queue"
+        )
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+        self.setLayout(layout)
+        self._split()
+
+    def _split(self):
+        self.stacks = split_stacks(self.captures, self.max_gap.value())
+        self.table.setRowCount(len(self.stacks))
+
+        for row, stack in enumerate(self.stacks):
+            first, info = stack[0]
+            last = stack[-1][0]
+            name = QTableWidgetItem(
+                f"{os.path.basename(first)} … {os.path.basename(last)}"
+            )
+            name.setFlags(name.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+            name.setCheckState(Qt.CheckState.Checked)
+            name.setToolTip(os.path.dirname(first))
+
+            for column, item in enumerate((
+                name,
+                QTableWidgetItem(str(len(stack))),
+                QTableWidgetItem(
+                    datetime.fromtimestamp(info.time).strftime("%H:%M:%S")
+                ),
+                QTableWidgetItem(_focus_range(stack)),
+                QTableWidgetItem(f"{info.width}x{info.height}"),
+            )):
+                self.table.setItem(row, column, item)
+
+    def selected_stacks(self):
+        """
+        Paths of the checked stacks, in capture order.
+        """
+        return [
+            [path for path, _ in stack]
+            for row, stack in enumerate(self.stacks)
+            if self.table.item(row, 0).checkState() == Qt.CheckState.Checked
+        ]
@@ -0,0 +1,783 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 25 15:18:44 2026
+
+@author: Robert Becht (roblin67@gmail.com)
+
+One stacking job: preprocessing, caches, sub-stacks, alignment stage and
+the supervised focus-stack processes, reported through callbacks.
+Shared by the GUI worker thread and the headless command line.
+
+Does not import Qt. The frame preprocessing steps that decode pixels
+(options "roi", "proxy_size" and "cull") import it when they are used.
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+
+from runner import build_command
+from binaries import BinaryNotFound, focus_stack
+from supervisor import (
+    ProcessSupervisor, STATUS_OK, STATUS_FAILED, STATUS_CANCELLED
+)
+from priority import (
+    PRIORITY_NORMAL, apply_priority, ionice_group, preemption
+)
+from logsink import LogSink, job_log_path
+from progress import (
+    Calibration, ProgressParser, estimate_remaining, format_duration
+)
+from imageinfo import probe_image
+from telemetry import ProcessSampler
+from history import RunHistory
+from resultcache import ResultCache, output_files
+from alignstage import AlignmentCache, can_stage, merge_options
+from substack import (
+    SLAB_OVERLAP, SlabRunner, auto_slab_size, content_slabs, plan_slabs,
+    slab_parallelism
+)
+from preflight import available_memory
+from groupcache import GroupCache
+from hashing import FileHashIndex
+from staging import ScratchFull, publisher, scratch
+from config import JOB_TIMEOUT, JOB_IDLE_TIMEOUT, INCREMENTAL_GROUP_FRAMES
+
+# Share of the alignment stage in the progress of a two-stage run
+ALIGN_SHARE = 0.5
+# Share of the slabs in the progress of a sub-stack run
+SLABS_SHARE = 0.85
+# Options of _preprocess that change the frames stacked; they decode the
+# frames with Qt
+PREPROCESS_OPTIONS = ("cull", "roi", "proxy_size")
+
+
+def _ignore(*args):
+    pass
+
+
+class StackJob:
+    """
+    Callbacks, called from the thread that runs the job:
+
+    on_output(text): blocks of one or more log lines
+    on_progress(percent)
+    on_status(text): stage, frames and ETA, about once per second
+    on_finished(exit code, supervisor status: ok / failed / cancelled /
+                timeout / stalled)
+    on_recorded(run id in the history database)
+    on_published(None, or the error text): the result of a successful run
+                 with the option "scratch" is in the output folder,
+                 called from the publishing thread after on_finished, or
+                 before it when the result was written in place
+    """
+
+    def __init__(self, images, options, priority=PRIORITY_NORMAL,
+                 on_output=_ignore, on_progress=_ignore, on_status=_ignore,
+                 on_finished=_ignore, on_recorded=_ignore,
+                 on_published=_ignore):
+        self.images = images
+        self.options = options
+        # Frames and options as given, with the output folder of the results
+        self.inputs = images
+        self.final_options = options
+        self.priority = priority
+        self.on_progress = on_progress
+        self.on_status = on_status
+        self.on_finished = on_finished
+        self.on_recorded = on_recorded
+        self.on_output = on_output
+        self.on_published = on_published
+
+        self.log = LogSink(on_output, job_log_path(options["output"]))
+
+        self.parser = ProgressParser(len(images))
+        self.calibration = Calibration()
+        self.info = self._probe()
+        self.megapixels = None
+        if self.info:
+            self.megapixels = self.info.width * self.info.height / 1e6
+        self.prior = None
+        if self.megapixels:
+            self.prior = self.calibration.estimate(
+                options, len(images), self.megapixels
+            )
+        self._started = None
+        self._last_status = 0.0
+
+        self.sampler = None
+        self.stages = []
+
+        # Runs waiting for frames being captured (watchfolder.py) last as
+        # long as the capture: no calibration, no run history
+        self.streaming = bool(options.get("wait_images"))
+        # Options the run duration is calibrated for
+        self.timing_options = None if self.streaming else options
+        # (start, width) of the running process in the overall progress
+        self._span = (0.0, 1.0)
+        self._paused = 0.0
+        self._cancelled = False
+        self._last_progress = -1
+
+        self.slabs = None
+        self.slab_parallel = 1
+        self.slab_runner = None
+
+        # Staged frames, and {scratch path: output path} of the results
+        self.staged = None
+        self.scratch_dir = None
+        # (builder, frames) of the cropped and scaled frames, pinned
+        self.derived = []
+        self.targets = None
+
+        self.supervisor = self._supervisor(build_command(images, options))
+
+    def _supervisor(self, cmd):
+        return ProcessSupervisor(
+            cmd,
+            on_line=self._on_line,
+            on_tick=self._on_tick,
+            timeout=self.options.get("timeout", JOB_TIMEOUT),
+            idle_timeout=self.options.get("idle_timeout", JOB_IDLE_TIMEOUT),
+        )
+
+    def run(self):
+        self.log.write(f"Full log: {self.log.log_path}")
+        if self.prior:
+            self.log.write(f"Estimated duration: {format_duration(self.prior)}")
+
+        try:
+            focus_stack()
+        except BinaryNotFound as e:
+            self.log.write(str(e))
+            self._end(STATUS_FAILED)
+            return
+
+        # Before staging and culling read the frames
+        input_key = self._input_key(indexed_only=True)
+        if input_key and self._restore(input_key):
+            return
+
+        if not self._preprocess():
+            return
+        self._plan_substacks()
+
+        cache_key = self._cache_key()
+        if cache_key and cache_key != input_key and self._restore(cache_key):
+            return
+
+        started_at = datetime.now()
+        self._started = time.monotonic()
+        result = self._run_stages()
+        result = result._replace(duration=self._elapsed())
+
+        self._close_stage()
+        if self.sampler is not None and not self.streaming:
+            self._record(started_at, result)
+
+        if result.status == STATUS_OK and self.megapixels and self.timing_options:
+            self.calibration.record(
+                self.timing_options, len(self.images), self.megapixels,
+                result.duration - self._paused_time()
+            )
+        if result.status == STATUS_OK and cache_key:
+            try:
+                ResultCache().store(cache_key, self.options)
+                input_key = self._input_key()
+                if input_key and input_key != cache_key:
+                    ResultCache().alias(input_key, cache_key)
+            except (sqlite3.Error, OSError) as e:
+                self.log.write(f"Could not cache the result: {e}")
+
+        if result.returncode is not None:
+            self.log.write(
+                f"focus-stack exited with code {result.returncode} "
+                f"({result.status}) after {result.duration:.1f} s"
+            )
+        self.log.close()
+        self._publish(result.status)
+
+        returncode = -1 if result.returncode is None else result.returncode
+        self.on_finished(returncode, result.status)
+
+    def _preprocess(self):
+        """
+        Stage the frames on the scratch area (options["scratch"]), drop
+        empty and redundant frames (options["cull"]), crop the frames to
+        options["roi"] and / or scale them down to options["proxy_size"]
+        (preview) before the run.
+        Returns False if the run ended here.
+        """
+        frames = self.images
+        options = self.options
+        if self.options.get("scratch"):
+            frames = self._stage(frames)
+            if frames is None:
+                return self._end(STATUS_CANCELLED)
+        if self.options.get("cull"):
+            frames = self._cull(frames)
+            if frames is None:
+                return self._end(STATUS_CANCELLED)
+
+        steps = []
+        roi = self.options.get("roi")
+        if roi:
+            from roi import CropBuilder, format_roi
+            steps.append((
+                f"Cropping {len(frames)} frames to {format_roi(roi)}",
+                CropBuilder(roi),
+            ))
+        size = self.options.get("proxy_size")
+        if size:
+            from proxies import ProxyBuilder
+            steps.append((
+                f"Preview: scaling {len(frames)} frames to {size} px",
+                ProxyBuilder(size),
+            ))
+
+        for message, builder in steps:
+            self.log.write(message)
+            try:
+                frames = builder.build(frames, lambda: self._cancelled)
+            except (sqlite3.Error, OSError) as e:
+                self.log.write(f"Could not prepare the frames: {e}")
+                return self._end(STATUS_FAILED)
+            if frames is None:
+                return self._end(STATUS_CANCELLED)
+            self.derived.append((builder, frames))
+
+        if frames is self.images and self.options is options:
+            return True
+
+        self.images = frames
+        self.parser = ProgressParser(len(frames))
+        self.info = self._probe()
+        if self.info:
+            self.megapixels = self.info.width * self.info.height / 1e6
+            self.prior = self.calibration.estimate(
+                self.options, len(frames), self.megapixels
+            )
+        self.supervisor.close()
+        self.supervisor = self._supervisor(build_command(frames, self.options))
+        return True
+
+    def _stage(self, frames):
+        """
+        Point the outputs to the scratch area and copy the frames there.
+        Returns the frames to use, or None if cancelled.
+        """
+        try:
+            self.scratch_dir = scratch.output_dir()
+        except OSError as e:
+            self.log.write(f"Scratch area unavailable: {e}")
+            return frames
+        self.targets = {
+            os.path.join(self.scratch_dir, os.path.basename(path)): path
+            for path in output_files(self.options).values()
+        }
+        local = {path: local for local, path in self.targets.items()}
+        self.options = dict(
+            self.options, output=local[self.options["output"]]
+        )
+        if self.options["depthmap"]:
+            depthmap = os.path.abspath(self.options["depthmap_file"])
+            self.options["depthmap_file"] = local[depthmap]
+
+        self.log.write(f"Staging {len(frames)} frames in {scratch.root}")
+        try:
+            self.staged = scratch.stage(frames, lambda: self._cancelled)
+        except ScratchFull as e:
+            self.log.write(f"Frames read in place: {e}")
+            return frames
+        except (sqlite3.Error, OSError) as e:
+            self.log.write(f"Could not stage the frames, read in place: {e}")
+            return frames
+        return self.staged
+
+    def _publish(self, status):
+        """
+        Release the staged and derived frames and, if the run succeeded,
+        copy its results from the scratch area to the output folder in
+        the background.
+        """
+        if self.staged:
+            scratch.release(self.staged)
+            self.staged = None
+        for builder, frames in self.derived:
+            builder.release(frames)
+        self.derived = []
+        if self.scratch_dir is None:
+            if status == STATUS_OK and self.final_options.get("scratch"):
+                self.on_published(None)
+            return
+        if status == STATUS_OK:
+            publisher.publish(self.targets, self.scratch_dir, self._published)
+        else:
+            shutil.rmtree(self.scratch_dir, ignore_errors=True)
+        self.scratch_dir = None
+
+    def _published(self, error):
+        if error:
+            self.on_output(f"Could not publish the result: {error}")
+        else:
+            self.on_output(
+                f"Result published to {self.final_options['output']}"
+            )
+        self.on_published(error)
+
+    def _cull(self, frames):
+        """
+        frames without the empty and redundant ones of the sharpness
+        profile, or None if cancelled.
+        """
+        from sharpness import SharpnessIndex, suggest_culling
+
+        self.log.write(f"Analyzing the sharpness of {len(frames)} frames")
+        try:
+            profiles = SharpnessIndex().profiles(
+                frames, self.options.get("roi"), lambda: self._cancelled
+            )
+        except (sqlite3.Error, OSError) as e:
+            self.log.write(f"Sharpness analysis failed, no culling: {e}")
+            return frames
+        if profiles is None:
+            return None
+
+        empty, redundant = suggest_culling(profiles)
+        if not empty and not redundant:
+            return frames
+
+        self.log.write(
+            f"Culling: {len(empty)} empty and {len(redundant)} redundant "
+            f"frames dropped, {len(frames) - len(empty) - len(redundant)} left"
+        )
+        dropped = set(empty) | set(redundant)
+        return [p for i, p in enumerate(frames) if i not in dropped]
+
+    def _plan_substacks(self):
+        """
+        Split the frames into overlapping slabs when options["substacks"]
+        or options["incremental"] is set. slab_size 0 picks the size
+        from the cores and memory. Incremental runs cut the slabs at
+        content-defined points.
+        """
+        incremental = self.options.get("incremental")
+        if not (self.options.get("substacks") or incremental):
+            return
+        if self.options["depthmap"] or self.options["align_only"]:
+            self.log.write(
+                "Sub-stacks are not used for depthmap or align-only runs"
+            )
+            return
+
+        overlap = self.options.get("slab_overlap", SLAB_OVERLAP)
+        budget = available_memory()
+        size = self.options.get("slab_size") or auto_slab_size(
+            self.info, len(self.images), self.options, budget, overlap
+        )
+
+        if incremental:
+            # Group boundaries must not depend on the frame count
+            size = self.options.get("slab_size") or INCREMENTAL_GROUP_FRAMES
+            try:
+                digests = FileHashIndex().digests(self.images)
+            except (sqlite3.Error, OSError) as e:
+                self.log.write(f"Incremental restacking unavailable: {e}")
+                return
+            slabs = content_slabs(digests, size, overlap)
+        else:
+            slabs = plan_slabs(len(self.images), size, overlap)
+
+        if len(slabs) < 2:
+            self.log.write("Stack too small for sub-stacks, stacking in one pass")
+            return
+
+        self.slabs = slabs
+        self.slab_parallel = slab_parallelism(
+            self.info, size, self.options, budget
+        )
+        # Not comparable with single pass durations
+        self.timing_options = None
+
+    def _cached_groups(self):
+        """
+        (keys, stacked results or None) of the slabs of an incremental
+        run.
+        """
+        count = len(self.slabs)
+        if not self.options.get("incremental"):
+            return [None] * count, [None] * count
+
+        try:
+            cache = GroupCache()
+            keys = [
+                cache.key(self.images[start:end], self.options)
+                for start, end in self.slabs
+            ]
+            results = [cache.get(key) for key in keys]
+        except (sqlite3.Error, OSError) as e:
+            self.log.write(f"Group cache unavailable: {e}")
+            return [None] * count, [None] * count
+
+        reused = count - results.count(None)
+        self.log.write(
+            f"Incremental: {reused} of {count} frame groups unchanged, "
+            f"stacking {count - reused}"
+        )
+        return keys, results
+
+    def _run_substacks(self):
+        """
+        Stack the slabs concurrently, then stack their results.
+        """
+        keys, results = self._cached_groups()
+        todo = [i for i, path in enumerate(results) if path is None]
+
+        output_dir = os.path.dirname(os.path.abspath(self.options["output"]))
+        os.makedirs(output_dir, exist_ok=True)
+        work_dir = tempfile.mkdtemp(prefix=".substacks-", dir=output_dir)
+
+        try:
+            share = 0.0
+            if todo:
+                share = SLABS_SHARE * len(todo) / len(self.slabs)
+                result, outputs = self._run_slabs(work_dir, todo, share)
+                if result.status != STATUS_OK:
+                    return result
+                for i, path in zip(todo, outputs):
+                    results[i] = self._store_group(keys[i], path)
+
+            self.log.write(f"Final pass over {len(results)} sub-stack results")
+            self._span = (share, 1.0 - share)
+            return self._execute(self._supervisor(
+                build_command(results, self.options)
+            ))
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    def _run_slabs(self, work_dir, indices, share):
+        """
+        Stack the slabs of indices concurrently into work_dir.
+        Returns the RunResult and the paths of the slab results.
+        """
+        runner = SlabRunner(
+            self.images, self.options, [self.slabs[i] for i in indices],
+            self.slab_parallel, work_dir,
+            on_line=lambda index, line: self._on_slab_line(
+                indices[index], line
+            ),
+            on_start=self._on_slab_start,
+            timeout=self.options.get("timeout", JOB_TIMEOUT),
+            idle_timeout=self.options.get("idle_timeout", JOB_IDLE_TIMEOUT),
+        )
+        self.log.write(
+            f"Sub-stacks: {len(runner.slabs)} slabs of up to "
+            f"{max(end - start for start, end in runner.slabs)} frames, "
+            f"{runner.parallel} at a time with "
+            f"{runner.options['threads']} threads each"
+        )
+
+        self._span = (0.0, share)
+        self.slab_runner = runner
+        if self._cancelled:
+            runner.cancel()
+
+        self.stages.append(["Sub-stacks", self._elapsed(), None])
+        preemption.register(self, self.priority)
+        try:
+            result = runner.run(on_tick=self._on_tick)
+        finally:
+            preemption.unregister(self)
+            self._paused += runner.paused_time
+            self.slab_runner = None
+        self._close_stage()
+        return result, runner.outputs
+
+    def _store_group(self, key, path):
+        if key is None:
+            return path
+        try:
+            return GroupCache().put(key, path)
+        except OSError as e:
+            self.log.write(f"Could not cache a frame group: {e}")
+            return path
+
+    def _on_slab_line(self, index, line):
+        self.log.write(f"[slab {index + 1}] {line}")
+        self._emit_progress()
+
+    def _on_slab_start(self, supervisor):
+        if self.sampler is None:
+            self.sampler = ProcessSampler(supervisor.pid)
+        else:
+            self.sampler.watch(supervisor.pid)
+        apply_priority(supervisor.pid, self.priority)
+        if preemption.is_paused(self):
+            self._pause_group(supervisor)
+
+    def _end(self, status):
+        """
+        Finish without running focus-stack.
+        """
+        self.log.close()
+        self._publish(status)
+        self.on_finished(-1, status)
+        return False
+
+    def _run_stages(self):
+        """
+        Run focus-stack, in two stages when the aligned frames can be
+        reused: --align-only into the alignment cache, then --no-align
+        on the cached frames. The merge stage alone runs when the same
+        frames were already aligned with the same options.
+        """
+        if self.slabs:
+            return self._run_substacks()
+
+        if (not self.options.get("reuse_alignment", False)
+                or not can_stage(self.images, self.options)):
+            return self._execute(self.supervisor)
+
+        try:
+            cache = AlignmentCache()
+            key = cache.key(self.images, self.options)
+            frames = cache.frames(key, len(self.images))
+        except (sqlite3.Error, OSError) as e:
+            self.log.write(f"Alignment cache unavailable: {e}")
+            return self._execute(self.supervisor)
+
+        if frames:
+            self.log.write("Reusing the aligned frames of an earlier run")
+            self.timing_options = merge_options(self.options)
+            if self.megapixels:
+                self.prior = self.calibration.estimate(
+                    self.timing_options, len(self.images), self.megapixels
+                )
+        else:
+            self.log.write("Stage 1/2: alignment")
+            work_dir, cmd = cache.stage(self.images, self.options)
+            self._span = (0.0, ALIGN_SHARE)
+            result = self._execute(self._supervisor(cmd))
+            if result.status != STATUS_OK:
+                cache.discard(work_dir)
+                return result
+
+            try:
+                frames = cache.store(key, self.images, work_dir)
+            except OSError as e:
+                self.log.write(f"Could not cache the aligned frames: {e}")
+            self._span = (ALIGN_SHARE, 1.0 - ALIGN_SHARE)
+
+            if not frames:
+                self.log.write("Aligned frames not found, running in one stage")
+                return self._execute(self._supervisor(
+                    build_command(self.images, self.options)
+                ))
+            self.log.write("Stage 2/2: merge")
+
+        return self._execute(self._supervisor(
+            build_command(frames, merge_options(self.options))
+        ))
+
+    def _execute(self, supervisor):
+        """
+        Run one focus-stack process under supervision.
+        """
+        if supervisor is not self.supervisor:
+            self.supervisor.close()
+            self._paused += self.supervisor.paused_time
+            self.supervisor = supervisor
+            self.parser = ProgressParser(len(self.images))
+        if self._cancelled:
+            supervisor.cancel()
+
+        process = supervisor.start()
+        if process is not None:
+            if self.sampler is None:
+                self.sampler = ProcessSampler(process.pid)
+            else:
+                self.sampler.watch(process.pid)
+            apply_priority(process.pid, self.priority)
+            preemption.register(self, self.priority)
+
+        try:
+            return supervisor.run()
+        finally:
+            preemption.unregister(self)
+
+    def _paused_time(self):
+        return self._paused + self.supervisor.paused_time
+
+    def _fraction(self):
+        start, width = self._span
+        runner = self.slab_runner
+        done = runner.fraction if runner else self.parser.fraction
+        return start + width * done
+
+    def _emit_progress(self):
+        progress = int(self._fraction() * 100)
+        if progress != self._last_progress:
+            self._last_progress = progress
+            self.on_progress(progress)
+
+    def _cache_key(self):
+        """
+        Result cache key of this job, or None if caching is off.
+        """
+        if not self.options.get("use_cache", True) or self.options["align_only"]:
+            return None
+        extra = [f"slabs={self.slabs}"] if self.slabs else []
+        try:
+            return ResultCache().key(self.images, self.options, extra)
+        except (sqlite3.Error, OSError) as e:
+            self.log.write(f"Result cache unavailable: {e}")
+            return None
+
+    def _input_key(self, indexed_only=False):
+        """
+        Result cache key of the frames and options as given, before
+        _preprocess, or None if caching is off or the slabs are not
+        planned yet. With indexed_only, also None unless every frame is
+        already hashed.
+        """
+        options = self.final_options
+        if (not options.get("use_cache", True) or options["align_only"]
+                or options.get("substacks") or options.get("incremental")):
+            return None
+        extra = [
+            f"{name}={options[name]}" for name in PREPROCESS_OPTIONS
+            if options.get(name)
+        ]
+        try:
+            return ResultCache().key(
+                self.inputs, options, extra, indexed_only=indexed_only
+            )
+        except (sqlite3.Error, OSError) as e:
+            self.log.write(f"Result cache unavailable: {e}")
+            return None
+
+    def _restore(self, key):
+        try:
+            if not ResultCache().restore(key, self.options):
+                return False
+        except (sqlite3.Error, OSError) as e:
+            self.log.write(f"Could not restore the cached result: {e}")
+            return False
+
+        self.log.write(
+            f"Cache hit: same frames and settings as a previous run, "
+            f"result restored to {self.options['output']}"
+        )
+        self.log.close()
+        self._publish(STATUS_OK)
+        self.on_progress(100)
+        self.on_finished(0, STATUS_OK)
+        return True
+
+    def _on_line(self, line):
+        self.log.write(line)
+        if self.parser.feed(line):
+            self._emit_progress()
+            if not self.stages or self.stages[-1][0] != self.parser.stage:
+                self._close_stage()
+                self.stages.append([self.parser.stage, self._elapsed(), None])
+
+    def _on_tick(self):
+        self.log.tick()
+        if self.sampler is not None:
+            self.sampler.maybe_sample()
+
+        now = time.monotonic()
+        if now - self._last_status >= 1.0:
+            self._last_status = now
+            self.on_status(self.status_text())
+
+    def status_text(self):
+        runner = self.slab_runner
+        if runner:
+            text = f"Sub-stacks {runner.finished}/{len(runner.slabs)}"
+        else:
+            text = self.parser.stage
+            frames = self.parser.stage_frames()
+            if frames:
+                text += f" {frames[0]}/{frames[1]}"
+
+        elapsed = time.monotonic() - self._started - self._paused_time()
+        remaining = estimate_remaining(self._fraction(), elapsed, self.prior)
+        if remaining is not None:
+            text += f"  ETA {format_duration(remaining)}"
+
+        return text
+
+    def _probe(self):
+        try:
+            return probe_image(self.images[0])
+        except (OSError, ValueError, IndexError):
+            return None
+
+    def _elapsed(self):
+        return time.monotonic() - self._started
+
+    def _close_stage(self):
+        if self.stages and self.stages[-1][2] is None:
+            self.stages[-1][2] = self._elapsed()
+
+    def _record(self, started_at, result):
+        try:
+            run_id = RunHistory().record_run(
+                started_at, result.duration, result.status,
+                result.returncode, self.images, self.info, self.final_options,
+                self.sampler.totals(), self.sampler.samples,
+                [tuple(stage) for stage in self.stages],
+            )
+        except (sqlite3.Error, OSError) as e:
+            self.log.write(f"Could not record run history: {e}")
+            return
+        self.on_recorded(run_id)
+
+    def _supervisors(self):
+        runner = self.slab_runner
+        return [self.supervisor] + (runner.active() if runner else [])
+
+    def stop(self):
+        """
+        Cancel the job. Returns within milliseconds, the whole
+        process group is killed by the supervisor thread.
+        """
+        self._cancelled = True
+        runner = self.slab_runner
+        if runner:
+            runner.cancel()
+        self.supervisor.cancel()
+
+    def _pause_group(self, supervisor):
+        pgid = supervisor.pid
+        if pgid is None:
+            return False
+        # Not reniced: a stopped group uses no CPU, and niceness cannot
+        # be lowered back without privileges
+        ionice_group(pgid, 3)
+        supervisor.pause()
+        return True
+
+    def pause(self):
+        """
+        Preempt: give the process groups the idle I/O class and stop them.
+        """
+        paused = [self._pause_group(s) for s in self._supervisors()]
+        if any(paused):
+            self.log.write("Paused for a higher priority job.")
+
+    def resume(self):
+        resumed = False
+        for supervisor in self._supervisors():
+            if supervisor.pid is not None:
+                apply_priority(supervisor.pid, self.priority, resumed=True)
+                supervisor.resume()
+                resumed = True
+        if resumed:
+            self.log.write("Resumed.")
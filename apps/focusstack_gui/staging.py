@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 27 09:26:14 2026
+
+@author: Robert Becht (roblin67@gmail.com)
+
+Scratch-disk staging of input frames and background publishing of
+results, for frames and output folders on network storage.
+
+With the option "scratch", the frames of a job are copied to the scratch
+area (SCRATCH_DIR, a local SSD or tmpfs) before the run, the next queued
+job's frames while the current one runs. Each source file is read once:
+its digest is computed during the copy and remembered for both copies,
+so the caches do not read it again. focus-stack writes its output to
+the scratch area and the publisher copies it to the output folder after
+the job has finished.
+
+Staged frames are kept per (path, mtime, size) with a size cap and LRU
+eviction; the frames of running jobs are pinned (DiskCache.pin), so no
+job of any process sharing the scratch area evicts them.
+Does not import Qt.
+"""
+
+import os
+import queue
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from diskcache import DiskCache
+from hashing import FileHashIndex, combine, copy_file
+from config import SCRATCH_DIR, SCRATCH_MAX_BYTES, SCRATCH_OUTPUT_MAX_AGE
+
+# Parallel copies: network storage needs several reads in flight
+STAGE_WORKERS = 4
+
+
+class ScratchFull(Exception):
+    pass
+
+
+def _ignore(*args):
+    pass
+
+
+class ScratchArea:
+    def __init__(self, root=SCRATCH_DIR, max_bytes=SCRATCH_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.frames = DiskCache(os.path.join(root, "frames"), max_bytes)
+        self.outputs = os.path.join(root, "outputs")
+        self._index = None
+        self._lock = threading.Lock()
+        # Frames being copied, {key: Event set when done}
+        self._copying = {}
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = FileHashIndex()
+        return self._index
+
+    def _key(self, path, st):
+        return combine(
+            "frame", os.path.abspath(path), str(st.st_mtime_ns),
+            str(st.st_size)
+        )
+
+    def stage(self, images, cancelled=lambda: False):
+        """
+        Scratch copies of images in the same order, or None if
+        cancelled. The copies stay pinned until release(copies).
+        Raises ScratchFull when the frames exceed the size cap, OSError.
+        """
+        stats = [os.stat(p) for p in images]
+        keys = [self._key(p, st) for p, st in zip(images, stats)]
+        entries = [self.frames.path(k) for k in keys]
+
+        missing = sum(
+            st.st_size for st, entry in zip(stats, entries)
+            if not os.path.isdir(entry)
+        )
+        total = sum(st.st_size for st in stats)
+        if total > self.max_bytes:
+            raise ScratchFull(
+                f"{total / 2**20:.0f} MB of frames, the scratch area "
+                f"holds {self.max_bytes / 2**20:.0f} MB"
+            )
+        self.frames.pin(entries)
+        self.frames.evict(free=missing)
+
+        copies = [
+            os.path.join(entry, os.path.basename(p))
+            for p, entry in zip(images, entries)
+        ]
+        try:
+            with ThreadPoolExecutor(STAGE_WORKERS) as pool:
+                done = list(pool.map(
+                    lambda args: self._copy(*args, cancelled),
+                    zip(images, keys)
+                ))
+        except (OSError, sqlite3.Error):
+            self.release(copies)
+            raise
+        if cancelled() or not all(done):
+            self.release(copies)
+            return None
+        return copies
+
+    def _copy(self, path, key, cancelled):
+        """
+        Copy path into its entry unless it is there. Returns False if
+        cancelled.
+        """
+        while True:
+            with self._lock:
+                if self.frames.get(key) is not None:
+                    return True
+                if cancelled():
+                    return False
+                event = self._copying.get(key)
+                if event is None:
+                    event = self._copying[key] = threading.Event()
+                    break
+            # Staged by another job or the prefetcher
+            event.wait()
+
+        name = os.path.basename(path)
+        work_dir = self.frames.new_dir()
+        try:
+            digest = copy_file(path, os.path.join(work_dir, name))
+            entry = self.frames.put(
+                key, {name: os.path.join(work_dir, name)},
+                move=True, evict=False
+            )
+            self.index.record({
+                path: digest, os.path.join(entry, name): digest
+            })
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+            with self._lock:
+                self._copying.pop(key).set()
+        return True
+
+    def release(self, copies):
+        self.frames.unpin(os.path.dirname(p) for p in copies)
+
+    def output_dir(self):
+        """
+        New directory for the outputs of a run. Outputs left over from
+        failed publishing are removed after SCRATCH_OUTPUT_MAX_AGE.
+        """
+        os.makedirs(self.outputs, exist_ok=True)
+        limit = time.time() - SCRATCH_OUTPUT_MAX_AGE
+        for entry in os.scandir(self.outputs):
+            try:
+                if entry.stat().st_mtime < limit:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+            except OSError:
+                pass
+        return tempfile.mkdtemp(dir=self.outputs)
+
+
+class Publisher:
+    """
+    Copies results from the scratch area to their output folder, one at
+    a time in a background thread.
+    """
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def publish(self, files, scratch_dir, on_done=_ignore):
+        """
+        Copy files ({scratch path: output path}), then remove scratch_dir.
+        on_done(error) is called from the publishing thread, with None or
+        the error text. On error the results stay in scratch_dir.
+        """
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        self.queue.put((files, scratch_dir, on_done))
+
+    def _run(self):
+        while True:
+            files, scratch_dir, on_done = self.queue.get()
+            error = None
+            for src, dst in files.items():
+                try:
+                    os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+                    # Complete files only under the output name
+                    part = f"{dst}.part"
+                    shutil.copyfile(src, part)
+                    os.replace(part, dst)
+                except OSError as e:
+                    error = f"{dst}: {e}, the result is kept in {scratch_dir}"
+                    break
+            if error is None:
+                shutil.rmtree(scratch_dir, ignore_errors=True)
+            try:
+                on_done(error)
+            except Exception:
+                # Keep publishing the next results
+                traceback.print_exc()
+            finally:
+                self.queue.task_done()
+
+    @property
+    def pending(self):
+        """
+        True while results are queued or being copied.
+        """
+        return self.queue.unfinished_tasks > 0
+
+    def wait(self):
+        """
+        Return when every result submitted so far is published.
+        """
+        self.queue.join()
+
+
+class Prefetcher:
+    """
+    Stages the frames of the next job in a background thread. A request
+    replaces the one not yet started.
+    """
+
+    def __init__(self, area):
+        self.area = area
+        self._next = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def prefetch(self, images):
+        with self._lock:
+            self._next = list(images)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                images, self._next = self._next, None
+                if images is None:
+                    self._thread = None
+                    return
+            try:
+                copies = self.area.stage(images)
+            except (ScratchFull, OSError, sqlite3.Error):
+                continue
+            # Unpinned: the job pins them again when it starts
+            self.area.release(copies)
+
+
+scratch = ScratchArea()
+publisher = Publisher()
+prefetcher = Prefetcher(scratch)
+
+
+def prefetch_next(job_queue):
+    """
+    Stage the frames of the next pending job that uses the scratch area.
+    """
+    for job in job_queue.pending():
+        if job.options.get("scratch"):
+            prefetcher.prefetch(job.images)
+            return
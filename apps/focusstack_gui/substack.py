@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Fri Oct 23 14:26:55 2026
+
+@author: Robert Becht (roblin67@gmail.com)
+
+Sub-stack mode for very deep stacks: the ordered frames are split into
+overlapping slabs, the slabs are stacked by concurrent focus-stack
+processes, and their results are stacked again in a final pass.
+Does not import Qt.
+"""
+
+import math
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from runner import build_command
+from supervisor import (
+    ProcessSupervisor, RunResult, STATUS_OK, STATUS_CANCELLED
+)
+from preflight import estimate_peak_memory
+from progress import ProgressParser
+
+SLAB_MIN_FRAMES = 8
+SLAB_MIN_THREADS = 2
+SLAB_OVERLAP = 2
+
+# Lossless intermediate results
+SLAB_FORMAT = ".tif"
+
+
+def plan_slabs(count, size, overlap=SLAB_OVERLAP):
+    """
+    (start, end) ranges of slabs of size frames, each sharing overlap
+    frames with the previous one. A short last slab is merged into the
+    one before it.
+    """
+    size = max(2, size)
+    overlap = max(0, min(overlap, size - 1))
+    if count <= size:
+        return [(0, count)]
+
+    slabs = []
+    start = 0
+    while True:
+        end = min(count, start + size)
+        slabs.append((start, end))
+        if end == count:
+            break
+        start += size - overlap
+
+    if len(slabs) > 1 and slabs[-1][1] - slabs[-1][0] < size // 2:
+        slabs[-2] = (slabs[-2][0], count)
+        slabs.pop()
+
+    return slabs
+
+
+def content_slabs(digests, size, overlap=SLAB_OVERLAP):
+    """
+    Slabs cut at content-defined points, for incremental restacking: a
+    group ends after a frame whose digest hits a boundary value, with
+    groups of size // 2 to 2 * size frames, size on average. Adding or
+    removing frames only moves the boundaries next to the edit, the
+    other groups keep their frames. Each slab also takes the first
+    overlap frames of the next group.
+    """
+    count = len(digests)
+    size = max(2, size)
+    shortest = max(1, size // 2)
+    spacing = max(1, size - shortest)
+
+    groups = []
+    start = 0
+    for i, digest in enumerate(digests):
+        length = i - start + 1
+        boundary = int(digest[:8], 16) % spacing == 0
+        if (length >= shortest and boundary) or length >= 2 * size:
+            groups.append((start, i + 1))
+            start = i + 1
+    if start < count:
+        groups.append((start, count))
+
+    return [(start, min(count, end + overlap)) for start, end in groups]
+
+
+def slab_parallelism(info, slab_frames, options, budget):
+    """
+    Slabs to run at once: as many as options["threads"] allows with
+    SLAB_MIN_THREADS each, fewer when they do not fit in memory.
+    """
+    cores = max(1, int(options["threads"]))
+    most = max(1, cores // SLAB_MIN_THREADS)
+    if info is None:
+        return most
+
+    for parallel in range(most, 1, -1):
+        slab_options = dict(options, threads=max(1, cores // parallel))
+        memory = estimate_peak_memory(info, slab_frames, slab_options)
+        if parallel * memory <= budget:
+            return parallel
+    return 1
+
+
+def auto_slab_size(info, count, options, budget, overlap=SLAB_OVERLAP):
+    """
+    Slab size giving one slab per parallel process.
+    """
+    parallel = slab_parallelism(info, count, options, budget)
+    size = math.ceil((count + (parallel - 1) * overlap) / parallel)
+    return max(SLAB_MIN_FRAMES, size)
+
+
+class SlabRunner:
+    """
+    Stacks the slabs of a plan, parallel at a time, with the threads of
+    options split between them. Slab results are written to work_dir.
+
+    on_line(index, line): output of slab index
+    on_start(supervisor): called when a slab process is started
+    """
+
+    POLL_INTERVAL = 0.05
+
+    def __init__(self, images, options, slabs, parallel, work_dir,
+                 on_line=None, on_start=None, timeout=None, idle_timeout=None):
+        self.images = images
+        self.slabs = slabs
+        self.parallel = max(1, min(parallel, len(slabs)))
+        self.options = dict(
+            options, threads=max(1, int(options["threads"]) // self.parallel)
+        )
+        self.outputs = [
+            os.path.join(work_dir, f"slab_{i:04d}{SLAB_FORMAT}")
+            for i in range(len(slabs))
+        ]
+        self.on_line = on_line
+        self.on_start = on_start
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+
+        self.fractions = [0.0] * len(slabs)
+        self.finished = 0
+        self._lock = threading.Lock()
+        self._active = set()
+        self._paused = 0.0
+        self._cancelled = False
+
+    @property
+    def fraction(self):
+        sizes = [end - start for start, end in self.slabs]
+        done = sum(f * s for f, s in zip(self.fractions, sizes))
+        return done / sum(sizes)
+
+    @property
+    def paused_time(self):
+        # Slabs are paused together, count the time once
+        with self._lock:
+            return max(
+                [self._paused] + [s.paused_time for s in self._active]
+            )
+
+    def active(self):
+        with self._lock:
+            return list(self._active)
+
+    def cancel(self):
+        self._cancelled = True
+        for supervisor in self.active():
+            supervisor.cancel()
+
+    def _run_slab(self, index):
+        if self._cancelled:
+            return RunResult(None, STATUS_CANCELLED, 0.0)
+
+        start, end = self.slabs[index]
+        parser = ProgressParser(end - start)
+
+        def on_line(line):
+            if parser.feed(line):
+                self.fractions[index] = parser.fraction
+            if self.on_line:
+                self.on_line(index, line)
+
+        options = dict(self.options, output=self.outputs[index])
+        supervisor = ProcessSupervisor(
+            build_command(self.images[start:end], options),
+            on_line=on_line,
+            timeout=self.timeout,
+            idle_timeout=self.idle_timeout,
+        )
+        with self._lock:
+            self._active.add(supervisor)
+        if self._cancelled:
+            supervisor.cancel()
+
+        try:
+            if supervisor.start() is not None and self.on_start:
+                self.on_start(supervisor)
+            result = supervisor.run()
+        finally:
+            with self._lock:
+                self._active.discard(supervisor)
+                self._paused = max(self._paused, supervisor.paused_time)
+
+        if result.status == STATUS_OK:
+            self.fractions[index] = 1.0
+            with self._lock:
+                self.finished += 1
+        elif result.status != STATUS_CANCELLED:
+            # One failed slab fails the whole stack
+            self.cancel()
+        return result
+
+    def run(self, on_tick=None):
+        """
+        Returns the RunResult of the first slab that did not succeed,
+        or an ok result once every slab is stacked.
+        """
+        with ThreadPoolExecutor(self.parallel) as pool:
+            futures = [
+                pool.submit(self._run_slab, i) for i in range(len(self.slabs))
+            ]
+            pending = futures
+            while pending:
+                _, pending = wait(pending, timeout=self.POLL_INTERVAL)
+                if on_tick:
+                    on_tick()
+
+        results = [f.result() for f in futures]
+        for result in results:
+            if result.status not in (STATUS_OK, STATUS_CANCELLED):
+                return result
+        for result in results:
+            if result.status != STATUS_OK:
+                return result
+        return RunResult(0, STATUS_OK, 0.0)
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 09:31:44 2026
+
+@author: Robert Becht (roblin67@gmail.com)
+
+Supervision of one focus-stack process: non-blocking output reads,
+immediate cancel, watchdogs and exit status. Does not import Qt.
+"""
+
+import codecs
+import os
+import re
+import selectors
+import signal
+import threading
+import time
+from collections import namedtuple
+
+from runner import run_process
+
+STATUS_OK = "ok"
+STATUS_FAILED = "failed"
+STATUS_CANCELLED = "cancelled"
+STATUS_TIMEOUT = "timeout"
+STATUS_STALLED = "stalled"
+
+RunResult = namedtuple("RunResult", ["returncode", "status", "duration"])
+
+_LINE_SPLIT = re.compile(r"[\r\n]")
+
+
+class ProcessSupervisor:
+    """
+    Runs a command in its own process group and streams its output.
+
+    on_tick: called after every wake-up of the read loop, at least
+             every POLL_INTERVAL, even when there is no output
+    timeout: wall-clock limit in seconds (0 or None: no limit)
+    idle_timeout: limit in seconds without any output (0 or None: no limit)
+    Time spent paused does not count against either limit.
+    """
+
+    POLL_INTERVAL = 0.05
+    KILL_GRACE = 2.0
+
+    def __init__(self, cmd, on_line=None, timeout=None, idle_timeout=None,
+                 on_tick=None):
+        self.cmd = cmd
+        self.on_line = on_line
+        self.on_tick = on_tick
+        self.timeout = timeout or None
+        self.idle_timeout = idle_timeout or None
+
+        self.process = None
+        # OSError of the launch (missing or non-executable binary)
+        self.launch_error = None
+        self._cancelled = False
+        self._paused_since = None
+        self._paused_total = 0.0
+        self._resumed_at = 0.0
+        self._closed = False
+        # Held while writing to or closing the pipe: a closed fd number
+        # can be reused by another file
+        self._pipe_lock = threading.Lock()
+
+        # Self-pipe: cancel() wakes the select loop at once
+        self._wake_r, self._wake_w = os.pipe()
+
+    @property
+    def paused_time(self):
+        return self._paused_total
+
+    @property
+    def pid(self):
+        return self.process.pid if self.process else None
+
+    def start(self):
+        """
+        Launch the command unless cancelled. Returns the process, or None
+        if cancelled or the launch failed (launch_error).
+        """
+        if (self.process is None and not self._cancelled
+                and self.launch_error is None):
+            try:
+                self.process = run_process(self.cmd)
+            except OSError as e:
+                self.launch_error = e
+        return self.process
+
+    # ---------- Control, callable from any thread ----------
+    def cancel(self):
+        self._cancelled = True
+        with self._pipe_lock:
+            if self._closed:
+                return
+            try:
+                os.write(self._wake_w, b"x")
+            except OSError:
+                pass
+
+    def pause(self):
+        if self._paused_since is None:
+            self._paused_since = time.monotonic()
+            self._signal(signal.SIGSTOP)
+
+    def resume(self):
+        if self._paused_since is not None:
+            self._signal(signal.SIGCONT)
+            self._resumed_at = time.monotonic()
+            self._paused_total += self._resumed_at - self._paused_since
+            self._paused_since = None
+
+    def _signal(self, sig):
+        if self.process is None:
+            return
+        try:
+            os.killpg(self.process.pid, sig)
+        except (ProcessLookupError, PermissionError):
+            # Gone, or its pid reused by a group of another user
+            pass
+
+    # ---------- Main loop ----------
+    def run(self):
+        started = time.monotonic()
+
+        if self.start() is None:
+            self._close()
+            if self.launch_error is not None:
+                if self.on_line:
+                    self.on_line(
+                        f"Cannot start {self.cmd[0]}: {self.launch_error}"
+                    )
+                return RunResult(None, STATUS_FAILED, 0.0)
+            return RunResult(None, STATUS_CANCELLED, 0.0)
+
+        fd = self.process.stdout.fileno()
+        os.set_blocking(fd, False)
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+
+        selector = selectors.DefaultSelector()
+        selector.register(fd, selectors.EVENT_READ, "output")
+        selector.register(self._wake_r, selectors.EVENT_READ, "wake")
+
+        status = None
+        pending = ""
+        last_output = time.monotonic()
+        eof = False
+
+        while not eof:
+            for key, _ in selector.select(self.POLL_INTERVAL):
+                if key.data == "wake":
+                    os.read(self._wake_r, 1024)
+                    continue
+
+                chunk = os.read(fd, 65536)
+                if not chunk:
+                    eof = True
+                    break
+
+                last_output = time.monotonic()
+                pending += decoder.decode(chunk)
+                *lines, pending = _LINE_SPLIT.split(pending)
+                for line in lines:
+                    line = line.strip()
+                    if line and self.on_line:
+                        self.on_line(line)
+
+            if self.on_tick:
+                self.on_tick()
+
+            if self._cancelled:
+                status = STATUS_CANCELLED
+                break
+
+            status = self._check_watchdogs(started, last_output)
+            if status:
+                break
+
+        selector.close()
+
+        if pending.strip() and self.on_line:
+            self.on_line(pending.strip())
+
+        if status:
+            self._kill()
+        else:
+            # Output closed, the process is exiting
+            while self.process.poll() is None:
+                if self._cancelled:
+                    status = STATUS_CANCELLED
+                    self._kill()
+                    break
+                time.sleep(0.01)
+
+        returncode = self.process.wait()
+        self._close()
+
+        if status is None:
+            status = STATUS_OK if returncode == 0 else STATUS_FAILED
+
+        return RunResult(returncode, status, time.monotonic() - started)
+
+    def _check_watchdogs(self, started, last_output):
+        if self._paused_since is not None:
+            return None
+
+        now = time.monotonic()
+
+        if self.timeout and now - started - self._paused_total > self.timeout:
+            return STATUS_TIMEOUT
+
+        # Output stops while paused, so the idle clock restarts on resume
+        idle = now - max(last_output, self._resumed_at)
+        if self.idle_timeout and idle > self.idle_timeout:
+            return STATUS_STALLED
+
+        return None
+
+    def _kill(self):
+        """
+        Terminate the whole process group, then kill what is left.
+        """
+        self._signal(signal.SIGTERM)
+        # A stopped process only sees SIGTERM once continued
+        self._signal(signal.SIGCONT)
+
+        deadline = time.monotonic() + self.KILL_GRACE
+        while self.process.poll() is None and time.monotonic() < deadline:
+            time.sleep(0.02)
+
+        # Children of AppRun may outlive it, always sweep the group
+        self._signal(signal.SIGKILL)
+
+    def close(self):
+        """
+        Release the resources of a supervisor that is not going to run.
+        """
+        if self.process is None and not self._closed:
+            self._close()
+
+    def _close(self):
+        with self._pipe_lock:
+            if not self._closed:
+                self._closed = True
+                for fd in (self._wake_r, self._wake_w):
+                    try:
+                        os.close(fd)
+                    except OSError:
+                        pass
+        if self.process is not None and self.process.stdout:
+            self.process.stdout.close()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 10:02:19 2026
+
+@author: Robert Becht (roblin67@gmail.com)
+
+Resource sampling of a focus-stack process group from /proc.
+"""
+
+import os
+import time
+
+from config import TELEMETRY_INTERVAL
+
+_CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+def _read_stat(pid):
+    """
+    Returns (pgrp, cpu_seconds, rss_bytes) of a process.
+    """
+    with open(f"/proc/{pid}/stat", "rb") as f:
+        data = f.read()
+
+    # The command name may contain spaces, fields start after ')'
+    fields = data[data.rindex(b")") + 2:].split()
+    pgrp = int(fields[2])
+    cpu = (int(fields[11]) + int(fields[12])) / _CLOCK_TICKS
+    rss = int(fields[21]) * _PAGE_SIZE
+    return pgrp, cpu, rss
+
+
+def _read_io(pid):
+    read_bytes = write_bytes = 0
+    try:
+        with open(f"/proc/{pid}/io") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key == "read_bytes":
+                    read_bytes = int(value)
+                elif key == "write_bytes":
+                    write_bytes = int(value)
+    except OSError:
+        pass
+    return read_bytes, write_bytes
+
+
+class ProcessSampler:
+    """
+    Samples every process of one or more process groups at a fixed
+    interval.
+
+    CPU time and I/O are cumulative: the last values seen for processes
+    that already exited are kept in the totals.
+    """
+
+    def __init__(self, pgid, interval=TELEMETRY_INTERVAL):
+        self.pgids = {pgid}
+        self.interval = interval
+        self.started = time.monotonic()
+        self.samples = []
+        self.peak_rss = 0
+
+        self._last = 0.0
+        self._per_pid = {}
+
+    def watch(self, pgid):
+        """
+        Also sample the process group pgid (later stages, sub-stacks).
+        """
+        self.pgids.add(pgid)
+
+    def maybe_sample(self):
+        now = time.monotonic()
+        if now - self._last >= self.interval:
+            self._last = now
+            self.sample()
+
+    def sample(self):
+        rss_total = 0
+        processes = 0
+
+        for name in os.listdir("/proc"):
+            if not name.isdigit():
+                continue
+            try:
+                pgrp, cpu, rss = _read_stat(name)
+            except (OSError, ValueError, IndexError):
+                continue
+            if pgrp not in self.pgids:
+                continue
+
+            read_bytes, write_bytes = _read_io(name)
+            self._per_pid[name] = (cpu, read_bytes, write_bytes)
+            rss_total += rss
+            processes += 1
+
+        sample = {
+            "t": time.monotonic() - self.started,
+            "cpu_seconds": sum(v[0] for v in self._per_pid.values()),
+            "rss": rss_total,
+            "read_bytes": sum(v[1] for v in self._per_pid.values()),
+            "write_bytes": sum(v[2] for v in self._per_pid.values()),
+            "processes": processes,
+        }
+
+        self.peak_rss = max(self.peak_rss, rss_total)
+        self.samples.append(sample)
+        return sample
+
+    def totals(self):
+        last = self.samples[-1] if self.samples else {}
+        return {
+            "cpu_seconds": last.get("cpu_seconds", 0.0),
+            "peak_rss": self.peak_rss,
+            "read_bytes": last.get("read_bytes", 0),
+            "write_bytes": last.get("write_bytes", 0),
+        }
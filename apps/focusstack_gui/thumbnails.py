@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 09:40:05 2026
+
+@author: Robert Becht (roblin67@gmail.com)
+"""
+
+import hashlib
+import os
+import threading
+
+from PyQt6.QtCore import (
+    QObject, QRunnable, QThreadPool, QSize, Qt, pyqtSignal
+)
+from PyQt6.QtGui import QImage, QImageReader, QTransform
+
+from config import THUMBNAIL_DIR, THUMBNAIL_SIZE, THUMBNAIL_CACHE_MAX_BYTES
+from imageinfo import read_exif_thumbnail
+
+
+def _apply_orientation(image, orientation):
+    """
+    Apply an EXIF orientation tag to a decoded image.
+    """
+    if orientation in (2, 4, 5, 7):
+        image = image.mirrored(True, False)
+
+    angle = {3: 180, 4: 180, 5: 270, 6: 90, 7: 90, 8: 270}.get(orientation)
+    if angle:
+        image = image.transformed(QTransform().rotate(angle))
+
+    return image
+
+
+def load_thumbnail(path, size=THUMBNAIL_SIZE):
+    """
+    Build a thumbnail without decoding the full image when possible.
+
+    1. Embedded EXIF thumbnail (JPEG only, a few KB to read)
+    2. Reduced-size decode (JPEG decoders scale down while decoding)
+    """
+    box = QSize(size, size)
+
+    data, orientation = read_exif_thumbnail(path)
+    if data:
+        image = QImage.fromData(data, "JPG")
+        if not image.isNull() and max(image.width(), image.height()) >= size:
+            image = _apply_orientation(image, orientation)
+            return image.scaled(
+                box,
+                Qt.AspectRatioMode.KeepAspectRatio,
+                Qt.TransformationMode.SmoothTransformation
+            )
+
+    reader = QImageReader(path)
+    reader.setAutoTransform(True)
+    full_size = reader.size()
+    if full_size.isValid():
+        reader.setScaledSize(
+            full_size.scaled(box, Qt.AspectRatioMode.KeepAspectRatio)
+        )
+
+    image = reader.read()
+    if image.isNull():
+        return image
+
+    # Some decoders ignore setScaledSize
+    if image.width() > size or image.height() > size:
+        image = image.scaled(
+            box,
+            Qt.AspectRatioMode.KeepAspectRatio,
+            Qt.TransformationMode.SmoothTransformation
+        )
+
+    return image
+
+
+class ThumbnailCache:
+    """
+    Persistent on-disk thumbnail cache.
+
+    Entries are keyed by (path, mtime, size), so an edited file gets a
+    new entry. The file mtime of an entry is its last access time, which
+    is what the LRU eviction sorts on.
+    """
+
+    def __init__(self, root=THUMBNAIL_DIR, max_bytes=THUMBNAIL_CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total = None
+
+    def _entry(self, path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+
+        key = f"{os.path.abspath(path)}\0{st.st_mtime_ns}\0{st.st_size}"
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.root, digest[:2], digest + ".jpg")
+
+    def get(self, path):
+        entry = self._entry(path)
+        if entry is None or not os.path.exists(entry):
+            return None
+
+        image = QImage(entry)
+        if image.isNull():
+            return None
+
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+
+        return image
+
+    def put(self, path, image):
+        entry = self._entry(path)
+        if entry is None:
+            return
+
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        tmp = f"{entry}.{os.getpid()}-{threading.get_ident()}.tmp"
+
+        if not image.save(tmp, "JPG", 90):
+            return
+        os.replace(tmp, entry)
+
+        with self._lock:
+            if self._total is None:
+                self._total = self._scan()[1]
+            else:
+                self._total += os.path.getsize(entry)
+
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def _scan(self):
+        entries = []
+        total = 0
+
+        if not os.path.isdir(self.root):
+            return entries, total
+
+        for sub in os.scandir(self.root):
+            if not sub.is_dir():
+                continue
+            for f in os.scandir(sub.path):
+                st = f.stat()
+                entries.append((st.st_mtime, st.st_size, f.path))
+                total += st.st_size
+
+        return entries, total
+
+    def _evict(self):
+        """
+        Drop least recently used entries down to 90% of the limit.
+        """
+        entries, total = self._scan()
+        target = self.max_bytes * 0.9
+
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+        self._total = total
+
+
+class _ThumbnailTask(QRunnable):
+    def __init__(self, loader, path):
+        super().__init__()
+        self.loader = loader
+        self.path = path
+
+    def run(self):
+        cache = self.loader.cache
+        image = cache.get(self.path)
+
+        if image is None:
+            image = load_thumbnail(self.path, self.loader.size)
+            if not image.isNull():
+                cache.put(self.path, image)
+
+        if not image.isNull():
+            self.loader.thumbnail_ready.emit(self.path, image)
+
+
+class ThumbnailLoader(QObject):
+    """
+    Produces thumbnails on a worker pool, off the GUI thread.
+    Results are delivered through thumbnail_ready(path, QImage).
+    """
+
+    thumbnail_ready = pyqtSignal(str, QImage)
+
+    def __init__(self, parent=None, size=THUMBNAIL_SIZE, cache=None):
+        super().__init__(parent)
+        self.size = size
+        self.cache = cache or ThumbnailCache()
+
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(max(2, (os.cpu_count() or 2) // 2))
+
+    def request(self, paths):
+        for path in paths:
+            self.pool.start(_ThumbnailTask(self, path))
+
+    def clear(self):
+        """
+        Drop thumbnails still waiting in the queue.
+        """
+        self.pool.clear()
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Oct 28 10:12:36 2026
+
+@author: Robert Becht (roblin67@gmail.com)
+
+Multi-resolution tile pyramids of large results, for the result viewer.
+
+Level 0 is the image at full resolution, each level halves the previous
+one and the last fits in one tile. The tiles are files of a DiskCache
+entry per (path, mtime, size), so a result is decoded once and a viewer
+only reads the tiles it shows.
+
+JPEG results are decoded in bands of tile rows, scaled to the level by
+the decoder, so building never holds more than VIEWER_BAND_PIXELS; the
+coarse levels are built first. Formats without clipped decoding (PNG
+depthmaps, TIFF) and EXIF-rotated JPEGs are decoded whole, once, which
+peaks at about twice the decoded size (4 or 8 bytes per pixel). Qt's
+allocation limit (256 MB by default, a 64 MP image) is raised for them
+up to VIEWER_WHOLE_MAX_BYTES; larger images are refused.
+"""
+
+import math
+import os
+import threading
+
+from PyQt6.QtCore import QRect, QSize, Qt
+from PyQt6.QtGui import QImage, QImageIOHandler, QImageReader
+
+from diskcache import DiskCache
+from hashing import combine
+from config import (
+    VIEWER_TILE_SIZE, VIEWER_TILE_DIR, VIEWER_TILE_CACHE_MAX_BYTES,
+    VIEWER_BAND_PIXELS, VIEWER_WHOLE_MAX_BYTES
+)
+
+TILE_QUALITY = 90
+COMPLETE_MARKER = "complete"
+
+# QImageReader.setAllocationLimit is process wide
+_limit_lock = threading.Lock()
+
+
+def _ignore(*args):
+    pass
+
+
+class TilePyramid:
+    """
+    Tiles of the image at path. Raises OSError if it cannot be read.
+    """
+
+    def __init__(self, path, cache=None, tile_size=VIEWER_TILE_SIZE):
+        self.path = path
+        self.cache = cache or DiskCache(
+            VIEWER_TILE_DIR, VIEWER_TILE_CACHE_MAX_BYTES
+        )
+        self.tile_size = tile_size
+
+        reader = QImageReader(path)
+        reader.setAutoTransform(True)
+        size = reader.size()
+        if not size.isValid():
+            raise OSError(f"Cannot read {path}: {reader.errorString()}")
+        transform = reader.transformation()
+        if transform & QImageIOHandler.Transformation.TransformationRotate90:
+            size.transpose()
+        self.width, self.height = size.width(), size.height()
+        # Bands are clipped in file orientation
+        self.banded = (
+            reader.supportsOption(QImageIOHandler.ImageOption.ScaledClipRect)
+            and transform == QImageIOHandler.Transformation.TransformationNone
+        )
+        self.lossless = bytes(reader.format()) != b"jpeg"
+
+        self.levels = [QSize(self.width, self.height)]
+        while max(self.width, self.height) > tile_size * 2 ** self.top:
+            scale = 2 ** len(self.levels)
+            self.levels.append(QSize(
+                math.ceil(self.width / scale), math.ceil(self.height / scale)
+            ))
+
+        st = os.stat(path)
+        self.key = combine(
+            "tiles", os.path.abspath(path), str(st.st_mtime_ns),
+            str(st.st_size), str(tile_size)
+        )
+        self.dir = self.cache.path(self.key)
+
+    @property
+    def top(self):
+        return len(self.levels) - 1
+
+    @property
+    def complete(self):
+        return os.path.exists(os.path.join(self.dir, COMPLETE_MARKER))
+
+    def grid(self, level):
+        """
+        (columns, rows) of tiles of level.
+        """
+        size = self.levels[level]
+        return (math.ceil(size.width() / self.tile_size),
+                math.ceil(size.height() / self.tile_size))
+
+    def tile_rect(self, level, col, row):
+        """
+        Rectangle of a tile, in pixels of its level.
+        """
+        t = self.tile_size
+        return QRect(col * t, row * t, t, t).intersected(
+            QRect(0, 0, self.levels[level].width(),
+                  self.levels[level].height())
+        )
+
+    def tile_path(self, level, col, row):
+        ext = "png" if self.lossless else "jpg"
+        return os.path.join(self.dir, f"{level}_{col}_{row}.{ext}")
+
+    def load(self, level, col, row):
+        """
+        Decoded tile, or None while it is not built.
+        """
+        path = self.tile_path(level, col, row)
+        if not os.path.exists(path):
+            return None
+        image = QImage(path)
+        return None if image.isNull() else image
+
+    def build(self, cancelled=lambda: False, on_level=_ignore):
+        """
+        Write the missing tiles; on_level(level) is called when a level
+        is complete. Returns False if cancelled. Raises OSError.
+        """
+        if self.cache.get(self.key) is not None and self.complete:
+            return True
+        os.makedirs(self.dir, exist_ok=True)
+
+        if self.banded:
+            done = self._build_banded(cancelled, on_level)
+        else:
+            done = self._build_whole(cancelled, on_level)
+        if not done:
+            return False
+
+        with open(os.path.join(self.dir, COMPLETE_MARKER), "w"):
+            pass
+        self.cache.evict(keep=self.dir)
+        return True
+
+    def _build_banded(self, cancelled, on_level):
+        for level in range(self.top, -1, -1):
+            size = self.levels[level]
+            cols, rows = self.grid(level)
+            band_rows = max(
+                1, VIEWER_BAND_PIXELS // (size.width() * self.tile_size)
+            )
+            for first in range(0, rows, band_rows):
+                if cancelled():
+                    return False
+                last = min(rows, first + band_rows)
+                if all(os.path.exists(self.tile_path(level, c, r))
+                       for r in range(first, last) for c in range(cols)):
+                    continue
+
+                reader = QImageReader(self.path)
+                reader.setScaledSize(size)
+                top = first * self.tile_size
+                band = QRect(
+                    0, top, size.width(),
+                    min(size.height(), last * self.tile_size) - top
+                )
+                reader.setScaledClipRect(band)
+                image = reader.read()
+                if image.size() != band.size():
+                    raise OSError(
+                        f"Cannot read {self.path}: {reader.errorString()}"
+                    )
+                self._save_tiles(image, level, top, range(first, last))
+            on_level(level)
+        return True
+
+    def _allow_whole(self, reader):
+        """
+        Raise Qt's allocation limit to decode the image whole.
+        Raises OSError beyond VIEWER_WHOLE_MAX_BYTES.
+        """
+        depth = 32
+        if reader.imageFormat() != QImage.Format.Format_Invalid:
+            depth = max(depth, QImage(1, 1, reader.imageFormat()).depth())
+        needed = self.width * self.height * depth // 8
+        if needed > VIEWER_WHOLE_MAX_BYTES:
+            raise OSError(
+                f"Cannot view {self.path}: {needed / 2**30:.1f} GB decoded, "
+                f"more than {VIEWER_WHOLE_MAX_BYTES / 2**30:.1f} GB"
+            )
+        with _limit_lock:
+            megabytes = math.ceil(needed / 2**20) + 1
+            if megabytes > QImageReader.allocationLimit():
+                QImageReader.setAllocationLimit(megabytes)
+
+    def _build_whole(self, cancelled, on_level):
+        reader = QImageReader(self.path)
+        reader.setAutoTransform(True)
+        self._allow_whole(reader)
+        image = reader.read()
+        if image.isNull():
+            raise OSError(f"Cannot read {self.path}: {reader.errorString()}")
+
+        # An overview first, then from full resolution down
+        self._save_tiles(self._scaled(image, self.top), self.top, 0, [0])
+        on_level(self.top)
+        for level in range(self.top):
+            if cancelled():
+                return False
+            if level > 0:
+                image = self._scaled(image, level)
+            self._save_tiles(image, level, 0, range(self.grid(level)[1]))
+            on_level(level)
+        return True
+
+    def _scaled(self, image, level):
+        if image.size() == self.levels[level]:
+            return image
+        return image.scaled(
+            self.levels[level], Qt.AspectRatioMode.IgnoreAspectRatio,
+            Qt.TransformationMode.SmoothTransformation
+        )
+
+    def _save_tiles(self, image, level, top, rows):
+        """
+        Save the tiles of rows from image, whose first line is line top
+        of the level.
+        """
+        cols = self.grid(level)[0]
+        for row in rows:
+            for col in range(cols):
+                rect = self.tile_rect(level, col, row).translated(0, -top)
+                path = self.tile_path(level, col, row)
+                tmp = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+                if self.lossless:
+                    saved = image.copy(rect).save(tmp, "PNG")
+                else:
+                    saved = image.copy(rect).save(tmp, "JPG", TILE_QUALITY)
+                if not saved:
+                    raise OSError(f"Cannot write {path}")
+                os.replace(tmp, path)
@@ -7,9 +7,7 @@ Created on Sat Feb 21 21:57:02 2026
 """
 
 import os
-import re
 #from PyQt6.QtWidgets import QFileDialog
-from datetime import datetime
 #import sys
 #from PyQt6.QtWidgets import QProgressBar
 
@@ -17,13 +15,41 @@ from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QPushButton, QFileDialog,
     QTextEdit, QTabWidget, QFormLayout, QCheckBox,
     QSpinBox, QDoubleSpinBox, QLineEdit, QLabel,
-    QProgressBar, QListWidget, QListWidgetItem, QMessageBox
+    QProgressBar, QListView, QHBoxLayout, QMessageBox,
+    QTableWidget, QTableWidgetItem, QAbstractItemView, QHeaderView,
+    QComboBox, QPlainTextEdit, QDialog, QDialogButtonBox
 )
-from PyQt6.QtGui import QIcon
-from PyQt6.QtCore import QSize
+from PyQt6.QtCore import QSize, QTimer, Qt
+from PyQt6.QtGui import QPixmap
 
-from worker import FocusStackWorker
-from runner import build_command, run_process
+from worker import (
+    FocusStackWorker, AutotuneWorker, SharpnessWorker, StackScanWorker,
+    WatchWorker, BinaryWorker,
+    DaemonJobWorker, DaemonWatcher
+)
+from autotune import TuningStore
+from imageinfo import probe_image
+from image_model import ImageListModel, FolderScanner
+from jobqueue import Job, JobQueue, DONE, FAILED, CANCELLED, RUNNING
+from preflight import (
+    PreflightError, available_memory, estimate_peak_memory, fit_options,
+    probe_stack, MIN_BATCHSIZE
+)
+from priority import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, PRIORITY_NAMES
+from supervisor import STATUS_OK, STATUS_CANCELLED
+from config import JOB_TIMEOUT, JOB_IDLE_TIMEOUT, CONSOLE_MAX_LINES
+from history import RunHistory
+from config import THUMBNAIL_SIZE, PROXY_LONG_EDGE, PREVIEW_DIR
+from runner import build_command, default_output, run_process
+from roi import cropped_info, format_roi
+from roidialog import RoiDialog
+from resultviewer import ResultViewer
+from sharpness import frame_scores, suggest_culling
+from sharpnessplot import SharpnessPlot
+from stackdialog import StackDialog
+from daemonclient import DaemonClient, DaemonError, RemoteJob
+from substack import SLAB_OVERLAP
+from staging import prefetch_next, publisher, scratch
 
 
 class FocusStackGUI(QWidget):
@@ -34,13 +60,30 @@ class FocusStackGUI(QWidget):
         self.layout = QVBoxLayout()
         self.tabs = QTabWidget()
 
-        self.images = []
+        self.image_model = ImageListModel(self)
+        self.job_queue = JobQueue()
+        self.job_workers = {}
+        self.queue_running = False
+        self.preview_run = False
+        self.view_pending = False
+        self.quitting = False
+        self.roi = None
+        self.sharpness = None
+        self.culling = None
+        self.stack_scan = None
+        self.watch_worker = None
+        self.daemon = DaemonClient()
+        self.daemon_watcher = None
+        self.daemon_jobs = []
+        self.daemon_summary = None
 
         self._build_files_tab()
         self._build_align_tab()
         self._build_merge_tab()
         self._build_depth_tab()
         self._build_performance_tab()
+        self._build_queue_tab()
+        self._build_history_tab()
         self._build_help_tab()
 
         self.layout.addWidget(self.tabs)
@@ -48,6 +91,22 @@ class FocusStackGUI(QWidget):
         self.run_btn = QPushButton("Run Focus Stack")
         self.run_btn.clicked.connect(self.run_stack)
         self.layout.addWidget(self.run_btn)
+
+        self.preview_btn = QPushButton("Preview")
+        self.preview_btn.setToolTip(
+            "Run on frames scaled down to the preview size\n"
+            "(Performance tab) to try settings in seconds"
+        )
+        self.preview_btn.clicked.connect(self.preview_stack)
+        self.layout.addWidget(self.preview_btn)
+
+        self.queue_btn = QPushButton("Add to Queue")
+        self.queue_btn.setToolTip(
+            "Queue the selected images with the current options\n"
+            "Queued jobs run in parallel, see the Queue tab"
+        )
+        self.queue_btn.clicked.connect(self.add_to_queue)
+        self.layout.addWidget(self.queue_btn)
         
         self.progress = QProgressBar()
         self.layout.addWidget(self.progress)
@@ -57,11 +116,37 @@ class FocusStackGUI(QWidget):
         self.cancel_btn.setEnabled(False)
         self.layout.addWidget(self.cancel_btn)
 
-        self.console = QTextEdit()
+        # Bounded: the full output of each job is in its log file
+        self.console = QPlainTextEdit()
+        self.console.setReadOnly(True)
+        self.console.setMaximumBlockCount(CONSOLE_MAX_LINES)
         self.layout.addWidget(self.console)
 
         self.setLayout(self.layout)
 
+        self.binary_check = BinaryWorker()
+        self.binary_check.message_signal.connect(self.console.appendPlainText)
+        self.binary_check.finished_signal.connect(self.on_binary_resolved)
+        self.binary_check.start()
+
+        # Attach to a running job daemon
+        if self.daemon.available():
+            self.use_daemon.setChecked(True)
+
+    def on_binary_resolved(self, binary):
+        if binary is None:
+            QMessageBox.warning(
+                self, "focus-stack not found",
+                "No working focus-stack binary was found.\n"
+                "Set FOCUS_STACK_BIN to the binary or the AppImage, or put\n"
+                "focus-stack on the PATH. See the console for details."
+            )
+            return
+        opencv = f", {binary.opencv_version}" if binary.opencv_version else ""
+        self.console.appendPlainText(
+            f"{binary.version}{opencv}: {binary.path}"
+        )
+
     # ---------- FILES ----------
     def _build_files_tab(self):
         tab = QWidget()
@@ -71,21 +156,37 @@ class FocusStackGUI(QWidget):
         btn = QPushButton("Select Images")
         btn.clicked.connect(self.select_images)
         layout.addWidget(btn)
+
+        folder_btn = QPushButton("Add Folder")
+        folder_btn.setToolTip(
+            "Add every image of a folder\n"
+            "Images appear while the folder is being scanned"
+        )
+        folder_btn.clicked.connect(self.add_folder)
+        layout.addWidget(folder_btn)
        
         # Mode galerie
-        self.image_list = QListWidget()
+        # Only visible rows are materialized by the view
+        self.image_list = QListView()
+        self.image_list.setModel(self.image_model)
         self.image_list.setToolTip(
             "Selected images for stacking\n"
             "You can select multiple items and remove them"
         )
-        self.image_list.setViewMode(QListWidget.ViewMode.IconMode)
-        self.image_list.setIconSize(QSize(120, 120))
-        self.image_list.setResizeMode(QListWidget.ResizeMode.Adjust)
-        self.image_list.setMovement(QListWidget.Movement.Static)
+        self.image_list.setViewMode(QListView.ViewMode.IconMode)
+        self.image_list.setIconSize(QSize(THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+        self.image_list.setResizeMode(QListView.ResizeMode.Adjust)
+        self.image_list.setMovement(QListView.Movement.Static)
         self.image_list.setSpacing(10)
+        self.image_list.setUniformItemSizes(True)
+        self.image_list.setLayoutMode(QListView.LayoutMode.Batched)
+        self.image_list.setBatchSize(500)
+        self.image_list.verticalScrollBar().valueChanged.connect(
+            self.image_model.cancel_pending
+        )
         
         self.image_list.setSelectionMode(
-            QListWidget.SelectionMode.ExtendedSelection
+            QListView.SelectionMode.ExtendedSelection
         )
         
         layout.addWidget(QLabel("Selected images:"))
@@ -103,6 +204,56 @@ class FocusStackGUI(QWidget):
         remove_btn.clicked.connect(self.remove_selected_images)
         layout.addWidget(remove_btn)
 
+        # Ordering
+        order_layout = QHBoxLayout()
+        sort_btn = QPushButton("Sort by name")
+        sort_btn.clicked.connect(lambda: self.image_model.sort_by_name())
+        reverse_btn = QPushButton("Reverse order")
+        reverse_btn.clicked.connect(self.image_model.reverse)
+        order_layout.addWidget(sort_btn)
+        order_layout.addWidget(reverse_btn)
+        layout.addLayout(order_layout)
+
+        # Region of interest
+        roi_layout = QHBoxLayout()
+        roi_btn = QPushButton("Set region of interest")
+        roi_btn.setToolTip(
+            "Draw the region to stack on the selected (or middle) frame\n"
+            "Frames are cropped to it before stacking"
+        )
+        roi_btn.clicked.connect(self.select_roi)
+        clear_roi_btn = QPushButton("Full frame")
+        clear_roi_btn.clicked.connect(lambda: self.set_roi(None))
+        roi_layout.addWidget(roi_btn)
+        roi_layout.addWidget(clear_roi_btn)
+        layout.addLayout(roi_layout)
+        self.roi_label = QLabel()
+        layout.addWidget(self.roi_label)
+        self.set_roi(None)
+
+        # Sharpness profile
+        sharpness_layout = QHBoxLayout()
+        self.sharpness_btn = QPushButton("Analyze sharpness")
+        self.sharpness_btn.setToolTip(
+            "Measure the sharpness of every frame (within the region of\n"
+            "interest) and suggest empty and redundant frames to drop"
+        )
+        self.sharpness_btn.clicked.connect(self.analyze_sharpness)
+        self.cull_btn = QPushButton("Remove suggested frames")
+        self.cull_btn.setEnabled(False)
+        self.cull_btn.clicked.connect(self.remove_suggested_frames)
+        sharpness_layout.addWidget(self.sharpness_btn)
+        sharpness_layout.addWidget(self.cull_btn)
+        layout.addLayout(sharpness_layout)
+        self.sharpness_plot = SharpnessPlot()
+        layout.addWidget(self.sharpness_plot)
+        self.cull = QCheckBox("Cull frames automatically before stacking")
+        self.cull.setToolTip(
+            "Drop the frames without sharp detail at both ends of the stack\n"
+            "and the frames that add nothing to their neighbours"
+        )
+        layout.addWidget(self.cull)
+
         # Output directory selector
         self.output_dir = QLineEdit(os.getcwd())
         choose_dir_btn = QPushButton("Choose Output Folder")
@@ -121,6 +272,14 @@ class FocusStackGUI(QWidget):
         self.auto_subfolder.setChecked(True)
         layout.addWidget(self.auto_subfolder)
 
+        self.view_results = QCheckBox("Open the result viewer after a run")
+        self.view_results.setToolTip(
+            "Inspect the result, and the depthmap side by side, without\n"
+            "loading them fully: tiles are decoded as they are shown"
+        )
+        self.view_results.setChecked(True)
+        layout.addWidget(self.view_results)
+
         tab.setLayout(layout)
         self.tabs.addTab(tab, "Files")
         
@@ -131,6 +290,10 @@ class FocusStackGUI(QWidget):
         if folder:
             self.output_dir.setText(folder)
 
+    @property
+    def images(self):
+        return self.image_model.paths()
+
     # ---------- ALIGN ----------
     def _build_align_tab(self):
         tab = QWidget()
@@ -168,6 +331,16 @@ class FocusStackGUI(QWidget):
         self.no_transform.setToolTip(
             "Disable geometric alignment correction"
         )
+        self.reuse_alignment = QCheckBox()
+        self.reuse_alignment.setToolTip(
+            "Align in a separate --align-only stage and keep the aligned frames.\n"
+            "Later runs of the same images with the same alignment options\n"
+            "only merge (--no-align): changing Merge or Depthmap settings\n"
+            "does not align the stack again.\n"
+            "The aligned frames are saved in the format of the inputs, so\n"
+            "JPEG frames are merged after a second lossy encoding, and the\n"
+            "first run starts two focus-stack processes."
+        )
 
         layout.addRow("Global align", self.global_align)
         layout.addRow("Full resolution align", self.full_res_align)
@@ -176,6 +349,7 @@ class FocusStackGUI(QWidget):
         layout.addRow("No white balance", self.no_whitebalance)
         layout.addRow("No contrast", self.no_contrast)
         layout.addRow("No transform", self.no_transform)
+        layout.addRow("Reuse aligned frames", self.reuse_alignment)
 
         tab.setLayout(layout)
         self.tabs.addTab(tab, "Align")
@@ -281,14 +455,269 @@ class FocusStackGUI(QWidget):
             "Enable verbose processing output"
         )
 
+        self.timeout = QSpinBox()
+        self.timeout.setRange(0, 24 * 60)
+        self.timeout.setSuffix(" min")
+        self.timeout.setValue(JOB_TIMEOUT // 60)
+        self.timeout.setToolTip(
+            "Kill a run that takes longer than this\n"
+            "0: no limit"
+        )
+
+        self.idle_timeout = QSpinBox()
+        self.idle_timeout.setRange(0, 24 * 60)
+        self.idle_timeout.setSuffix(" min")
+        self.idle_timeout.setValue(JOB_IDLE_TIMEOUT // 60)
+        self.idle_timeout.setToolTip(
+            "Kill a run that prints nothing for this long\n"
+            "0: no limit"
+        )
+
+        self.use_tuned = QCheckBox()
+        self.use_tuned.setChecked(True)
+        self.use_tuned.setToolTip(
+            "Use the threads, batch size and OpenCL setting found by\n"
+            "Autotune for this machine and frame resolution, when available.\n"
+            "Uncheck to use the values above."
+        )
+
+        self.proxy_size = QSpinBox()
+        self.proxy_size.setRange(256, 8192)
+        self.proxy_size.setSingleStep(100)
+        self.proxy_size.setSuffix(" px")
+        self.proxy_size.setValue(PROXY_LONG_EDGE)
+        self.proxy_size.setToolTip(
+            "Long edge of the frames used by Preview"
+        )
+
+        self.substacks = QCheckBox()
+        self.substacks.setToolTip(
+            "For very deep stacks: stack overlapping slabs of frames in\n"
+            "parallel, then stack the slab results in a final pass.\n"
+            "Not used with depthmap or align-only runs."
+        )
+        self.incremental = QCheckBox()
+        self.incremental.setToolTip(
+            "Stack in groups of frames and keep each group's result.\n"
+            "After adding or removing frames, only the changed groups\n"
+            "are stacked again before the final pass."
+        )
+        self.slab_size = QSpinBox()
+        self.slab_size.setRange(0, 10000)
+        self.slab_size.setSpecialValueText("Auto")
+        self.slab_size.setSuffix(" frames")
+        self.slab_size.setToolTip(
+            "Frames per slab\n"
+            "Auto: from the number of threads and the available memory"
+        )
+        self.slab_overlap = QSpinBox()
+        self.slab_overlap.setRange(0, 100)
+        self.slab_overlap.setValue(SLAB_OVERLAP)
+        self.slab_overlap.setSuffix(" frames")
+        self.slab_overlap.setToolTip(
+            "Frames shared by neighbouring slabs"
+        )
+
+        self.use_cache = QCheckBox()
+        self.use_cache.setChecked(True)
+        self.use_cache.setToolTip(
+            "Restore the result of an earlier run with the same frames\n"
+            "(by content) and the same settings instead of stacking again"
+        )
+
+        self.scratch = QCheckBox()
+        self.scratch.setToolTip(
+            "For frames or output folders on network storage: copy the\n"
+            "frames to the local scratch area first (queued jobs while the\n"
+            "previous one runs) and publish the result in the background"
+        )
+
+        self.autotune_btn = QPushButton("Autotune")
+        self.autotune_btn.setToolTip(
+            "Time short runs on a subset of the selected images\n"
+            "to find the fastest threads / batch size / OpenCL setting"
+        )
+        self.autotune_btn.clicked.connect(self.autotune)
+
         layout.addRow("Threads", self.threads)
         layout.addRow("Batch size", self.batchsize)
         layout.addRow("Disable OpenCL", self.no_opencl)
+        layout.addRow("Use tuned values", self.use_tuned)
+        layout.addRow("", self.autotune_btn)
+        layout.addRow("Sub-stacks", self.substacks)
+        layout.addRow("Incremental restacking", self.incremental)
+        layout.addRow("Slab size", self.slab_size)
+        layout.addRow("Slab overlap", self.slab_overlap)
+        layout.addRow("Reuse cached results", self.use_cache)
+        layout.addRow("Stage on scratch disk", self.scratch)
+        layout.addRow("Preview size", self.proxy_size)
         layout.addRow("Verbose", self.verbose)
+        layout.addRow("Timeout", self.timeout)
+        layout.addRow("No-output timeout", self.idle_timeout)
 
         tab.setLayout(layout)
         self.tabs.addTab(tab, "Performance")
         
+    # ---------- QUEUE ----------
+    def _build_queue_tab(self):
+        tab = QWidget()
+        layout = QVBoxLayout()
+
+        form = QFormLayout()
+        self.max_parallel = QSpinBox()
+        self.max_parallel.setRange(1, max(1, self.job_queue.cores))
+        self.max_parallel.setValue(self.job_queue.max_parallel)
+        self.max_parallel.setToolTip(
+            "Number of focus-stack processes running at once\n"
+            f"The {self.job_queue.cores} CPU cores are split between them"
+        )
+        self.max_parallel.valueChanged.connect(self.on_max_parallel_changed)
+        form.addRow("Parallel jobs", self.max_parallel)
+
+        self.job_priority = QComboBox()
+        for level in sorted(PRIORITY_NAMES):
+            self.job_priority.addItem(PRIORITY_NAMES[level], level)
+        self.job_priority.setCurrentIndex(
+            self.job_priority.findData(PRIORITY_BACKGROUND)
+        )
+        self.job_priority.setToolTip(
+            "Priority of newly queued jobs\n"
+            "Background jobs run niced and are paused (SIGSTOP)\n"
+            "while an interactive run is in progress.\n"
+            "Run Focus Stack always starts an interactive job."
+        )
+        form.addRow("Job priority", self.job_priority)
+
+        self.use_daemon = QCheckBox("Use the shared job daemon")
+        self.use_daemon.setToolTip(
+            "Run and queue jobs on the job daemon (daemon.py), which has one\n"
+            "queue and CPU budget for every window and script of the machine.\n"
+            "Its jobs are listed here, with their output in the console."
+        )
+        self.use_daemon.toggled.connect(self.on_daemon_toggled)
+        form.addRow("", self.use_daemon)
+        layout.addLayout(form)
+
+        self.queue_table = QTableWidget(0, 7)
+        self.queue_table.setHorizontalHeaderLabels(
+            ["Job", "Images", "Threads", "Priority", "Status", "Progress",
+             "Duration"]
+        )
+        self.queue_table.horizontalHeader().setSectionResizeMode(
+            0, QHeaderView.ResizeMode.Stretch
+        )
+        self.queue_table.setSelectionBehavior(
+            QAbstractItemView.SelectionBehavior.SelectRows
+        )
+        self.queue_table.setEditTriggers(
+            QAbstractItemView.EditTrigger.NoEditTriggers
+        )
+        layout.addWidget(self.queue_table)
+
+        self.start_queue_btn = QPushButton("Start queue")
+        self.start_queue_btn.setToolTip(
+            "Start or pause the queue\n"
+            "Pausing lets running jobs finish but starts no new ones"
+        )
+        self.start_queue_btn.setCheckable(True)
+        self.start_queue_btn.toggled.connect(self.on_queue_toggled)
+        layout.addWidget(self.start_queue_btn)
+
+        self.detect_btn = QPushButton("Detect stacks in folder")
+        self.detect_btn.setToolTip(
+            "Split a folder of captures into stacks from their EXIF data\n"
+            "(capture time, focus distance, exposure) and queue them"
+        )
+        self.detect_btn.clicked.connect(self.detect_stacks)
+        layout.addWidget(self.detect_btn)
+
+        watch = QHBoxLayout()
+        self.watch_btn = QPushButton("Watch folder")
+        self.watch_btn.setToolTip(
+            "Tethered capture: stack each bracket written into a folder\n"
+            "while it is captured. focus-stack starts at the first frame\n"
+            "and waits for the next ones (--wait-images)."
+        )
+        self.watch_btn.setCheckable(True)
+        self.watch_btn.toggled.connect(self.on_watch_toggled)
+        watch.addWidget(self.watch_btn)
+        watch.addWidget(QLabel("Frames per bracket"))
+        self.watch_frames = QSpinBox()
+        self.watch_frames.setRange(0, 9999)
+        self.watch_frames.setSpecialValueText("learn")
+        self.watch_frames.setToolTip(
+            "Frames of each bracket. With \"learn\" the first bracket is\n"
+            "stacked after its last frame and sets the size of the next ones"
+        )
+        watch.addWidget(self.watch_frames)
+        layout.addLayout(watch)
+        self.watch_status = QLabel()
+        layout.addWidget(self.watch_status)
+
+        buttons = QHBoxLayout()
+        for label, slot in (
+            ("Move up", lambda: self.move_job(-1)),
+            ("Move down", lambda: self.move_job(1)),
+            ("Cancel job", self.cancel_job),
+            ("Clear finished", self.clear_finished_jobs),
+        ):
+            btn = QPushButton(label)
+            btn.clicked.connect(slot)
+            buttons.addWidget(btn)
+        layout.addLayout(buttons)
+
+        self.queue_summary = QLabel()
+        layout.addWidget(self.queue_summary)
+
+        # Durations and throughput tick while jobs run
+        self.queue_timer = QTimer(self)
+        self.queue_timer.setInterval(1000)
+        self.queue_timer.timeout.connect(self._refresh_queue)
+
+        tab.setLayout(layout)
+        self.tabs.addTab(tab, "Queue")
+        self._refresh_queue()
+
+    # ---------- HISTORY ----------
+    def _build_history_tab(self):
+        tab = QWidget()
+        layout = QVBoxLayout()
+
+        self.history = RunHistory()
+
+        self.history_table = QTableWidget(0, 9)
+        self.history_table.setHorizontalHeaderLabels(
+            ["Started", "Output", "Frames", "Size", "Status", "Duration",
+             "CPU time", "Peak RSS", "Read / Written"]
+        )
+        self.history_table.horizontalHeader().setSectionResizeMode(
+            1, QHeaderView.ResizeMode.Stretch
+        )
+        self.history_table.setSelectionBehavior(
+            QAbstractItemView.SelectionBehavior.SelectRows
+        )
+        self.history_table.setEditTriggers(
+            QAbstractItemView.EditTrigger.NoEditTriggers
+        )
+        layout.addWidget(self.history_table)
+
+        buttons = QHBoxLayout()
+        refresh_btn = QPushButton("Refresh")
+        refresh_btn.clicked.connect(self._refresh_history)
+        export_btn = QPushButton("Export Chrome trace")
+        export_btn.setToolTip(
+            "Save the selected run as Chrome trace JSON\n"
+            "Open it in chrome://tracing or ui.perfetto.dev"
+        )
+        export_btn.clicked.connect(self.export_trace)
+        buttons.addWidget(refresh_btn)
+        buttons.addWidget(export_btn)
+        layout.addLayout(buttons)
+
+        tab.setLayout(layout)
+        self.tabs.addTab(tab, "History")
+        self._refresh_history()
+
     def _build_help_tab(self):
         tab = QWidget()
         layout = QVBoxLayout()
@@ -429,56 +858,141 @@ class FocusStackGUI(QWidget):
         )
         
         if files:
-            self.images = files
-            self.image_list.clear()
-    
-            for file in files:
-                icon = QIcon(file)
-                item = QListWidgetItem(icon, os.path.basename(file))
-                item.setToolTip(file)  # affiche le chemin complet au survol
-                self.image_list.addItem(item)
-    
-            self.console.append(f"{len(files)} images selected.")
+            # Thumbnails are decoded in the background
+            self.image_model.set_paths(files)
+            self.console.appendPlainText(f"{len(files)} images selected.")
+
+    def add_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "Add Folder")
+        if not folder:
+            return
+
+        if getattr(self, "scanner", None) is not None:
+            self.scanner.stop()
+            self.scanner.wait()
+
+        # Only the frames of this folder are sorted when the scan ends
+        self.scan_start = len(self.image_model)
+        self.scanner = FolderScanner(folder)
+        self.scanner.batch_found.connect(self.image_model.append_paths)
+        self.scanner.finished.connect(self.on_folder_scanned)
+        self.scanner.start()
+
+    def on_folder_scanned(self):
+        # Directory order is arbitrary, focus order follows file names
+        self.image_model.sort_by_name(
+            min(self.scan_start, len(self.image_model))
+        )
+        self.console.appendPlainText(f"{len(self.image_model)} images selected.")
             
     def remove_selected_images(self):
-        selected_items = self.image_list.selectedItems()
+        rows = [i.row() for i in self.image_list.selectionModel().selectedRows()]
     
-        if not selected_items:
+        if not rows:
             return
     
-        for item in selected_items:
-            self.images.remove(item.text())
-            self.image_list.takeItem(self.image_list.row(item))
+        self.image_model.remove_rows(rows)
     
-        self.console.append("Selected images removed.")
+        self.console.appendPlainText(f"{len(rows)} selected images removed.")
 
-    def run_stack(self):
-        if not self.images:
-            self.console.append("No images selected.")
+    def select_roi(self):
+        images = self.images
+        if not images:
+            self.console.appendPlainText("No images selected.")
             return
-        
-        # Build output path
-        base_dir = self.output_dir.text()
-
-        if self.auto_subfolder.isChecked():
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            base_dir = os.path.join(base_dir, f"stack_{timestamp}")
-            os.makedirs(base_dir, exist_ok=True)
-
-        # ---- Auto filename based on first image ----
-        first_image = os.path.basename(self.images[0])
-        name_without_ext = os.path.splitext(first_image)[0]
-        name_without_ext = re.sub(r"[^\w\-]", "_", name_without_ext)
-        image_count = len(self.images)
-        
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
-        output_filename = f"{name_without_ext}_stack_{image_count}img_{timestamp}.jpg"
-        
-        output_path = os.path.join(base_dir, output_filename)
 
-        options = {
-            "output": output_path,
+        rows = self.image_list.selectionModel().selectedRows()
+        path = images[rows[0].row()] if rows else images[len(images) // 2]
+
+        dialog = RoiDialog(path, self.roi, self)
+        if dialog.exec() == QDialog.DialogCode.Accepted:
+            self.set_roi(dialog.roi())
+
+    def set_roi(self, roi):
+        self.roi = roi
+        if roi:
+            self.roi_label.setText(f"Region of interest: {format_roi(roi)}")
+        else:
+            self.roi_label.setText("Region of interest: full frame")
+
+    def analyze_sharpness(self):
+        images = self.images
+        if not images:
+            self.console.appendPlainText("No images selected.")
+            return
+
+        if self.sharpness is not None and self.sharpness.isRunning():
+            self.sharpness.stop()
+            return
+
+        self.sharpness = SharpnessWorker(images, self.roi)
+        self.sharpness.message_signal.connect(self.console.appendPlainText)
+        self.sharpness.finished_signal.connect(
+            lambda profiles: self.on_sharpness_finished(images, profiles)
+        )
+        self.sharpness_btn.setText("Stop analysis")
+        self.sharpness.start()
+
+    def on_sharpness_finished(self, images, profiles):
+        self.sharpness_btn.setText("Analyze sharpness")
+        if profiles is None:
+            self.sharpness_plot.clear()
+            self.culling = None
+            self.cull_btn.setEnabled(False)
+            return
+
+        empty, redundant = suggest_culling(profiles)
+        self.sharpness_plot.set_profile(frame_scores(profiles), empty, redundant)
+        self.culling = (images, empty + redundant)
+        self.cull_btn.setEnabled(bool(empty or redundant))
+        self.console.appendPlainText(
+            f"Sharpness: {len(empty)} empty and {len(redundant)} redundant "
+            f"frames out of {len(images)}"
+        )
+
+    def remove_suggested_frames(self):
+        images, rows = self.culling
+        self.cull_btn.setEnabled(False)
+        if images != self.images:
+            self.console.appendPlainText(
+                "The image list changed, analyze the sharpness again."
+            )
+            return
+
+        self.image_model.remove_rows(rows)
+        self.sharpness_plot.clear()
+        self.culling = None
+        self.console.appendPlainText(f"{len(rows)} suggested frames removed.")
+
+    def _build_output_path(self, images):
+        return default_output(
+            images, self.output_dir.text(), self.auto_subfolder.isChecked()
+        )
+
+    def _build_options(self, images, output=None):
+        options = self._form_options(images, output)
+
+        if self.use_tuned.isChecked():
+            tuned = self._tuned_values(images)
+            if tuned:
+                options.update(
+                    threads=tuned["threads"],
+                    batchsize=tuned["batchsize"],
+                    no_opencl=tuned["no_opencl"],
+                )
+
+        return options
+
+    def _tuned_values(self, images):
+        try:
+            info = probe_image(images[0])
+        except (OSError, ValueError):
+            return None
+        return TuningStore().lookup(info.width * info.height / 1e6)
+
+    def _form_options(self, images, output=None):
+        return {
+            "output": output or self._build_output_path(images),
             "global_align": self.global_align.isChecked(),
             "full_res_align": self.full_res_align.isChecked(),
             "no_align": self.no_align.isChecked(),
@@ -497,30 +1011,663 @@ class FocusStackGUI(QWidget):
             "batchsize": self.batchsize.value(),
             "no_opencl": self.no_opencl.isChecked(),
             "verbose": self.verbose.isChecked(),
+            "timeout": self.timeout.value() * 60,
+            "idle_timeout": self.idle_timeout.value() * 60,
+            "use_cache": self.use_cache.isChecked(),
+            "scratch": self.scratch.isChecked(),
+            "reuse_alignment": self.reuse_alignment.isChecked(),
+            "roi": self.roi,
+            "cull": self.cull.isChecked(),
+            "substacks": self.substacks.isChecked(),
+            "incremental": self.incremental.isChecked(),
+            "slab_size": self.slab_size.value(),
+            "slab_overlap": self.slab_overlap.value(),
         }
 
+    def _preflight(self, images):
+        """
+        Probe the frame headers before spending any CPU time.
+        Returns the frame ImageInfo, or None if the stack is rejected.
+        """
+        try:
+            info = probe_stack(images)
+        except PreflightError as e:
+            self.console.appendPlainText(f"Stack rejected: {e}")
+            QMessageBox.warning(self, "Stack rejected", str(e))
+            return None
+
+        self.console.appendPlainText(
+            f"{len(images)} frames, {info.width}x{info.height}, "
+            f"{info.channels} channels, {info.bit_depth} bit"
+        )
+        return info
+
+    def run_stack(self):
+        images = self.images
+        if not images:
+            self.console.appendPlainText("No images selected.")
+            return
+
+        info = self._preflight(images)
+        if info is None:
+            return
+
+        self._start_run(images, info, self._build_options(images))
+
+    def preview_stack(self):
+        images = self.images
+        if not images:
+            self.console.appendPlainText("No images selected.")
+            return
+
+        info = self._preflight(images)
+        if info is None:
+            return
+
+        os.makedirs(PREVIEW_DIR, exist_ok=True)
+        options = self._build_options(
+            images, output=os.path.join(PREVIEW_DIR, "preview.jpg")
+        )
+        # Sent on to a full resolution run if the preview is accepted
+        self.preview_request = (images, options)
+
+        options = dict(
+            options,
+            depthmap_file=os.path.join(
+                PREVIEW_DIR, os.path.basename(options["depthmap_file"])
+            ),
+            proxy_size=self.proxy_size.value(),
+            # Shown as soon as the run ends
+            scratch=False,
+        )
+        self._start_run(images, info, options, preview=True)
+
+    def _start_run(self, images, info, options, preview=False):
+        self.preview_run = preview
+        info = cropped_info(info, options.get("roi"))
+        if not preview:
+            budget = available_memory()
+            fitted = fit_options(info, len(images), options, budget)
+            if fitted is None:
+                fitted = dict(options, batchsize=MIN_BATCHSIZE, threads=1)
+                self.console.appendPlainText(
+                    "Warning: estimated memory "
+                    f"{estimate_peak_memory(info, len(images), fitted) / 2**30:.1f} GB "
+                    f"exceeds the {budget / 2**30:.1f} GB available."
+                )
+            elif fitted != options:
+                self.console.appendPlainText(
+                    f"Memory: batch size reduced to {fitted['batchsize']}, "
+                    f"threads to {fitted['threads']}."
+                )
+            options = fitted
+
         self.progress.setValue(0)
-        self.console.append("Starting Focus-stack...\n")
-        self.console.append(f"Working directory: {os.getcwd()}")
+        self.console.appendPlainText("Starting Focus-stack...\n")
+        self.console.appendPlainText(f"Working directory: {os.getcwd()}")
         
-        self.worker = FocusStackWorker(self.images, options)
+        worker_class = (
+            DaemonJobWorker if self.use_daemon.isChecked() else FocusStackWorker
+        )
+        self.worker = worker_class(images, options, PRIORITY_INTERACTIVE)
 
-        self.worker.output_signal.connect(self.console.append)
+        self.worker.output_signal.connect(self.console.appendPlainText)
         self.worker.progress_signal.connect(self.progress.setValue)
+        self.worker.status_signal.connect(
+            lambda text: self.progress.setFormat(f"%p%  {text}")
+        )
         self.worker.finished_signal.connect(self.on_finished)
+        self.worker.recorded_signal.connect(self._refresh_history)
+        self.worker.published_signal.connect(self.on_published)
+        self.view_pending = False
 
         self.cancel_btn.setEnabled(True)
         self.run_btn.setEnabled(False)
+        self.preview_btn.setEnabled(False)
 
         self.worker.start()
     
     def cancel_stack(self):
         if hasattr(self, "worker"):
             self.worker.stop()
-            self.console.append("Process cancelled.")
             
-    def on_finished(self):
-        self.progress.setValue(100)
-        self.console.append("\nProcess finished.")
+    def on_finished(self, returncode, status):
+        if status == STATUS_OK:
+            self.progress.setValue(100)
+            self.console.appendPlainText("\nProcess finished.")
+        elif status == STATUS_CANCELLED:
+            self.console.appendPlainText("\nProcess cancelled.")
+        else:
+            self.console.appendPlainText(
+                f"\nProcess FAILED ({status}, exit code {returncode})."
+            )
+            QMessageBox.warning(
+                self, "Focus-stack failed",
+                f"focus-stack ended with status '{status}' "
+                f"(exit code {returncode}).\nSee the console for details."
+            )
+        self.progress.setFormat("%p%")
         self.cancel_btn.setEnabled(False)
         self.run_btn.setEnabled(True)
+        self.preview_btn.setEnabled(True)
+
+        if self.preview_run and status == STATUS_OK:
+            self.show_preview()
+        elif (status == STATUS_OK and self.view_results.isChecked()
+                and not self.worker.options["align_only"]):
+            self.view_result()
+
+    def on_published(self, error):
+        if self.view_pending and not error:
+            self.view_result()
+        self.view_pending = False
+
+    def view_result(self):
+        """
+        Open the result of the last run in the viewer, compared with its
+        depthmap. A result staged on the scratch disk opens once it is
+        published.
+        """
+        options = self.worker.options
+        output = options["output"]
+        if not os.path.exists(output):
+            self.view_pending = True
+            return
+
+        depthmap = None
+        if options["depthmap"]:
+            depthmap = os.path.abspath(options["depthmap_file"])
+            if not os.path.exists(depthmap):
+                depthmap = None
+        try:
+            viewer = ResultViewer(output, depthmap, self)
+        except OSError as e:
+            self.console.appendPlainText(f"Cannot view the result: {e}")
+            return
+        viewer.show()
+
+    def show_preview(self):
+        """
+        Show the preview result. Its options can be sent on unchanged
+        to a full resolution run or to the queue.
+        """
+        images, options = self.preview_request
+
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Preview")
+        layout = QVBoxLayout()
+
+        label = QLabel()
+        pixmap = QPixmap(self.worker.options["output"])
+        label.setPixmap(pixmap.scaled(
+            QSize(1000, 700), Qt.AspectRatioMode.KeepAspectRatio,
+            Qt.TransformationMode.SmoothTransformation
+        ))
+        layout.addWidget(label)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Close)
+        full_btn = buttons.addButton(
+            "Run full resolution", QDialogButtonBox.ButtonRole.AcceptRole
+        )
+        queue_btn = buttons.addButton(
+            "Add to Queue", QDialogButtonBox.ButtonRole.ActionRole
+        )
+        buttons.rejected.connect(dialog.reject)
+        layout.addWidget(buttons)
+        dialog.setLayout(layout)
+
+        def run_full():
+            dialog.accept()
+            info = self._preflight(images)
+            if info is not None:
+                self._start_run(
+                    images, info,
+                    dict(options, output=self._build_output_path(images))
+                )
+
+        def enqueue():
+            dialog.accept()
+            info = self._preflight(images)
+            if info is not None:
+                self._enqueue(
+                    images, info,
+                    dict(options, output=self._build_output_path(images))
+                )
+
+        full_btn.clicked.connect(run_full)
+        queue_btn.clicked.connect(enqueue)
+        dialog.open()
+
+    # ---------- QUEUE ACTIONS ----------
+    def add_to_queue(self):
+        images = self.images
+        if not images:
+            self.console.appendPlainText("No images selected.")
+            return
+
+        info = self._preflight(images)
+        if info is None:
+            return
+
+        self._enqueue(images, info, self._build_options(images))
+
+    def _enqueue(self, images, info, options):
+        if self.use_daemon.isChecked():
+            try:
+                job_id = self.daemon.submit(
+                    images, options, self.job_priority.currentData()
+                )
+            except (OSError, ValueError, DaemonError) as e:
+                self.console.appendPlainText(f"Job daemon: {e}")
+                return
+            self.console.appendPlainText(f"Daemon job {job_id} queued")
+            return
+
+        info = cropped_info(info, options.get("roi"))
+        job = self.job_queue.add(
+            Job(
+                images, options, info=info,
+                priority=self.job_priority.currentData()
+            )
+        )
+        self.console.appendPlainText(f"Job {job.id} queued: {job.name}")
+        self._pump_queue()
+
+    def detect_stacks(self):
+        if self.stack_scan is not None and self.stack_scan.isRunning():
+            self.stack_scan.stop()
+            return
+
+        folder = QFileDialog.getExistingDirectory(
+            self, "Select capture folder", self.output_dir.text()
+        )
+        if not folder:
+            return
+
+        self.stack_scan = StackScanWorker(folder)
+        self.stack_scan.message_signal.connect(self.console.appendPlainText)
+        self.stack_scan.finished_signal.connect(
+            lambda captures: self.on_stacks_scanned(folder, captures)
+        )
+        self.detect_btn.setText("Stop scanning")
+        self.console.appendPlainText(f"Reading capture data in {folder}")
+        self.stack_scan.start()
+
+    def on_stacks_scanned(self, folder, captures):
+        self.detect_btn.setText("Detect stacks in folder")
+        if not captures:
+            self.console.appendPlainText("No stacks detected.")
+            return
+
+        dialog = StackDialog(folder, captures, self)
+        if dialog.exec() != QDialog.DialogCode.Accepted:
+            return
+
+        for images in dialog.selected_stacks():
+            try:
+                info = probe_stack(images)
+            except PreflightError as e:
+                self.console.appendPlainText(
+                    f"Stack {os.path.basename(images[0])} skipped: {e}"
+                )
+                continue
+            # The region of interest belongs to the stack it was drawn on
+            options = dict(self._build_options(images), roi=None)
+            self._enqueue(images, info, options)
+
+    def on_watch_toggled(self, checked):
+        if not checked:
+            if self.watch_worker is not None:
+                self.watch_worker.stop()
+                self.watch_worker.wait()
+                self.watch_worker = None
+            self.watch_btn.setText("Watch folder")
+            self.watch_status.clear()
+            self.console.appendPlainText("Stopped watching.")
+            return
+
+        folder = QFileDialog.getExistingDirectory(
+            self, "Select tethered capture folder", self.output_dir.text()
+        )
+        if not folder:
+            self.watch_btn.setChecked(False)
+            return
+
+        # The session names the output of each bracket
+        options = dict(
+            self._form_options([], self.output_dir.text()), roi=None
+        )
+        self.watch_worker = WatchWorker(
+            folder, options, self.output_dir.text(),
+            self.auto_subfolder.isChecked(), self.watch_frames.value(),
+            self.verbose.isChecked(),
+        )
+        self.watch_worker.message_signal.connect(self.console.appendPlainText)
+        self.watch_worker.status_signal.connect(
+            lambda name, text: self.watch_status.setText(f"{name}: {text}")
+        )
+        self.watch_worker.stacked_signal.connect(self.on_bracket_stacked)
+        self.watch_btn.setText("Stop watching")
+        self.watch_worker.start()
+
+    def on_bracket_stacked(self, images, output, returncode, run_status):
+        name = os.path.basename(images[0])
+        self.watch_status.clear()
+        if run_status == STATUS_OK:
+            self.console.appendPlainText(
+                f"Bracket {name} ({len(images)} frames) stacked: {output}"
+            )
+        else:
+            self.console.appendPlainText(
+                f"Bracket {name}: {run_status}, exit code {returncode}"
+            )
+
+    def on_daemon_toggled(self, checked):
+        if self.daemon_watcher is not None:
+            self.daemon_watcher.stop()
+            self.daemon_watcher.wait()
+            self.daemon_watcher = None
+        self.daemon_jobs = []
+        self.daemon_summary = None
+
+        if checked:
+            if not self.daemon.available():
+                self.console.appendPlainText(
+                    "No job daemon is running, start daemon.py first."
+                )
+                self.use_daemon.setChecked(False)
+                return
+            self.daemon_watcher = DaemonWatcher(self.daemon)
+            self.daemon_watcher.event_signal.connect(self.on_daemon_event)
+            self.daemon_watcher.closed_signal.connect(self.on_daemon_closed)
+            self.daemon_watcher.start()
+            self.console.appendPlainText(
+                f"Attached to the job daemon at {self.daemon.path}"
+            )
+
+        # Parallel jobs are set by the daemon
+        self.max_parallel.setEnabled(not checked)
+        self.start_queue_btn.setEnabled(not checked)
+        self._refresh_queue()
+
+    def on_daemon_event(self, event):
+        kind = event["event"]
+        if kind == "jobs":
+            self.daemon_jobs = [RemoteJob(**job) for job in event["jobs"]]
+            self.daemon_summary = event["summary"]
+            self._refresh_queue()
+        elif kind == "output":
+            # The output of our own run already goes to the console
+            worker = getattr(self, "worker", None)
+            if getattr(worker, "job_id", None) == event["job"]:
+                return
+            self.console.appendPlainText("\n".join(
+                f"[daemon job {event['job']}] {line}"
+                for line in event["text"].split("\n")
+            ))
+        elif kind == "recorded":
+            self._refresh_history()
+
+    def on_daemon_closed(self):
+        if self.use_daemon.isChecked() and self.daemon_watcher is not None:
+            self.console.appendPlainText("Lost the connection to the job daemon.")
+            self.daemon_watcher = None
+            self.use_daemon.setChecked(False)
+
+    def on_queue_toggled(self, checked):
+        self.queue_running = checked
+        self.start_queue_btn.setText("Pause queue" if checked else "Start queue")
+        self._pump_queue()
+
+    def _pump_queue(self):
+        # Queue several jobs before starting so the first one does not
+        # take every core for itself
+        to_start = self.job_queue.schedule() if self.queue_running else []
+
+        for job in to_start:
+            worker = FocusStackWorker(job.images, job.options, job.priority)
+
+            worker.output_signal.connect(
+                lambda text, jid=job.id: self.console.appendPlainText(
+                    "\n".join(f"[job {jid}] {l}" for l in text.split("\n"))
+                )
+            )
+            worker.status_signal.connect(
+                lambda text, j=job: setattr(j, "progress", text)
+            )
+            worker.finished_signal.connect(
+                lambda code, status, jid=job.id:
+                    self.on_job_finished(jid, code, status)
+            )
+
+            worker.recorded_signal.connect(self._refresh_history)
+
+            self.job_workers[job.id] = worker
+            self.job_queue.mark_started(job)
+            self.console.appendPlainText(
+                f"Job {job.id} started with {job.threads} threads, "
+                f"batch size {job.options['batchsize']}, "
+                f"~{job.memory / 2**30:.1f} GB. {job.note}"
+            )
+            worker.start()
+
+        if self.queue_running:
+            prefetch_next(self.job_queue)
+        if not self.job_queue.running():
+            self.queue_timer.stop()
+        else:
+            self.queue_timer.start()
+
+        self._refresh_queue()
+
+    def on_job_finished(self, job_id, returncode, run_status):
+        job = self.job_queue.get(job_id)
+        worker = self.job_workers.pop(job_id, None)
+        if worker is not None:
+            worker.wait()
+
+        if job is not None:
+            if run_status == STATUS_OK:
+                status = DONE
+            elif run_status == STATUS_CANCELLED:
+                status = CANCELLED
+            else:
+                status = FAILED
+                job.note = f"{run_status}, exit code {returncode}"
+            self.job_queue.mark_finished(job, status)
+            self.console.appendPlainText(f"Job {job_id} {status.lower()}. {job.note}")
+
+        self._pump_queue()
+
+    def _selected_job_id(self):
+        row = self.queue_table.currentRow()
+        if row < 0:
+            return None
+        return self.queue_table.item(row, 0).data(
+            Qt.ItemDataRole.UserRole
+        )
+
+    def move_job(self, offset):
+        job_id = self._selected_job_id()
+        if job_id is None or self.use_daemon.isChecked():
+            return
+
+        self.job_queue.move(job_id, offset)
+        self._refresh_queue()
+
+        job = self.job_queue.get(job_id)
+        self.queue_table.selectRow(self.job_queue.jobs.index(job))
+
+    def cancel_job(self):
+        job_id = self._selected_job_id()
+        if job_id is None:
+            return
+
+        if self.use_daemon.isChecked():
+            try:
+                self.daemon.cancel(job_id)
+            except (OSError, ValueError, DaemonError) as e:
+                self.console.appendPlainText(f"Job daemon: {e}")
+            return
+
+        job = self.job_queue.cancel(job_id)
+        if job is not None and job.status == RUNNING:
+            job.status = CANCELLED
+            self.job_workers[job_id].stop()
+
+        self._refresh_queue()
+
+    def clear_finished_jobs(self):
+        if self.use_daemon.isChecked():
+            try:
+                self.daemon.clear_finished()
+            except (OSError, ValueError, DaemonError) as e:
+                self.console.appendPlainText(f"Job daemon: {e}")
+            return
+        self.job_queue.clear_finished()
+        self._refresh_queue()
+
+    def on_max_parallel_changed(self, value):
+        self.job_queue.max_parallel = value
+        self._pump_queue()
+
+    def _refresh_queue(self):
+        if self.use_daemon.isChecked():
+            jobs, s = self.daemon_jobs, self.daemon_summary
+        else:
+            jobs, s = self.job_queue.jobs, self.job_queue.summary()
+        self.queue_table.setRowCount(len(jobs))
+
+        for row, job in enumerate(jobs):
+            values = (
+                job.name,
+                str(job.frames),
+                str(job.threads or ""),
+                PRIORITY_NAMES[job.priority],
+                f"{job.status} ({job.note})" if job.note else job.status,
+                job.progress if job.status == RUNNING else "",
+                f"{job.duration:.0f} s" if job.started else "",
+            )
+            for col, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                item.setData(Qt.ItemDataRole.UserRole, job.id)
+                self.queue_table.setItem(row, col, item)
+
+        if s is None:
+            self.queue_summary.setText("")
+            return
+        self.queue_summary.setText(
+            f"{s['done']}/{s['total']} done, {s['running']} running, "
+            f"{s['pending']} pending, {s['failed']} failed, "
+            f"{s['cancelled']} cancelled  |  "
+            f"{s['jobs_per_hour']:.1f} jobs/h, "
+            f"{s['frames_per_minute']:.1f} frames/min"
+        )
+
+    # ---------- HISTORY ACTIONS ----------
+    def _refresh_history(self):
+        runs = self.history.recent_runs()
+        self.history_table.setRowCount(len(runs))
+
+        for row, run in enumerate(runs):
+            size = f"{run['width']}x{run['height']}" if run["width"] else ""
+            values = (
+                run["started"].replace("T", " "),
+                os.path.basename(run["output"] or ""),
+                str(run["frames"]),
+                size,
+                run["status"],
+                f"{run['duration'] or 0:.1f} s",
+                f"{run['cpu_seconds'] or 0:.1f} s",
+                f"{(run['peak_rss'] or 0) / 2**20:.0f} MB",
+                f"{(run['read_bytes'] or 0) / 2**20:.0f} / "
+                f"{(run['write_bytes'] or 0) / 2**20:.0f} MB",
+            )
+            for col, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                item.setData(Qt.ItemDataRole.UserRole, run["id"])
+                self.history_table.setItem(row, col, item)
+
+    def export_trace(self):
+        row = self.history_table.currentRow()
+        if row < 0:
+            return
+        run_id = self.history_table.item(row, 0).data(Qt.ItemDataRole.UserRole)
+
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Export Chrome trace", f"focusstack_run_{run_id}.json",
+            "Chrome trace (*.json)"
+        )
+        if path:
+            self.history.export_chrome_trace(run_id, path)
+            self.console.appendPlainText(f"Trace written to {path}")
+
+    # ---------- AUTOTUNE ----------
+    def autotune(self):
+        images = self.images
+        if not images:
+            self.console.appendPlainText("Autotune needs a selected stack.")
+            return
+
+        if getattr(self, "tuner", None) is not None and self.tuner.isRunning():
+            self.tuner.stop()
+            return
+
+        # The trials write to a temporary folder: no output folder is made
+        self.tuner = AutotuneWorker(
+            images, self._form_options(images, output=os.devnull)
+        )
+        self.tuner.message_signal.connect(self.console.appendPlainText)
+        self.tuner.finished_signal.connect(self.on_autotune_finished)
+        self.autotune_btn.setText("Stop autotune")
+        self.tuner.start()
+
+    def on_autotune_finished(self, tuned):
+        self.autotune_btn.setText("Autotune")
+        if tuned is None:
+            self.console.appendPlainText("Autotune: no result.")
+            return
+
+        self.console.appendPlainText(
+            f"Autotune: threads={tuned['threads']} "
+            f"batchsize={tuned['batchsize']} "
+            f"opencl={'off' if tuned['no_opencl'] else 'on'} "
+            f"({tuned['seconds']:.2f} s for {tuned['frames']} frames)"
+        )
+        self.threads.setValue(tuned["threads"])
+        self.batchsize.setValue(tuned["batchsize"])
+        self.no_opencl.setChecked(tuned["no_opencl"])
+
+    def closeEvent(self, event):
+        # The publishing thread dies with the window: a result being copied
+        # from the scratch disk would stay there, unannounced
+        if publisher.pending and not self.quitting:
+            answer = QMessageBox.question(
+                self, "Results not published yet",
+                "Results are still being copied from the scratch disk to "
+                "their output folder. Wait for them before quitting?\n\n"
+                "Quitting now leaves them in the scratch area "
+                f"({scratch.outputs}).",
+                QMessageBox.StandardButton.Yes
+                | QMessageBox.StandardButton.No
+                | QMessageBox.StandardButton.Cancel,
+            )
+            if answer == QMessageBox.StandardButton.Cancel:
+                event.ignore()
+                return
+            if answer == QMessageBox.StandardButton.Yes:
+                self.quitting = True
+                self.console.appendPlainText(
+                    "Quitting once the results are published..."
+                )
+                self.quit_timer = QTimer(self)
+                self.quit_timer.timeout.connect(self._quit_when_published)
+                self.quit_timer.start(200)
+                event.ignore()
+                return
+        super().closeEvent(event)
+
+    def _quit_when_published(self):
+        if not publisher.pending:
+            self.quit_timer.stop()
+            self.close()
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 26 14:05:31 2026
+
+@author: Robert Becht (roblin67@gmail.com)
+
+Watch-folder mode for tethered capture.
+
+Frames written into the watched folder are grouped into brackets: a
+pause longer than the gap or a break in the file numbering starts a new
+one. Once the bracket size is known (set, or learned from the previous
+bracket), focus-stack starts at the first frame of a bracket with the
+names of the frames still to come, predicted from the camera numbering,
+and --wait-images, so loading and aligning overlap with the capture.
+A bracket that ends early is stacked again with the frames that arrived;
+the frame after the last planned one starts a new bracket.
+
+New files are seen through inotify on Linux, by polling elsewhere.
+Does not import Qt.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import re
+import select
+import struct
+import threading
+import time
+
+from stackjob import StackJob
+from stackdetect import STACK_MIN_FRAMES
+from imageinfo import IMAGE_EXTENSIONS
+from runner import default_output
+from supervisor import STATUS_CANCELLED
+from config import STACK_GAP_SECONDS, WATCH_WAIT_SECONDS, WATCH_POLL_SECONDS
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+# struct inotify_event: wd, mask, cookie, len, then the name
+_EVENT = struct.Struct("iIII")
+
+# Options of a run that starts before its frames exist
+STREAMING_OPTIONS = {
+    "use_cache": False,
+    "reuse_alignment": False,
+    "cull": False,
+    "roi": None,
+    "proxy_size": None,
+    "substacks": False,
+    "incremental": False,
+    "scratch": False,
+}
+
+_NUMBERED = re.compile(r"^(.*?)(\d+)(\D*)$")
+
+
+def _ignore(*args):
+    pass
+
+
+class InotifyWatcher:
+    """
+    Names of the files written (closed) or moved into folder.
+    Raises OSError where inotify is not available.
+    """
+
+    def __init__(self, folder):
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            init, add_watch = libc.inotify_init1, libc.inotify_add_watch
+        except (OSError, AttributeError) as e:
+            raise OSError(f"inotify unavailable: {e}") from e
+
+        self.fd = init(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if add_watch(self.fd, os.fsencode(folder),
+                     IN_CLOSE_WRITE | IN_MOVED_TO) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, os.strerror(errno), folder)
+
+    def read(self, timeout):
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        names = []
+        pos = 0
+        while pos + _EVENT.size <= len(data):
+            length = _EVENT.unpack_from(data, pos)[3]
+            pos += _EVENT.size
+            name = data[pos:pos + length].rstrip(b"\0")
+            pos += length
+            if name:
+                names.append(os.fsdecode(name))
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """
+    Names of the new files of folder whose size did not change between
+    two polls. Files present at the start are ignored.
+    """
+
+    def __init__(self, folder, interval=WATCH_POLL_SECONDS):
+        self.folder = folder
+        self.interval = interval
+        self.sizes = self._sizes()
+        self.reported = set(self.sizes)
+
+    def _sizes(self):
+        sizes = {}
+        with os.scandir(self.folder) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_file():
+                        sizes[entry.name] = entry.stat().st_size
+                except OSError:
+                    pass
+        return sizes
+
+    def read(self, timeout):
+        time.sleep(min(timeout, self.interval))
+        sizes = self._sizes()
+        names = sorted(
+            name for name, size in sizes.items()
+            if name not in self.reported and self.sizes.get(name) == size
+        )
+        self.reported.update(names)
+        self.sizes = sizes
+        return names
+
+    def close(self):
+        pass
+
+
+def open_watcher(folder):
+    try:
+        return InotifyWatcher(folder)
+    except OSError:
+        return PollingWatcher(folder)
+
+
+def next_names(path, count):
+    """
+    The count paths following path in the camera numbering
+    (IMG_0099.JPG -> IMG_0100.JPG ...), or [] if its name has no number.
+    """
+    folder, name = os.path.split(path)
+    stem, ext = os.path.splitext(name)
+    match = _NUMBERED.match(stem)
+    if not match:
+        return []
+    prefix, digits, suffix = match.groups()
+    start, width = int(digits), len(digits)
+    return [
+        os.path.join(folder, f"{prefix}{start + i:0{width}d}{suffix}{ext}")
+        for i in range(1, count + 1)
+    ]
+
+
+class _Bracket:
+    def __init__(self, first):
+        self.frames = [first]
+        self.last = time.monotonic()
+        # Frames of the streaming run, None when stacked at the end
+        self.planned = None
+        self.job = None
+
+
+class WatchSession:
+    """
+    Stacks the brackets captured into folder until stop() is called.
+    frames is the bracket size, 0 to learn it from the first bracket.
+
+    Callbacks, called from the watching and the job threads:
+
+    on_output(text): session messages and, with verbose, job output
+    on_status(images, text): stage, frames and ETA of a job
+    on_finished(images, output, exit code, supervisor status)
+    """
+
+    def __init__(self, folder, options, output_dir, subfolder=True,
+                 frames=0, gap=STACK_GAP_SECONDS, verbose=False,
+                 on_output=_ignore, on_status=_ignore, on_finished=_ignore):
+        self.folder = os.path.abspath(folder)
+        self.options = options
+        self.output_dir = output_dir
+        self.subfolder = subfolder
+        self.frames = frames
+        self.gap = gap
+        self.verbose = verbose
+        self.on_output = on_output
+        self.on_status = on_status
+        self.on_finished = on_finished
+
+        self.learned = 0
+        self.bracket = None
+        self.running = {}
+        self._stopped = threading.Event()
+
+    def stop(self):
+        self._stopped.set()
+
+    def run(self):
+        """
+        Watch until stop(), then cancel the running jobs.
+        Raises OSError if the folder cannot be watched.
+        """
+        watcher = open_watcher(self.folder)
+        how = "inotify" if isinstance(watcher, InotifyWatcher) else "polling"
+        self.on_output(f"Watching {self.folder} for new frames ({how})")
+        try:
+            while not self._stopped.is_set():
+                for name in watcher.read(WATCH_POLL_SECONDS):
+                    if name.lower().endswith(IMAGE_EXTENSIONS):
+                        self._on_frame(os.path.join(self.folder, name))
+                bracket = self.bracket
+                if bracket and time.monotonic() - bracket.last > self.gap:
+                    self._close()
+                self._reap()
+        finally:
+            watcher.close()
+            for job, thread in self.running.values():
+                job.stop()
+            for job, thread in list(self.running.values()):
+                thread.join()
+
+    def _follows(self, bracket, path):
+        numbered = next_names(bracket.frames[-1], 1)
+        return not numbered or numbered[0] == path
+
+    def _on_frame(self, path):
+        bracket = self.bracket
+        if bracket and path in bracket.frames:
+            return
+        if bracket and (time.monotonic() - bracket.last > self.gap
+                        or not self._follows(bracket, path)):
+            self._close()
+            bracket = None
+        if bracket is None:
+            self._open(path)
+            return
+
+        bracket.frames.append(path)
+        bracket.last = time.monotonic()
+        if bracket.planned is None:
+            return
+        if bracket.frames == bracket.planned:
+            self.on_output(
+                f"Last frame {os.path.basename(path)} of the bracket arrived"
+            )
+            # The next frame starts a new bracket, also with a learned size
+            self.bracket = None
+        elif len(bracket.frames) > len(bracket.planned):
+            self.on_output(
+                f"More than {len(bracket.planned)} frames, the bracket is "
+                "stacked again when it ends"
+            )
+            bracket.job.stop()
+            bracket.planned = None
+
+    def _open(self, path):
+        bracket = self.bracket = _Bracket(path)
+        expected = self.frames or self.learned
+        upcoming = next_names(path, expected - 1) if expected > 1 else []
+        if not upcoming:
+            self.on_output(
+                f"New bracket at {os.path.basename(path)}, "
+                "stacked when it ends"
+            )
+            return
+
+        bracket.planned = [path] + upcoming
+        self.on_output(
+            f"New bracket at {os.path.basename(path)}: stacking "
+            f"{expected} frames while they arrive"
+        )
+        bracket.job = self._start(bracket.planned, streaming=True)
+
+    def _close(self):
+        bracket = self.bracket
+        self.bracket = None
+        count = len(bracket.frames)
+        if bracket.frames == bracket.planned:
+            return
+        if bracket.planned is not None:
+            bracket.job.stop()
+        if count < STACK_MIN_FRAMES:
+            self.on_output(
+                f"Ignored {count} frames from "
+                f"{os.path.basename(bracket.frames[0])}: not a bracket"
+            )
+            return
+        if not self.frames:
+            self.learned = count
+        if bracket.planned is not None:
+            self.on_output(
+                f"The bracket ended after {count} of "
+                f"{len(bracket.planned)} frames, stacking it again"
+            )
+        self._start(bracket.frames, streaming=False)
+
+    def _start(self, images, streaming):
+        options = dict(self.options)
+        if streaming:
+            options.update(STREAMING_OPTIONS, wait_images=WATCH_WAIT_SECONDS)
+        options["output"] = default_output(
+            images, self.output_dir, self.subfolder
+        )
+
+        def on_finished(code, status):
+            if status != STATUS_CANCELLED or not streaming:
+                self.on_finished(images, options["output"], code, status)
+
+        job = StackJob(
+            images, options,
+            on_output=self.on_output if self.verbose else _ignore,
+            on_status=lambda text: self.on_status(images, text),
+            on_finished=on_finished,
+            on_published=lambda error: error and self.on_output(
+                f"Could not publish the result: {error}"
+            ),
+        )
+        thread = threading.Thread(target=job.run, daemon=True)
+        self.running[id(job)] = (job, thread)
+        thread.start()
+        return job
+
+    def _reap(self):
+        for key, (job, thread) in list(self.running.items()):
+            if not thread.is_alive():
+                thread.join()
+                del self.running[key]
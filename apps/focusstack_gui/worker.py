@@ -6,59 +6,379 @@ Created on Mon Feb 23 09:40:24 2026
 @author: Robert Becht (roblin67@gmail.com)
 """
 
+import os
+import threading
+
 from PyQt6.QtCore import QThread, pyqtSignal
-from runner import build_command, run_process
-import re
+from priority import PRIORITY_NORMAL
+from imageinfo import probe_image
+from autotune import Autotuner, TuningStore
+from sharpness import SharpnessIndex
+from stackdetect import CaptureIndex
+from stackjob import StackJob
+from daemonclient import DaemonClient, DaemonError
+from watchfolder import WatchSession
+from binaries import BinaryNotFound, focus_stack
+from supervisor import STATUS_FAILED, STATUS_OK
+import sqlite3
 
 
 class FocusStackWorker(QThread):
+    """
+    Runs a StackJob in a thread and reports it through signals.
+    """
+
+    # Blocks of one or more lines, coalesced by LogSink
     output_signal = pyqtSignal(str)
     progress_signal = pyqtSignal(int)
-    finished_signal = pyqtSignal()
+    # Stage, frames and ETA, about once per second
+    status_signal = pyqtSignal(str)
+    # (exit code, supervisor status: ok / failed / cancelled / timeout / stalled)
+    finished_signal = pyqtSignal(int, str)
+    # Id of the run in the history database
+    recorded_signal = pyqtSignal(int)
+    # Result copied from the scratch area: "" or the error text
+    published_signal = pyqtSignal(str)
 
-    def __init__(self, images, options):
+    def __init__(self, images, options, priority=PRIORITY_NORMAL):
+        super().__init__()
+        self.images = images
+        self.options = options
+        self.priority = priority
+        self.job = None
+        self._stopped = False
+
+    def run(self):
+        # Not on the GUI thread: the first job can wait for the binary
+        # to be resolved (an AppImage extracted)
+        self.job = StackJob(
+            self.images, self.options, self.priority,
+            on_output=self.output_signal.emit,
+            on_progress=self.progress_signal.emit,
+            on_status=self.status_signal.emit,
+            on_finished=self.finished_signal.emit,
+            on_recorded=self.recorded_signal.emit,
+            on_published=lambda error: self.published_signal.emit(error or ""),
+        )
+        if self._stopped:
+            self.job.stop()
+        self.job.run()
+
+    def stop(self):
+        self._stopped = True
+        if self.job is not None:
+            self.job.stop()
+
+
+class DaemonJobWorker(QThread):
+    """
+    Runs a stack on the shared job daemon, with the signals of
+    FocusStackWorker.
+    """
+
+    output_signal = pyqtSignal(str)
+    progress_signal = pyqtSignal(int)
+    status_signal = pyqtSignal(str)
+    finished_signal = pyqtSignal(int, str)
+    recorded_signal = pyqtSignal(int)
+    published_signal = pyqtSignal(str)
+
+    def __init__(self, images, options, priority=PRIORITY_NORMAL, client=None):
         super().__init__()
         self.images = images
         self.options = options
-        self._running = True
+        self.priority = priority
+        self.client = client or DaemonClient()
+        self.job_id = None
+        self._cancelled = False
+
+    def run(self):
+        try:
+            self.job_id, stream = self.client.submit_watch(
+                self.images, self.options, self.priority
+            )
+        except (OSError, ValueError, DaemonError) as e:
+            self.output_signal.emit(f"Job daemon: {e}")
+            self.finished_signal.emit(-1, STATUS_FAILED)
+            return
+        if self._cancelled:
+            self.stop()
+
+        finished = published = False
+        try:
+            for event in stream:
+                kind = event["event"]
+                if kind == "output":
+                    self.output_signal.emit(event["text"])
+                elif kind == "progress":
+                    self.progress_signal.emit(event["percent"])
+                elif kind == "jobs":
+                    for job in event["jobs"]:
+                        if job["id"] == self.job_id and job["progress"]:
+                            self.status_signal.emit(job["progress"])
+                elif kind == "recorded":
+                    self.recorded_signal.emit(event["run"])
+                elif kind == "finished":
+                    self.finished_signal.emit(
+                        event["returncode"], event["status"]
+                    )
+                    # With "scratch", published can still be to come
+                    if (event["status"] != STATUS_OK or published
+                            or not self.options.get("scratch")):
+                        return
+                    finished = True
+                elif kind == "published":
+                    self.published_signal.emit(event["error"] or "")
+                    published = True
+                    if finished:
+                        return
+        finally:
+            stream.close()
+        if finished:
+            return
+
+        self.output_signal.emit("Lost the connection to the job daemon.")
+        self.finished_signal.emit(-1, STATUS_FAILED)
+
+    def stop(self):
+        self._cancelled = True
+        if self.job_id is None:
+            return
+        try:
+            self.client.cancel(self.job_id)
+        except (OSError, ValueError, DaemonError) as e:
+            self.output_signal.emit(f"Job daemon: {e}")
+
+
+class DaemonWatcher(QThread):
+    """
+    Streams the events of every job of the shared daemon.
+    """
+
+    # Event dicts, see daemon.py
+    event_signal = pyqtSignal(object)
+    # Emitted when the connection ends
+    closed_signal = pyqtSignal()
+
+    def __init__(self, client=None):
+        super().__init__()
+        self.client = client or DaemonClient()
+        self.stream = None
+        self._stopped = False
+
+    def run(self):
+        try:
+            self.stream = self.client.watch()
+        except (OSError, ValueError, DaemonError):
+            self.closed_signal.emit()
+            return
+        if self._stopped:
+            self.stream.close()
+
+        for event in self.stream:
+            self.event_signal.emit(event)
+        self.stream.close()
+        self.closed_signal.emit()
+
+    def stop(self):
+        self._stopped = True
+        if self.stream is not None:
+            self.stream.close()
+
+
+class SharpnessWorker(QThread):
+    # Tile profiles of the frames (list of lists), or None
+    finished_signal = pyqtSignal(object)
+    message_signal = pyqtSignal(str)
+
+    def __init__(self, images, roi=None):
+        super().__init__()
+        self.images = images
+        self.roi = roi
+        self._cancelled = False
+
+    def run(self):
+        try:
+            profiles = SharpnessIndex().profiles(
+                self.images, self.roi, lambda: self._cancelled
+            )
+        except (sqlite3.Error, OSError) as e:
+            self.message_signal.emit(f"Sharpness analysis failed: {e}")
+            profiles = None
+        self.finished_signal.emit(profiles)
+
+    def stop(self):
+        self._cancelled = True
+
+
+class StackScanWorker(QThread):
+    # (path, CaptureInfo) of the folder images, or None
+    finished_signal = pyqtSignal(object)
+    message_signal = pyqtSignal(str)
+
+    def __init__(self, folder):
+        super().__init__()
+        self.folder = folder
+        self._cancelled = False
+
+    def run(self):
+        captures = None
+        try:
+            captures = CaptureIndex().scan(
+                self.folder, lambda: self._cancelled
+            )
+        except (sqlite3.Error, OSError) as e:
+            self.message_signal.emit(f"Folder scan failed: {e}")
+        finally:
+            # The Detect button waits for it
+            self.finished_signal.emit(captures)
+
+    def stop(self):
+        self._cancelled = True
+
+
+class WatchWorker(QThread):
+    """
+    Runs a WatchSession (watch-folder mode) until stopped.
+    """
+
+    message_signal = pyqtSignal(str)
+    # (first frame name of the bracket, stage, frames and ETA)
+    status_signal = pyqtSignal(str, str)
+    # (images, output, exit code, supervisor status)
+    stacked_signal = pyqtSignal(object, str, int, str)
+
+    def __init__(self, folder, options, output_dir, subfolder=True, frames=0,
+                 verbose=False):
+        super().__init__()
+        self.session = WatchSession(
+            folder, options, output_dir, subfolder, frames, verbose=verbose,
+            on_output=self.message_signal.emit,
+            on_status=lambda images, text: self.status_signal.emit(
+                os.path.basename(images[0]), text
+            ),
+            on_finished=self.stacked_signal.emit,
+        )
+
+    def run(self):
+        try:
+            self.session.run()
+        except OSError as e:
+            self.message_signal.emit(f"Cannot watch the folder: {e}")
+
+    def stop(self):
+        self.session.stop()
+
+
+class BinaryWorker(QThread):
+    """
+    Resolves the focus-stack binary (an AppImage is extracted the first
+    time) without blocking the window.
+    """
+
+    # ResolvedBinary, or None
+    finished_signal = pyqtSignal(object)
+    message_signal = pyqtSignal(str)
+
+    def run(self):
+        try:
+            binary = focus_stack()
+        except BinaryNotFound as e:
+            self.message_signal.emit(str(e))
+            binary = None
+        self.finished_signal.emit(binary)
+
+
+class AutotuneWorker(QThread):
+    message_signal = pyqtSignal(str)
+    # Tuned options dict, or None
+    finished_signal = pyqtSignal(object)
+
+    def __init__(self, images, options):
+        super().__init__()
+        self.images = images
+        self.tuner = Autotuner(images, options, self.message_signal.emit)
 
     def run(self):
-        cmd = build_command(self.images, self.options)
-        process = run_process(cmd)
+        try:
+            info = probe_image(self.images[0])
+        except (OSError, ValueError) as e:
+            self.message_signal.emit(f"Autotune: {e}")
+            self.finished_signal.emit(None)
+            return
+
+        self.message_signal.emit(
+            f"Autotune on {len(self.tuner.images)} of {len(self.images)} frames..."
+        )
+        tuned = self.tuner.run()
 
-        for line in process.stdout:
-            if not self._running:
-                process.kill()
-                break
+        if tuned is not None:
+            TuningStore().save(info.width * info.height / 1e6, tuned)
+        self.finished_signal.emit(tuned)
 
-            line = line.strip()
-            self.output_signal.emit(line)
-            self._update_progress(line)
+    def stop(self):
+        self.tuner.cancel()
+
+
+class PyramidWorker(QThread):
+    """
+    Builds the tile pyramid of a result for the viewer.
+    """
+
+    # Level whose tiles are all written, coarsest first
+    level_signal = pyqtSignal(int)
+    message_signal = pyqtSignal(str)
+
+    def __init__(self, pyramid):
+        super().__init__()
+        self.pyramid = pyramid
+        self._cancelled = False
 
-        self.finished_signal.emit()
+    def run(self):
+        try:
+            self.pyramid.build(
+                lambda: self._cancelled, self.level_signal.emit
+            )
+        except OSError as e:
+            self.message_signal.emit(f"Cannot build the tiles: {e}")
 
     def stop(self):
-        self._running = False
+        self._cancelled = True
 
-    def _update_progress(self, line):
-        """
-        Progress estimation based on Focus-stack output text.
-        """
 
-        if "Align" in line:
-            self.progress_signal.emit(20)
+class TileLoader(QThread):
+    """
+    Decodes the tiles a view asks for. A request replaces the tiles not
+    yet decoded; tiles not built yet are skipped.
+    """
 
-        elif "Laplacian" in line or "pyramid" in line:
-            self.progress_signal.emit(40)
+    # ((pyramid, level, column, row), QImage)
+    loaded_signal = pyqtSignal(object, object)
 
-        elif "Merge" in line:
-            self.progress_signal.emit(70)
+    def __init__(self):
+        super().__init__()
+        self._wanted = []
+        self._stopped = False
+        self._condition = threading.Condition()
 
-        elif "Depth" in line:
-            self.progress_signal.emit(85)
+    def request(self, keys):
+        with self._condition:
+            self._wanted = list(keys)
+            self._condition.notify()
 
-        elif "Saving" in line or "Write" in line:
-            self.progress_signal.emit(95)
+    def run(self):
+        while True:
+            with self._condition:
+                while not self._wanted and not self._stopped:
+                    self._condition.wait()
+                if self._stopped:
+                    return
+                key = self._wanted.pop(0)
+            image = key[0].load(*key[1:])
+            if image is not None:
+                self.loaded_signal.emit(key, image)
 
-        elif "Done" in line:
-            self.progress_signal.emit(100)
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
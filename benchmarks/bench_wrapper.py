@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 15:20:41 2026
+
+@author: Robert Becht (roblin67@gmail.com)
+
+Benchmarks of the GUI wrapper overhead, separately from focus-stack:
+thumbnailing, command building, output streaming and signal delivery.
+
+By default focus-stack is replaced by benchmarks/fake_focus_stack.py.
+Use --real to run the configured binary on the generated stacks.
+
+    python benchmarks/bench_wrapper.py --sizes 10,50,200
+    python benchmarks/bench_wrapper.py --real --sizes 10 --width 2000
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.join(HERE, os.pardir, "apps", "focusstack_gui")
+SIMULATOR = os.path.join(HERE, "fake_focus_stack.py")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--sizes", default="10,50,200",
+                        help="comma separated stack sizes (frames)")
+    parser.add_argument("--width", type=int, default=1200)
+    parser.add_argument("--height", type=int, default=800)
+    parser.add_argument("--line-rate", type=float, default=500,
+                        help="simulator verbose lines per second")
+    parser.add_argument("--frame-time", type=float, default=0.005,
+                        help="simulator seconds per frame and stage")
+    parser.add_argument("--real", action="store_true",
+                        help="run the real focus-stack binary")
+    parser.add_argument("--json", help="also write the results to this file")
+    return parser.parse_args()
+
+
+def make_stack(folder, frames, width, height):
+    """
+    Synthetic focus bracket: the same pattern, sharp in a band that
+    moves through the frame.
+    """
+    from PyQt6.QtCore import Qt
+    from PyQt6.QtGui import QColor, QImage, QPainter
+
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+
+    for i in range(frames):
+        image = QImage(width, height, QImage.Format.Format_RGB32)
+        image.fill(QColor(40, 40, 40))
+        painter = QPainter(image)
+        band = int(height * i / max(1, frames - 1))
+        for y in range(0, height, 8):
+            sharp = abs(y - band) < height // 10
+            color = QColor(230, 200, 60) if sharp else QColor(120, 110, 60)
+            painter.fillRect(0, y, width, 4 if sharp else 6, color)
+        painter.setPen(Qt.GlobalColor.white)
+        painter.drawText(20, 40, f"frame {i}")
+        painter.end()
+
+        path = os.path.join(folder, f"frame_{i:04d}.jpg")
+        image.save(path, "JPG", 90)
+        paths.append(path)
+
+    return paths
+
+
+def options_for(output):
+    return {
+        "output": output,
+        "global_align": False, "full_res_align": False, "no_align": False,
+        "align_only": False, "no_whitebalance": False, "no_contrast": False,
+        "no_transform": False, "consistency": 2, "denoise": 1.0,
+        "depthmap": False, "depthmap_file": "depthmap.png",
+        "depth_threshold": 10, "depth_smooth_xy": 20, "depth_smooth_z": 40,
+        "threads": os.cpu_count() or 1, "batchsize": 8, "no_opencl": False,
+        "verbose": True,
+        # One focus-stack process, as in bench_baseline
+        "use_cache": False, "reuse_alignment": False,
+    }
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def bench_thumbnails(paths, cache_dir):
+    from thumbnails import ThumbnailCache, load_thumbnail
+
+    cache = ThumbnailCache(cache_dir)
+
+    t = time.perf_counter()
+    for path in paths:
+        cache.put(path, load_thumbnail(path))
+    cold = (time.perf_counter() - t) / len(paths)
+
+    t = time.perf_counter()
+    for path in paths:
+        cache.get(path)
+    warm = (time.perf_counter() - t) / len(paths)
+
+    return cold, warm
+
+
+def bench_build_command(paths, options, repeat=200):
+    from runner import build_command
+
+    t = time.perf_counter()
+    for _ in range(repeat):
+        build_command(paths, options)
+    return (time.perf_counter() - t) / repeat
+
+
+def bench_baseline(paths, options):
+    """
+    The bare process: run it and drain its output, no wrapper.
+    """
+    from runner import build_command
+
+    t = time.perf_counter()
+    subprocess.run(
+        build_command(paths, options),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False
+    )
+    return time.perf_counter() - t
+
+
+def bench_worker(app, paths, options):
+    """
+    The full runner/worker path, with signals delivered to this thread.
+    """
+    from PyQt6.QtCore import QEventLoop
+    from worker import FocusStackWorker
+
+    latencies = []
+    counts = {"signals": 0, "lines": 0}
+    loop = QEventLoop()
+
+    def on_output(text):
+        now = time.monotonic()
+        counts["signals"] += 1
+        for line in text.split("\n"):
+            counts["lines"] += 1
+            stamp = line.rpartition(" @")[2]
+            try:
+                latencies.append(now - float(stamp))
+            except ValueError:
+                pass
+
+    worker = FocusStackWorker(paths, options)
+    worker.output_signal.connect(on_output)
+    worker.finished_signal.connect(lambda code, status: loop.quit())
+
+    t = time.perf_counter()
+    worker.start()
+    loop.exec()
+    elapsed = time.perf_counter() - t
+    worker.wait()
+
+    return elapsed, counts, latencies
+
+
+def main():
+    args = parse_args()
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+
+    work_dir = tempfile.mkdtemp(prefix="focusstack-bench-")
+
+    # Keep the user's caches, logs and history out of the measurements
+    os.environ["XDG_CACHE_HOME"] = os.path.join(work_dir, "cache")
+    os.environ["XDG_STATE_HOME"] = os.path.join(work_dir, "state")
+    if not args.real:
+        os.environ["FOCUS_STACK_BIN"] = SIMULATOR
+        os.environ["FAKE_FS_LINE_RATE"] = str(args.line_rate)
+        os.environ["FAKE_FS_FRAME_TIME"] = str(args.frame_time)
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+    sys.path.insert(0, os.path.abspath(APP_DIR))
+    from PyQt6.QtGui import QGuiApplication
+    app = QGuiApplication(sys.argv)
+
+    results = []
+    for frames in sizes:
+        stack_dir = os.path.join(work_dir, f"stack_{frames}")
+        paths = make_stack(stack_dir, frames, args.width, args.height)
+        options = options_for(os.path.join(work_dir, f"out_{frames}.jpg"))
+
+        thumb_cold, thumb_warm = bench_thumbnails(
+            paths, os.path.join(work_dir, f"thumbs_{frames}")
+        )
+        build = bench_build_command(paths, options)
+        baseline = bench_baseline(paths, options)
+        wrapped, counts, latencies = bench_worker(app, paths, options)
+
+        results.append({
+            "frames": frames,
+            "thumbnail_cold_ms": thumb_cold * 1e3,
+            "thumbnail_warm_ms": thumb_warm * 1e3,
+            "build_command_us": build * 1e6,
+            "baseline_s": baseline,
+            "wrapped_s": wrapped,
+            "overhead_ms": (wrapped - baseline) * 1e3,
+            "lines": counts["lines"],
+            "signals": counts["signals"],
+            "lines_per_s": counts["lines"] / wrapped if wrapped else 0.0,
+            "latency_p50_ms": percentile(latencies, 0.5) * 1e3,
+            "latency_p95_ms": percentile(latencies, 0.95) * 1e3,
+            "latency_max_ms": max(latencies, default=0.0) * 1e3,
+        })
+
+    columns = [
+        ("frames", "frames", "{:>9}"),
+        ("thumb ms", "thumbnail_cold_ms", "{:>9.2f}"),
+        ("cached ms", "thumbnail_warm_ms", "{:>9.2f}"),
+        ("cmd us", "build_command_us", "{:>9.1f}"),
+        ("bare s", "baseline_s", "{:>9.2f}"),
+        ("wrap s", "wrapped_s", "{:>9.2f}"),
+        ("ovh ms", "overhead_ms", "{:>9.1f}"),
+        ("lines", "lines", "{:>9}"),
+        ("signals", "signals", "{:>9}"),
+        ("p50 ms", "latency_p50_ms", "{:>9.1f}"),
+        ("p95 ms", "latency_p95_ms", "{:>9.1f}"),
+    ]
+
+    from binaries import focus_stack_path
+    print(f"binary: {'simulator' if not args.real else focus_stack_path()}")
+    print(" ".join(f"{header:>9}" for header, _, _ in columns))
+    for r in results:
+        print(" ".join(fmt.format(r[key]) for _, key, fmt in columns))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"real": args.real, "results": results}, f, indent=2)
+
+    print(f"work dir: {work_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
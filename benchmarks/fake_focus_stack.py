@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 14:36:02 2026
+
+@author: Robert Becht (roblin67@gmail.com)
+
+Stand-in for the focus-stack binary, used by the benchmarks.
+
+Accepts the same command line as focus-stack, prints output in the same
+format and simulates CPU and memory load. Behaviour is set through
+environment variables:
+
+    FAKE_FS_FRAME_TIME   seconds of work per frame and stage (0.01)
+    FAKE_FS_LINE_RATE    extra verbose lines per second (200)
+    FAKE_FS_CPU          busy fraction of the simulated work, 0..1 (1.0)
+    FAKE_FS_MB_PER_FRAME memory held per frame of a batch in MB (4)
+    FAKE_FS_EXIT_CODE    exit code (0)
+
+Every line ends with "@<monotonic time>" so the benchmark can measure
+delivery latency (CLOCK_MONOTONIC is shared by all processes).
+"""
+
+import os
+import shutil
+import sys
+import time
+
+VERSION = "focus-stack 1.4 (simulator)"
+
+
+def _env(name, default):
+    return type(default)(os.environ.get(name, default))
+
+
+FRAME_TIME = _env("FAKE_FS_FRAME_TIME", 0.01)
+LINE_RATE = _env("FAKE_FS_LINE_RATE", 200.0)
+CPU = _env("FAKE_FS_CPU", 1.0)
+MB_PER_FRAME = _env("FAKE_FS_MB_PER_FRAME", 4.0)
+EXIT_CODE = _env("FAKE_FS_EXIT_CODE", 0)
+
+
+def emit(text):
+    sys.stdout.write(f"{text} @{time.monotonic():.6f}\n")
+    sys.stdout.flush()
+
+
+def work(seconds, verbose):
+    """
+    Burn CPU for the busy part of `seconds`, sleep the rest, and print
+    verbose lines at LINE_RATE meanwhile.
+    """
+    end = time.monotonic() + seconds
+    next_line = time.monotonic()
+    n = 0
+
+    while time.monotonic() < end:
+        now = time.monotonic()
+        if verbose and LINE_RATE > 0 and now >= next_line:
+            emit(f"    detail {n}")
+            n += 1
+            next_line = now + 1.0 / LINE_RATE
+
+        if CPU >= 1.0:
+            continue
+        busy_until = now + 0.001 * CPU
+        while time.monotonic() < busy_until:
+            pass
+        time.sleep(0.001 * (1.0 - CPU))
+
+
+def wait_for(path, seconds):
+    """
+    --wait-images: whether path exists, or appears within seconds.
+    """
+    end = time.monotonic() + seconds
+    while not os.path.exists(path):
+        if time.monotonic() >= end:
+            return False
+        time.sleep(0.05)
+    return True
+
+
+def parse_args(argv):
+    files = []
+    options = {}
+    for arg in argv:
+        if arg.startswith("--"):
+            key, _, value = arg[2:].partition("=")
+            options[key] = value
+        else:
+            files.append(arg)
+    return files, options
+
+
+def main():
+    files, options = parse_args(sys.argv[1:])
+
+    if "version" in options:
+        print(VERSION)
+        return 0
+    if "opencv-version" in options:
+        print("OpenCV 4.5.0 (simulator)")
+        return 0
+
+    verbose = "verbose" in options
+    batchsize = int(options.get("batchsize", 8) or 8)
+    output = options.get("output", "output.jpg")
+    wait = float(options.get("wait-images", 0) or 0)
+
+    n = len(files)
+    batches = (n + batchsize - 1) // batchsize
+    align_only = "align-only" in options
+    total = 2 * n if align_only else 3 * n + batches + 1
+    done = 0
+
+    def task(text):
+        nonlocal done
+        done += 1
+        emit(f"[{done:>{len(str(total))}}/{total}] {text}")
+
+    memory = []
+
+    for f in files:
+        if not wait_for(f, wait):
+            emit(f"Error: could not load {f}")
+            return 1
+        task(f"Loading {f}")
+        work(FRAME_TIME, verbose)
+
+    if "no-align" not in options:
+        for f in files:
+            task(f"Aligning {f}")
+            work(FRAME_TIME, verbose)
+    else:
+        done += n
+
+    if align_only:
+        # Aligned frames: --output is a prefix for the input file names
+        for f in files:
+            shutil.copyfile(f, output + os.path.basename(f))
+        emit(f"Saved {n} aligned images")
+        return EXIT_CODE
+
+    for f in files:
+        task(f"Computing wavelet {f}")
+        memory.append(bytearray(int(MB_PER_FRAME * 2**20)))
+        if len(memory) > batchsize:
+            memory.pop(0)
+        work(FRAME_TIME, verbose)
+
+    for b in range(batches):
+        task(f"Merging batch {b + 1}/{batches}")
+        work(FRAME_TIME, verbose)
+
+    task(f"Saving {output}")
+    if files and os.path.dirname(output) != "":
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+    if files:
+        shutil.copyfile(files[0], output)
+        if options.get("depthmap"):
+            shutil.copyfile(files[0], options["depthmap"])
+    emit(f"Saved to {output}")
+
+    return EXIT_CODE
+
+
+if __name__ == "__main__":
+    sys.exit(main())